@@ -0,0 +1,266 @@
+"""
+Async Supabase data-access layer.
+
+Routes are `async def`, so every PostgREST / Storage / Auth round trip goes
+through these non-blocking clients instead of the synchronous `supabase`
+client, which would stall the event loop for the duration of each call.
+
+All three clients share the same pool configuration: keep-alive connections
+are reused between requests and every call is bounded by a timeout. The
+clients are built on first use; `warm_up()` (run at startup) opens pooled
+connections ahead of the first request.
+
+With DATABASE_BACKEND=local, `db` is the SQLite stand-in from
+`local_backend` instead, which offers the same interface.
+"""
+import asyncio
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Optional, Tuple
+
+from app.database.instrumented import InstrumentedDatabase
+from app.database.supabase_client import DATABASE_BACKEND, SUPABASE_URL, SUPABASE_KEY, require_credentials
+from app.utils.metrics import METRICS_ENABLED
+
+if TYPE_CHECKING:
+    import httpx
+    from gotrue import AsyncGoTrueClient
+    from postgrest import AsyncPostgrestClient
+    from storage3 import AsyncStorageClient
+
+# Connection pool settings (per worker process)
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "100"))
+DB_POOL_MAX_KEEPALIVE = int(os.getenv("DB_POOL_MAX_KEEPALIVE", "20"))
+DB_POOL_KEEPALIVE_EXPIRY = float(os.getenv("DB_POOL_KEEPALIVE_EXPIRY", "30"))
+
+# Per-call timeouts in seconds
+DB_CALL_TIMEOUT = float(os.getenv("DB_CALL_TIMEOUT", "10"))
+DB_STORAGE_TIMEOUT = float(os.getenv("DB_STORAGE_TIMEOUT", "60"))
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# Read size when streaming a Storage object to a file
+DB_DOWNLOAD_CHUNK_SIZE = int(os.getenv("DB_DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+# REST API connections opened at startup (at most DB_POOL_MAX_KEEPALIVE stay open)
+DB_POOL_WARM_CONNECTIONS = int(os.getenv("DB_POOL_WARM_CONNECTIONS", "4"))
+
+
+def _pool_limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=DB_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=DB_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=DB_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout(seconds: float) -> "httpx.Timeout":
+    import httpx
+
+    return httpx.Timeout(seconds, connect=DB_CONNECT_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def _client_classes() -> Tuple[type, type, type]:
+    """
+    (pooled PostgREST client, pooled Storage client, GoTrue client) classes.
+    httpx and the Supabase client libraries are a large part of app.main's
+    import time, so they are imported when the first client is built.
+    """
+    import httpx
+    from gotrue import AsyncGoTrueClient
+    from postgrest import AsyncPostgrestClient
+    from storage3 import AsyncStorageClient
+
+    class PooledPostgrestClient(AsyncPostgrestClient):
+        def create_session(self, base_url, headers, timeout) -> httpx.AsyncClient:
+            return httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=_pool_limits(),
+            )
+
+    class PooledStorageClient(AsyncStorageClient):
+        def _create_session(self, base_url, headers, timeout) -> httpx.AsyncClient:
+            return httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=_pool_limits(),
+            )
+
+    return PooledPostgrestClient, PooledStorageClient, AsyncGoTrueClient
+
+
+class AsyncDatabase:
+    """
+    Lazily-built async clients for the Supabase REST, Storage and Auth APIs.
+
+    Mirrors the parts of the sync `Client` API the app uses
+    (`table`, `rpc`, `storage.from_`, `auth`) so queries read the same,
+    only awaited.
+    """
+
+    def __init__(self, url: str, key: str):
+        self.url = url
+        self.key = key
+        self._postgrest: Optional["AsyncPostgrestClient"] = None
+        self._storage: Optional["AsyncStorageClient"] = None
+        self._auth: Optional["AsyncGoTrueClient"] = None
+        self._auth_http: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> None:
+        # Pooled connections belong to the loop that opened them. If we are
+        # now running on a different loop (e.g. a fresh TestClient portal),
+        # start new pools instead of reusing dead connections.
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            self._postgrest = None
+            self._storage = None
+            self._auth = None
+            self._auth_http = None
+            self._loop = loop
+
+    def _headers(self) -> Dict[str, str]:
+        # Every client is built with these, so missing settings surface on
+        # first use (at startup, via warm_up) rather than at import
+        require_credentials()
+        return {
+            "apiKey": self.key,
+            "Authorization": f"Bearer {self.key}",
+        }
+
+    @property
+    def postgrest(self) -> "AsyncPostgrestClient":
+        self._bind_loop()
+        if self._postgrest is None:
+            pooled_postgrest, _, _ = _client_classes()
+            self._postgrest = pooled_postgrest(
+                f"{self.url}/rest/v1",
+                headers=self._headers(),
+                timeout=_timeout(DB_CALL_TIMEOUT),
+            )
+        return self._postgrest
+
+    @property
+    def storage(self) -> "AsyncStorageClient":
+        self._bind_loop()
+        if self._storage is None:
+            _, pooled_storage, _ = _client_classes()
+            self._storage = pooled_storage(
+                f"{self.url}/storage/v1",
+                self._headers(),
+                _timeout(DB_STORAGE_TIMEOUT),
+            )
+        return self._storage
+
+    @property
+    def auth(self) -> "AsyncGoTrueClient":
+        self._bind_loop()
+        if self._auth is None:
+            import httpx
+
+            _, _, gotrue_client = _client_classes()
+            self._auth_http = httpx.AsyncClient(
+                timeout=_timeout(DB_CALL_TIMEOUT),
+                limits=_pool_limits(),
+            )
+            # The backend never holds end-user sessions, so don't persist or
+            # auto-refresh the tokens returned by sign-in.
+            self._auth = gotrue_client(
+                url=f"{self.url}/auth/v1",
+                headers=self._headers(),
+                auto_refresh_token=False,
+                persist_session=False,
+                http_client=self._auth_http,
+            )
+        return self._auth
+
+    def table(self, table_name: str):
+        """Start a table query. Finish it with `await ....execute()`."""
+        return self.postgrest.from_(table_name)
+
+    def rpc(self, fn: str, params: Dict[str, Any]):
+        """Call a Postgres function. Finish it with `await ....execute()`."""
+        return self.postgrest.rpc(fn, params)
+
+    async def download_to(self, bucket_id: str, path: str, file: BinaryIO) -> int:
+        """
+        Streams a Storage object into `file` in DB_DOWNLOAD_CHUNK_SIZE
+        pieces, unlike `storage.from_(bucket).download`, which holds the
+        whole object in memory. Returns the number of bytes written.
+        """
+        written = 0
+        async with self.storage.session.stream("GET", f"object/{bucket_id}/{path}") as response:
+            if response.status_code >= 400:
+                from storage3.utils import StorageException
+
+                await response.aread()
+                raise StorageException({**response.json(), "statusCode": response.status_code})
+            async for chunk in response.aiter_bytes(DB_DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+                written += len(chunk)
+        return written
+
+    # Services checked by `probe` (see app/utils/readiness.py)
+    probe_services = ("rest", "storage", "auth")
+
+    async def probe(self, service: str) -> None:
+        """
+        One cheap request (no query, no body) to the REST, Storage or Auth
+        API over its pooled connections. Raises if the service can't be
+        reached or answers with a server error.
+        """
+        if service == "rest":
+            response = await self.postgrest.session.head("/")
+        elif service == "storage":
+            response = await self.storage.session.head("/")
+        else:
+            self.auth  # builds the Auth client and its pool, self._auth_http
+            response = await self._auth_http.get(f"{self.url}/auth/v1/health", headers=self._headers())
+        if response.status_code >= 500:
+            raise RuntimeError(f"{service} answered HTTP {response.status_code}")
+
+    async def warm_up(self, connections: int = DB_POOL_WARM_CONNECTIONS) -> None:
+        """
+        Builds the clients and opens `connections` pooled connections to the
+        REST API and one each to Storage and Auth, so the first requests
+        don't pay for DNS, TCP and TLS setup.
+        """
+        await asyncio.gather(*(self.probe("rest") for _ in range(max(1, connections))))
+        await self.probe("storage")
+        await self.probe("auth")
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        if self._postgrest is not None:
+            await self._postgrest.aclose()
+            self._postgrest = None
+        if self._storage is not None:
+            await self._storage.aclose()
+            self._storage = None
+        if self._auth is not None:
+            await self._auth.close()
+            self._auth = None
+        if self._auth_http is not None:
+            # Shared with the Auth client, which may not close a client it was handed
+            await self._auth_http.aclose()
+            self._auth_http = None
+
+
+if DATABASE_BACKEND == "local":
+    from app.database.local_backend import get_local_database
+
+    db = get_local_database()
+else:
+    db = AsyncDatabase(SUPABASE_URL, SUPABASE_KEY)
+
+if METRICS_ENABLED:
+    # Times every call (see /metrics)
+    db = InstrumentedDatabase(db)
@@ -0,0 +1,130 @@
+"""
+Timing for outbound Supabase calls.
+
+`InstrumentedDatabase` wraps the active backend (`AsyncDatabase` or the
+local stand-in) and records every awaited table query, rpc, Storage and
+Auth call in `tripshare_supabase_call_duration_seconds`, labelled by table
+(or function / bucket) and operation. Query builders are wrapped as they are
+chained, so call sites don't change.
+"""
+import asyncio
+import time
+from typing import Any, BinaryIO, Dict
+
+from app.utils.metrics import observe_backend_call
+
+QUERY_OPERATIONS = {"select", "insert", "upsert", "update", "delete"}
+
+
+class _TimedQuery:
+    """A query builder whose `execute()` is timed."""
+
+    def __init__(self, builder: Any, service: str, target: str, operation: str):
+        self._builder = builder
+        self._service = service
+        self._target = target
+        self._operation = operation
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            operation = name if name in QUERY_OPERATIONS else self._operation
+            return _TimedQuery(result, self._service, self._target, operation)
+
+        return chained
+
+    async def execute(self) -> Any:
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = await self._builder.execute()
+            ok = True
+            return result
+        finally:
+            observe_backend_call(self._service, self._target, self._operation, started, ok)
+
+
+class _TimedCalls:
+    """Wraps an object whose coroutine methods are each one backend call."""
+
+    def __init__(self, target_object: Any, service: str, target: str):
+        self._object = target_object
+        self._service = service
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._object, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await attr(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                observe_backend_call(self._service, self._target, name, started, ok)
+
+        return timed
+
+
+class _TimedStorage:
+    def __init__(self, storage: Any):
+        self._storage = storage
+
+    def from_(self, bucket_id: str) -> _TimedCalls:
+        return _TimedCalls(self._storage.from_(bucket_id), "storage", bucket_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._storage, name)
+
+
+class InstrumentedDatabase:
+    """
+    Same interface as the wrapped database (`table`, `rpc`, `storage`,
+    `auth`, `download_to`, `aclose`); other attributes are read and set on
+    the backend.
+    """
+
+    def __init__(self, backend: Any):
+        object.__setattr__(self, "backend", backend)
+
+    def table(self, table_name: str) -> _TimedQuery:
+        """Start a table query. Finish it with `await ....execute()`."""
+        return _TimedQuery(self.backend.table(table_name), "table", table_name, "select")
+
+    def rpc(self, fn: str, params: Dict[str, Any]) -> _TimedQuery:
+        """Call a Postgres function. Finish it with `await ....execute()`."""
+        return _TimedQuery(self.backend.rpc(fn, params), "rpc", fn, "call")
+
+    @property
+    def storage(self) -> _TimedStorage:
+        return _TimedStorage(self.backend.storage)
+
+    @property
+    def auth(self) -> _TimedCalls:
+        return _TimedCalls(self.backend.auth, "auth", "auth")
+
+    async def download_to(self, bucket_id: str, path: str, file: BinaryIO) -> int:
+        started = time.perf_counter()
+        ok = False
+        try:
+            written = await self.backend.download_to(bucket_id, path, file)
+            ok = True
+            return written
+        finally:
+            observe_backend_call("storage", bucket_id, "download_to", started, ok)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.backend, name, value)
@@ -0,0 +1,1008 @@
+"""
+Local stand-in for Supabase (DATABASE_BACKEND=local).
+
+Implements the parts of the PostgREST, Storage and Auth APIs the app uses on
+top of SQLite and a local directory, so the API, the maintenance jobs and the
+test scripts run without a Supabase project. The schema follows
+supabase/migrations; the SQL functions the app calls through `rpc` live in
+`local_functions`.
+
+Every call can be delayed by LOCAL_BACKEND_LATENCY_MS (± JITTER) to simulate
+the network round trip. The database work itself runs in a thread, like the
+remote work it stands in for, so it doesn't stall the event loop.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import secrets
+import shutil
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from io import IOBase
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import jwt
+from gotrue.errors import AuthApiError
+from gotrue.types import AuthResponse, Session, User, UserResponse
+from postgrest import APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from postgrest.exceptions import APIError
+from storage3.utils import StorageException
+
+LOCAL_BACKEND_DIR = os.getenv("LOCAL_BACKEND_DIR", ".local_backend")
+# ":memory:" keeps the database in memory (stored objects still go to disk)
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", os.path.join(LOCAL_BACKEND_DIR, "tripshare.db"))
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", os.path.join(LOCAL_BACKEND_DIR, "storage"))
+
+# Simulated network round trip per call, in milliseconds
+LOCAL_BACKEND_LATENCY_MS = float(os.getenv("LOCAL_BACKEND_LATENCY_MS", "0"))
+LOCAL_BACKEND_JITTER_MS = float(os.getenv("LOCAL_BACKEND_JITTER_MS", "0"))
+
+# Access tokens are signed with JWT_SECRET when set, so AUTH_VERIFY_MODE=local
+# can verify them like Supabase-issued ones.
+LOCAL_JWT_SECRET = os.getenv("JWT_SECRET") or "tripshare-local-backend-insecure-secret"
+LOCAL_TOKEN_LIFETIME = 3600
+# Local test accounts only; kept cheap so sign-ups don't dominate benchmarks
+PASSWORD_HASH_ITERATIONS = 10000
+
+SCHEMA = """
+create table if not exists users (
+  id uuid primary key,
+  username text,
+  email text,
+  created_at timestamptz not null default (now())
+);
+
+create table if not exists groups (
+  id uuid primary key default (uuid_generate_v4()),
+  code text not null,
+  owner_user_id uuid not null,
+  title text not null,
+  expires_at timestamptz,
+  created_at timestamptz not null default (now()),
+  version bigint not null default 0
+);
+create unique index if not exists groups_code_key on groups(code);
+create index if not exists idx_groups_expires_at on groups(expires_at);
+
+create table if not exists group_members (
+  id uuid primary key default (uuid_generate_v4()),
+  group_id uuid not null references groups(id) on delete cascade,
+  user_id uuid not null,
+  approved boolean not null default 0,
+  joined_at timestamptz not null default (now())
+);
+create index if not exists idx_group_members_group_id on group_members(group_id);
+create index if not exists idx_group_members_user_id on group_members(user_id);
+
+create table if not exists photos (
+  id uuid primary key default (uuid_generate_v4()),
+  group_id uuid not null references groups(id) on delete cascade,
+  uploader_id uuid not null,
+  storage_path text not null,
+  filename text,
+  mime_type text,
+  size bigint,
+  uploaded_at timestamptz not null default (now()),
+  renditions jsonb not null default '{}'
+);
+create index if not exists idx_photos_group_uploaded_at_id on photos(group_id, uploaded_at, id);
+
+create table if not exists group_warnings (
+  id uuid primary key default (uuid_generate_v4()),
+  group_id uuid not null references groups(id) on delete cascade,
+  days_left integer not null,
+  threshold_seconds integer not null,
+  created_at timestamptz not null default (now())
+);
+create unique index if not exists idx_group_warnings_group_threshold on group_warnings(group_id, threshold_seconds);
+
+create table if not exists rendition_jobs (
+  id uuid primary key default (uuid_generate_v4()),
+  photo_id uuid not null references photos(id) on delete cascade,
+  status text not null default 'pending',
+  attempts integer not null default 0,
+  last_error text,
+  run_after timestamptz not null default (now()),
+  locked_until timestamptz,
+  created_at timestamptz not null default (now()),
+  updated_at timestamptz not null default (now())
+);
+create index if not exists idx_rendition_jobs_status_run_after on rendition_jobs(status, run_after);
+
+create table if not exists maintenance_checkpoints (
+  job text primary key,
+  state jsonb not null default '{}',
+  updated_at timestamptz not null default (now())
+);
+
+create table if not exists maintenance_leases (
+  job text primary key,
+  holder text,
+  locked_until timestamptz,
+  last_started_at timestamptz,
+  last_finished_at timestamptz,
+  last_duration_seconds double precision,
+  last_result jsonb,
+  last_error text
+);
+
+-- Supabase Auth's users, kept apart from the app's `users` table
+create table if not exists auth_users (
+  id uuid primary key default (uuid_generate_v4()),
+  email text not null unique,
+  password_hash text not null,
+  user_metadata jsonb not null default '{}',
+  created_at timestamptz not null default (now())
+);
+
+-- Change counters, as maintained by the 20261018092000_group_versions and
+-- 20261018099000_group_listing_versions triggers
+create trigger if not exists groups_bump_version
+  after update on groups for each row when new.version = old.version
+begin
+  update groups set version = old.version + 1 where id = new.id;
+end;
+
+create table if not exists group_listing_versions (
+  group_id uuid primary key references groups(id) on delete cascade,
+  members bigint not null default 0,
+  photos bigint not null default 0
+);
+insert or ignore into group_listing_versions (group_id) select id from groups;
+create trigger if not exists groups_create_listing_versions after insert on groups
+begin
+  insert into group_listing_versions (group_id) values (new.id);
+end;
+"""
+
+# Same triggers for both listed child tables (and dropping the older
+# groups.version ones); updates only count when a listed column changed,
+# so rendition bookkeeping doesn't
+_LISTING_VERSION_TRIGGERS = """
+drop trigger if exists {table}_bump_version_insert;
+drop trigger if exists {table}_bump_version_update;
+drop trigger if exists {table}_bump_version_delete;
+create trigger if not exists {table}_bump_listing_version_insert after insert on {table}
+begin
+  update group_listing_versions set {listing} = {listing} + 1 where group_id = new.group_id;
+end;
+create trigger if not exists {table}_bump_listing_version_update after update on {table}
+  when {changed}
+begin
+  update group_listing_versions set {listing} = {listing} + 1 where group_id in (old.group_id, new.group_id);
+end;
+create trigger if not exists {table}_bump_listing_version_delete after delete on {table}
+begin
+  update group_listing_versions set {listing} = {listing} + 1 where group_id = old.group_id;
+end;
+"""
+# {table: (listing counter, columns the listing shows)}
+_LISTINGS = {
+    "group_members": ("members", ("group_id", "user_id", "approved")),
+    "photos": ("photos", ("group_id", "filename", "mime_type", "size", "uploaded_at")),
+}
+
+
+def _listing_version_triggers() -> str:
+    return "".join(
+        _LISTING_VERSION_TRIGGERS.format(
+            table=table, listing=listing, changed=" or ".join(f"new.{c} is not old.{c}" for c in columns)
+        )
+        for table, (listing, columns) in _LISTINGS.items()
+    )
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def to_timestamp(value: Union[str, datetime, None]) -> Optional[str]:
+    """
+    Normalizes a timestamp to a UTC ISO string with microseconds (naive
+    values are taken as UTC), so stored timestamps compare correctly as text.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _now() -> str:
+    return to_timestamp(datetime.now(timezone.utc))
+
+
+def _add_seconds(timestamp: Optional[str], seconds: float) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return to_timestamp(datetime.fromisoformat(timestamp) + timedelta(seconds=seconds))
+
+
+def _api_error(code: str, message: str, details: Optional[str] = None) -> APIError:
+    return APIError({"code": code, "message": message, "details": details, "hint": None})
+
+
+def _translate_error(error: sqlite3.Error) -> APIError:
+    """Maps SQLite errors to the PostgREST errors Postgres would have raised."""
+    message = str(error)
+    if message.startswith("UNIQUE constraint failed"):
+        columns = ", ".join(c.split(".")[-1] for c in message.split(":", 1)[1].split(","))
+        return _api_error(
+            "23505",
+            "duplicate key value violates unique constraint",
+            f"Key ({columns.strip()}) already exists."
+        )
+    if message.startswith("FOREIGN KEY constraint failed"):
+        return _api_error("23503", "insert or update violates foreign key constraint")
+    if message.startswith("NOT NULL constraint failed"):
+        column = message.split(":", 1)[1].strip().split(".")[-1]
+        return _api_error("23502", f'null value in column "{column}" violates not-null constraint')
+    return _api_error("XX000", message)
+
+
+def _split_columns(columns: str) -> List[str]:
+    """Splits a select list on top-level commas: "*, users(username)"."""
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+class LocalQuery:
+    """
+    PostgREST-style query builder for one table. Chain filters as with
+    postgrest-py and finish with `await ....execute()`.
+    """
+
+    def __init__(self, database: "LocalDatabase", table: str):
+        self._db = database
+        self._table = table
+        self._method = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: List[Dict[str, Any]] = []
+        self._returning = True
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: List[Tuple[str, bool, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._single = False
+        self._maybe_single = False
+
+    # Operations
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "LocalQuery":
+        self._method = "select"
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        return self
+
+    def _write(self, method: str, json: Any, returning: Optional[str]) -> "LocalQuery":
+        self._method = method
+        self._payload = [json] if isinstance(json, dict) else list(json or [])
+        self._returning = returning != "minimal"
+        return self
+
+    def insert(self, json: Any, *, count: Optional[str] = None, returning: Optional[str] = None, upsert: bool = False) -> "LocalQuery":
+        return self._write("upsert" if upsert else "insert", json, returning)
+
+    def upsert(
+        self,
+        json: Any,
+        *,
+        count: Optional[str] = None,
+        returning: Optional[str] = None,
+        ignore_duplicates: bool = False,
+        on_conflict: str = "",
+    ) -> "LocalQuery":
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self._write("upsert", json, returning)
+
+    def update(self, json: Dict[str, Any], *, count: Optional[str] = None, returning: Optional[str] = None) -> "LocalQuery":
+        return self._write("update", json, returning)
+
+    def delete(self, *, count: Optional[str] = None, returning: Optional[str] = None) -> "LocalQuery":
+        self._method = "delete"
+        self._returning = returning != "minimal"
+        return self
+
+    # Filters and modifiers
+
+    def _filter(self, column: str, op: str, value: Any) -> "LocalQuery":
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "=", value)
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "!=", value)
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, ">", value)
+
+    def gte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, ">=", value)
+
+    def lt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "<", value)
+
+    def lte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "<=", value)
+
+    def in_(self, column: str, values: Any) -> "LocalQuery":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "is", value)
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = False, foreign_table: Optional[str] = None) -> "LocalQuery":
+        self._order.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "LocalQuery":
+        self._limit = size
+        return self
+
+    def offset(self, size: int) -> "LocalQuery":
+        self._offset = size
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "LocalQuery":
+        self._single = True
+        return self
+
+    def maybe_single(self) -> "LocalQuery":
+        self._maybe_single = True
+        return self
+
+    # Execution
+
+    async def execute(self) -> Union[APIResponse, SingleAPIResponse, None]:
+        return await self._db.call(self.run)
+
+    def run(self) -> Union[APIResponse, SingleAPIResponse, None]:
+        """Runs the query synchronously (in the caller's thread)."""
+        self._db.columns(self._table)
+        with self._db.transaction() as conn:
+            rows, count = getattr(self, f"_run_{self._method}")(conn)
+
+        if self._single or self._maybe_single:
+            if self._maybe_single and not rows:
+                return None
+            if len(rows) != 1:
+                raise _api_error(
+                    "PGRST116",
+                    "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(rows)} rows"
+                )
+            return SingleAPIResponse(data=rows[0], count=count)
+        return APIResponse(data=rows if self._returning else [], count=count)
+
+    def _column(self, column: str) -> str:
+        if column not in self._db.columns(self._table):
+            raise _api_error("42703", f"column {self._table}.{column} does not exist")
+        return f'"{column}"'
+
+    def _where(self) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for column, op, value in self._filters:
+            name = self._column(column)
+            if op == "in":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{name} in ({', '.join('?' for _ in value)})")
+                params.extend(self._db.encode(self._table, column, v) for v in value)
+            elif op == "is":
+                if value is None or str(value).lower() == "null":
+                    clauses.append(f"{name} is null")
+                else:
+                    clauses.append(f"{name} is ?")
+                    params.append(str(value).lower() in ("true", "1"))
+            else:
+                clauses.append(f"{name} {op} ?")
+                params.append(self._db.encode(self._table, column, value))
+        return (" where " + " and ".join(clauses)) if clauses else "", params
+
+    def _select_list(self) -> Tuple[List[str], List[Tuple[str, List[str]]]]:
+        """Plain columns (["*"] for all) and embedded (table, columns) resources."""
+        plain, embeds = [], []
+        for part in _split_columns(self._columns):
+            match = re.match(r"^(\w+)\((.*)\)$", part)
+            if match:
+                embeds.append((match.group(1), _split_columns(match.group(2)) or ["*"]))
+            else:
+                plain.append(part)
+        return plain or ["*"], embeds
+
+    def _run_select(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        plain, embeds = self._select_list()
+        where, params = self._where()
+
+        sql_columns = ["*"] if "*" in plain else [self._column(c) for c in plain]
+        extra_keys = []
+        if embeds and "*" not in plain:
+            # Join keys are needed even if not selected
+            for key in ("id", *(f"{_singular(t)}_id" for t, _ in embeds)):
+                if key in self._db.columns(self._table) and key not in plain:
+                    sql_columns.append(f'"{key}"')
+                    extra_keys.append(key)
+
+        sql = f'select {", ".join(sql_columns)} from "{self._table}"{where}'
+        if self._order:
+            sql += " order by " + ", ".join(
+                f"{self._column(c)} {'desc' if desc else 'asc'} nulls {'first' if nullsfirst or desc else 'last'}"
+                for c, desc, nullsfirst in self._order
+            )
+        if self._limit is not None or self._offset:
+            sql += f" limit {int(self._limit if self._limit is not None else -1)} offset {int(self._offset or 0)}"
+
+        rows = [self._db.decode_row(self._table, row) for row in conn.execute(sql, params)]
+        for table, columns in embeds:
+            self._embed(conn, rows, table, columns)
+        for row in rows:
+            for key in extra_keys:
+                row.pop(key, None)
+
+        count = None
+        if self._count:
+            count = conn.execute(f'select count(*) from "{self._table}"{where}', params).fetchone()[0]
+        return rows, count
+
+    def _embed(self, conn: sqlite3.Connection, rows: List[Dict[str, Any]], table: str, columns: List[str]) -> None:
+        """
+        Resolves an embedded resource like PostgREST: many-to-one when this
+        table has `<table>_id` (users(username) on group_members), else
+        one-to-many through `<this table>_id` on the other table.
+        """
+        related_columns = self._db.columns(table)
+        wanted = list(related_columns) if "*" in columns else columns
+        for column in wanted:
+            if column not in related_columns:
+                raise _api_error("42703", f"column {table}.{column} does not exist")
+
+        foreign_key = f"{_singular(table)}_id"
+        if foreign_key in self._db.columns(self._table):
+            key, related_key, many = foreign_key, "id", False
+        else:
+            key, related_key, many = "id", f"{_singular(self._table)}_id", True
+            if related_key not in related_columns:
+                raise _api_error("PGRST200", f"Could not find a relationship between '{self._table}' and '{table}'")
+
+        ids = list({row[key] for row in rows if row.get(key) is not None})
+        related: Dict[Any, List[Dict[str, Any]]] = {}
+        if ids:
+            select = ", ".join(f'"{c}"' for c in dict.fromkeys([*wanted, related_key]))
+            placeholders = ", ".join("?" for _ in ids)
+            for row in conn.execute(f'select {select} from "{table}" where "{related_key}" in ({placeholders})', ids):
+                row = self._db.decode_row(table, row)
+                group_key = row[related_key] if related_key in wanted else row.pop(related_key)
+                related.setdefault(group_key, []).append(row)
+
+        for row in rows:
+            matches = related.get(row.get(key), [])
+            row[table] = matches if many else (matches[0] if matches else None)
+
+    def _encode_payload(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        for column in row:
+            self._column(column)
+        return {column: self._db.encode(self._table, column, value) for column, value in row.items()}
+
+    def _run_insert(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], None]:
+        rows = []
+        for row in self._payload:
+            row = self._encode_payload(row)
+            if row:
+                columns = ", ".join(f'"{c}"' for c in row)
+                placeholders = ", ".join("?" for _ in row)
+                sql = f'insert into "{self._table}" ({columns}) values ({placeholders}) returning *'
+            else:
+                sql = f'insert into "{self._table}" default values returning *'
+            rows.extend(conn.execute(sql, list(row.values())).fetchall())
+        return [self._db.decode_row(self._table, r) for r in rows], None
+
+    def _run_upsert(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], None]:
+        target = [c.strip() for c in self._on_conflict.split(",")] if self._on_conflict else self._db.primary_key(self._table)
+        target_sql = ", ".join(self._column(c) for c in target)
+        rows = []
+        for row in self._payload:
+            row = self._encode_payload(row)
+            columns = ", ".join(f'"{c}"' for c in row)
+            placeholders = ", ".join("?" for _ in row)
+            updates = [c for c in row if c not in target]
+            if self._ignore_duplicates or not updates:
+                action = "do nothing"
+            else:
+                action = "do update set " + ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+            sql = (
+                f'insert into "{self._table}" ({columns}) values ({placeholders}) '
+                f"on conflict ({target_sql}) {action} returning *"
+            )
+            rows.extend(conn.execute(sql, list(row.values())).fetchall())
+        return [self._db.decode_row(self._table, r) for r in rows], None
+
+    def _run_update(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], None]:
+        values = self._encode_payload(self._payload[0] if self._payload else {})
+        if not values:
+            return [], None
+        where, params = self._where()
+        assignments = ", ".join(f'"{c}" = ?' for c in values)
+        sql = f'update "{self._table}" set {assignments}{where} returning *'
+        rows = conn.execute(sql, [*values.values(), *params]).fetchall()
+        return [self._db.decode_row(self._table, r) for r in rows], None
+
+    def _run_delete(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], None]:
+        where, params = self._where()
+        rows = conn.execute(f'delete from "{self._table}"{where} returning *', params).fetchall()
+        return [self._db.decode_row(self._table, r) for r in rows], None
+
+
+class LocalRpc:
+    """A call to one of the functions in `local_functions`."""
+
+    def __init__(self, database: "LocalDatabase", fn: str, params: Dict[str, Any]):
+        self._db = database
+        self._fn = fn
+        self._params = params or {}
+
+    async def execute(self) -> APIResponse:
+        return await self._db.call(self.run)
+
+    def run(self) -> APIResponse:
+        from app.database.local_functions import FUNCTIONS
+
+        func = FUNCTIONS.get(self._fn)
+        if func is None:
+            raise _api_error("PGRST202", f"Could not find the function public.{self._fn}")
+        with self._db.transaction() as conn:
+            data = func(self._db, conn, self._params)
+        # Scalar results (e.g. booleans) come back as-is, like PostgREST
+        return APIResponse.construct(data=data, count=None)
+
+
+class LocalBucket:
+    """
+    Storage bucket kept as files under `<storage dir>/<bucket>/`.
+    """
+
+    def __init__(self, database: "LocalDatabase", root: Path, bucket_id: str):
+        self._db = database
+        self.id = bucket_id
+        self._root = root / bucket_id
+
+    def _file(self, path: str) -> Path:
+        parts = [p for p in path.split("/") if p]
+        if not parts or any(p in (".", "..") for p in parts):
+            raise StorageException({"statusCode": 400, "error": "InvalidKey", "message": f"Invalid key: {path}"})
+        return self._root.joinpath(*parts)
+
+    def _not_found(self, path: str) -> StorageException:
+        return StorageException({"statusCode": 404, "error": "not_found", "message": f"Object not found: {path}"})
+
+    def _sign(self, path: str, expires_in: int) -> Optional[str]:
+        file = self._file(path)
+        if not file.is_file():
+            return None
+        # Same shape as Storage's signed URL tokens
+        token = jwt.encode(
+            {"url": f"{self.id}/{path}", "exp": int(datetime.now(timezone.utc).timestamp()) + int(expires_in)},
+            LOCAL_JWT_SECRET,
+            algorithm="HS256"
+        )
+        return f"{file.resolve().as_uri()}?token={token}"
+
+    async def upload(self, path: str, file: Union[bytes, str, Path, IOBase], file_options: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        upsert = str((file_options or {}).get("x-upsert", "false")).lower() == "true"
+        if isinstance(file, IOBase):
+            # Read on the caller's side; the stream may not be thread-safe
+            file = file.read()
+
+        def write() -> Dict[str, str]:
+            target = self._file(path)
+            if target.exists() and not upsert:
+                raise StorageException({"statusCode": 400, "error": "Duplicate", "message": "The resource already exists"})
+            target.parent.mkdir(parents=True, exist_ok=True)
+            content = file if isinstance(file, bytes) else Path(file).read_bytes()
+            # Write then rename, so readers never see a partial object
+            tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+            tmp.write_bytes(content)
+            os.replace(tmp, target)
+            return {"Key": f"{self.id}/{path}"}
+
+        return await self._db.call(write)
+
+    async def download(self, path: str) -> bytes:
+        def read() -> bytes:
+            try:
+                return self._file(path).read_bytes()
+            except FileNotFoundError:
+                raise self._not_found(path)
+
+        return await self._db.call(read)
+
+    async def download_to(self, path: str, file: BinaryIO) -> int:
+        def copy() -> int:
+            try:
+                with open(self._file(path), "rb") as source:
+                    shutil.copyfileobj(source, file)
+                    return source.tell()
+            except FileNotFoundError:
+                raise self._not_found(path)
+
+        return await self._db.call(copy)
+
+    async def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        def unlink() -> List[Dict[str, Any]]:
+            removed = []
+            for path in paths:
+                try:
+                    self._file(path).unlink()
+                except FileNotFoundError:
+                    continue
+                removed.append({"name": path, "bucket_id": self.id})
+            return removed
+
+        return await self._db.call(unlink)
+
+    async def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        def scan() -> List[Dict[str, Any]]:
+            folder = self._file(path) if path else self._root
+            if not folder.is_dir():
+                return []
+            return [{"name": entry.name} for entry in sorted(folder.iterdir()) if not entry.name.startswith(".")]
+
+        return await self._db.call(scan)
+
+    async def create_signed_url(self, path: str, expires_in: int, options: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        def sign() -> Dict[str, str]:
+            url = self._sign(path, expires_in)
+            if url is None:
+                raise self._not_found(path)
+            return {"signedURL": url, "signedUrl": url}
+
+        return await self._db.call(sign)
+
+    async def create_signed_urls(self, paths: List[str], expires_in: int, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        def sign_all() -> List[Dict[str, Any]]:
+            results = []
+            for path in paths:
+                url = self._sign(path, expires_in)
+                results.append({
+                    "path": path,
+                    "signedURL": url,
+                    "error": None if url else "Either the object does not exist or you do not have access to it"
+                })
+            return results
+
+        return await self._db.call(sign_all)
+
+
+class LocalStorage:
+    def __init__(self, database: "LocalDatabase", root: str):
+        self._db = database
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def from_(self, bucket_id: str) -> LocalBucket:
+        return LocalBucket(self._db, self.root, bucket_id)
+
+
+class LocalAuth:
+    """
+    Email/password accounts in the `auth_users` table, with HS256 access
+    tokens shaped like Supabase's (sub, email, aud, user_metadata).
+    """
+
+    def __init__(self, database: "LocalDatabase"):
+        self._db = database
+
+    @staticmethod
+    def _hash_password(password: str, salt: Optional[bytes] = None) -> str:
+        salt = salt or secrets.token_bytes(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_HASH_ITERATIONS)
+        return f"{salt.hex()}${digest.hex()}"
+
+    @classmethod
+    def _check_password(cls, password: str, password_hash: str) -> bool:
+        salt, _ = password_hash.split("$", 1)
+        return hmac.compare_digest(cls._hash_password(password, bytes.fromhex(salt)), password_hash)
+
+    @staticmethod
+    def _user(row: Dict[str, Any]) -> User:
+        return User(
+            id=row["id"],
+            email=row["email"],
+            app_metadata={"provider": "email", "providers": ["email"]},
+            user_metadata=row["user_metadata"] or {},
+            aud="authenticated",
+            role="authenticated",
+            created_at=row["created_at"],
+        )
+
+    @staticmethod
+    def _session(user: User) -> Session:
+        now = int(datetime.now(timezone.utc).timestamp())
+        access_token = jwt.encode(
+            {
+                "sub": user.id,
+                "email": user.email,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "iat": now,
+                "exp": now + LOCAL_TOKEN_LIFETIME,
+                "user_metadata": user.user_metadata,
+            },
+            LOCAL_JWT_SECRET,
+            algorithm="HS256"
+        )
+        return Session(
+            access_token=access_token,
+            refresh_token=secrets.token_urlsafe(24),
+            expires_in=LOCAL_TOKEN_LIFETIME,
+            expires_at=now + LOCAL_TOKEN_LIFETIME,
+            token_type="bearer",
+            user=user,
+        )
+
+    def _find(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        with self._db.transaction() as conn:
+            row = conn.execute(f'select * from auth_users where "{column}" = ?', [value]).fetchone()
+        return self._db.decode_row("auth_users", row) if row else None
+
+    async def sign_up(self, credentials: Dict[str, Any]) -> AuthResponse:
+        def create() -> AuthResponse:
+            metadata = (credentials.get("options") or {}).get("data") or {}
+            try:
+                with self._db.transaction() as conn:
+                    row = conn.execute(
+                        "insert into auth_users (email, password_hash, user_metadata) values (?, ?, ?) returning *",
+                        [credentials["email"].lower(), self._hash_password(credentials["password"]), json.dumps(metadata)]
+                    ).fetchone()
+            except APIError:
+                raise AuthApiError("User already registered", 422)
+            user = self._user(self._db.decode_row("auth_users", row))
+            return AuthResponse(user=user, session=self._session(user))
+
+        return await self._db.call(create)
+
+    async def sign_in_with_password(self, credentials: Dict[str, Any]) -> AuthResponse:
+        def sign_in() -> AuthResponse:
+            row = self._find("email", credentials.get("email", "").lower())
+            if row is None or not self._check_password(credentials.get("password", ""), row["password_hash"]):
+                raise AuthApiError("Invalid login credentials", 400)
+            user = self._user(row)
+            return AuthResponse(user=user, session=self._session(user))
+
+        return await self._db.call(sign_in)
+
+    async def get_user(self, jwt_token: Optional[str] = None) -> UserResponse:
+        def lookup() -> UserResponse:
+            try:
+                claims = jwt.decode(jwt_token or "", LOCAL_JWT_SECRET, algorithms=["HS256"], audience="authenticated")
+            except jwt.PyJWTError as e:
+                raise AuthApiError(f"invalid JWT: {e}", 401)
+            row = self._find("id", claims["sub"])
+            if row is None:
+                raise AuthApiError("User not found", 404)
+            return UserResponse(user=self._user(row))
+
+        return await self._db.call(lookup)
+
+    async def close(self) -> None:
+        pass
+
+
+class SyncLocalClient:
+    """
+    Blocking `table` / `rpc` over the same database, for code written
+    against the sync `supabase` client (test_phase*.py).
+    """
+
+    def __init__(self, database: "LocalDatabase"):
+        self._db = database
+
+    def table(self, table_name: str) -> "_SyncLocalQuery":
+        return _SyncLocalQuery(self._db, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Dict[str, Any]) -> "_SyncLocalRpc":
+        return _SyncLocalRpc(self._db, fn, params)
+
+
+class _SyncLocalQuery(LocalQuery):
+    def execute(self):
+        return self.run()
+
+
+class _SyncLocalRpc(LocalRpc):
+    def execute(self):
+        return self.run()
+
+
+class LocalDatabase:
+    """
+    Drop-in for `AsyncDatabase` (`table`, `rpc`, `storage.from_`, `auth`)
+    backed by SQLite and a local directory.
+    """
+
+    def __init__(
+        self,
+        db_path: str = LOCAL_DB_PATH,
+        storage_dir: str = LOCAL_STORAGE_DIR,
+        latency_ms: float = LOCAL_BACKEND_LATENCY_MS,
+        jitter_ms: float = LOCAL_BACKEND_JITTER_MS,
+    ):
+        self.db_path = db_path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # One connection shared by all threads, used under _lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.create_function("now", 0, _now)
+        self._conn.create_function("uuid_generate_v4", 0, lambda: str(uuid.uuid4()))
+        self._conn.create_function("add_seconds", 2, _add_seconds)
+        self._conn.execute("pragma foreign_keys = on")
+        self._conn.executescript(
+            SCHEMA + _listing_version_triggers()
+        )
+
+        self._columns: Dict[str, Dict[str, str]] = {}
+        self._primary_keys: Dict[str, List[str]] = {}
+        for (table,) in self._conn.execute("select name from sqlite_master where type = 'table'").fetchall():
+            info = self._conn.execute(f'pragma table_info("{table}")').fetchall()
+            self._columns[table] = {row["name"]: row["type"].lower() for row in info}
+            self._primary_keys[table] = [row["name"] for row in sorted(info, key=lambda r: r["pk"]) if row["pk"]]
+
+        self.storage = LocalStorage(self, storage_dir)
+        self.auth = LocalAuth(self)
+
+    # Schema helpers
+
+    def columns(self, table: str) -> Dict[str, str]:
+        if not _IDENTIFIER.match(table) or table not in self._columns:
+            raise _api_error("42P01", f'relation "public.{table}" does not exist')
+        return self._columns[table]
+
+    def primary_key(self, table: str) -> List[str]:
+        self.columns(table)
+        return self._primary_keys[table]
+
+    def encode(self, table: str, column: str, value: Any) -> Any:
+        """Python/JSON value -> SQLite value for `table.column`."""
+        if value is None:
+            return None
+        column_type = self._columns[table].get(column)
+        if column_type == "jsonb":
+            return json.dumps(value)
+        if column_type == "boolean":
+            if isinstance(value, str):
+                return value.lower() in ("true", "t", "1")
+            return bool(value)
+        if column_type == "timestamptz":
+            return to_timestamp(value)
+        if column_type == "uuid":
+            return str(value)
+        return value
+
+    def decode_row(self, table: str, row: Union[sqlite3.Row, Dict[str, Any]]) -> Dict[str, Any]:
+        """SQLite row -> dict as PostgREST would return it."""
+        types = self._columns.get(table, {})
+        decoded = {}
+        for column, value in dict(row).items():
+            column_type = types.get(column)
+            if value is not None and column_type == "jsonb":
+                value = json.loads(value)
+            elif value is not None and column_type == "boolean":
+                value = bool(value)
+            decoded[column] = value
+        return decoded
+
+    # Execution
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """The connection, locked, inside a transaction (like one HTTP call)."""
+        with self._lock:
+            try:
+                with self._conn:
+                    yield self._conn
+            except sqlite3.Error as e:
+                raise _translate_error(e) from e
+
+    async def round_trip(self) -> None:
+        """Waits out the simulated network latency, if any."""
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(0.0, delay) / 1000)
+
+    async def call(self, func):
+        """
+        Runs `func` in a worker thread after the simulated round trip.
+        Database work takes the lock itself, via `transaction`.
+        """
+        await self.round_trip()
+        return await asyncio.to_thread(func)
+
+    def table(self, table_name: str) -> LocalQuery:
+        """Start a table query. Finish it with `await ....execute()`."""
+        return LocalQuery(self, table_name)
+
+    def rpc(self, fn: str, params: Dict[str, Any]) -> LocalRpc:
+        """Call a function from `local_functions`. Finish it with `await ....execute()`."""
+        return LocalRpc(self, fn, params)
+
+    def sync_client(self) -> SyncLocalClient:
+        return SyncLocalClient(self)
+
+    probe_services = ("database", "storage")
+
+    async def probe(self, service: str) -> None:
+        """A trivial query, or a check that the storage directory is there."""
+        def ping() -> None:
+            if service == "storage":
+                if not self.storage.root.is_dir():
+                    raise RuntimeError(f"Storage directory {self.storage.root} is missing")
+                return
+            with self.transaction() as conn:
+                conn.execute("select 1")
+
+        await self.call(ping)
+
+    async def download_to(self, bucket_id: str, path: str, file: BinaryIO) -> int:
+        """Copies a stored object into `file`, like AsyncDatabase.download_to."""
+        return await self.storage.from_(bucket_id).download_to(path, file)
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """One query through the worker threads, like a first request would."""
+        await self.probe("database")
+
+    async def aclose(self) -> None:
+        """Nothing to release: the connection lives as long as the process."""
+
+
+_local_db: Optional[LocalDatabase] = None
+_local_db_lock = threading.Lock()
+
+
+def get_local_database() -> LocalDatabase:
+    """The process-wide local database (shared by the async and sync clients)."""
+    global _local_db
+    with _local_db_lock:
+        if _local_db is None:
+            _local_db = LocalDatabase()
+        return _local_db
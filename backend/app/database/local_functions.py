@@ -0,0 +1,182 @@
+"""
+Python versions of the SQL functions in supabase/migrations, for the local
+backend's `rpc`. Each takes the database, a connection inside a transaction
+and the call's parameters, and returns what PostgREST would.
+"""
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional
+
+from app.database.local_backend import LocalDatabase, to_timestamp
+
+
+def claim_rendition_jobs(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    conn.execute(
+        """
+        update rendition_jobs
+        set status = 'failed',
+            last_error = 'Worker lease expired on the last attempt',
+            locked_until = null,
+            updated_at = now()
+        where status = 'running' and locked_until < now() and attempts >= ?
+        """,
+        [params["p_max_attempts"]]
+    )
+    rows = conn.execute(
+        """
+        update rendition_jobs
+        set status = 'running',
+            attempts = attempts + 1,
+            locked_until = add_seconds(now(), ?),
+            updated_at = now()
+        where id in (
+          select id from rendition_jobs
+          where (status = 'pending' and run_after <= now())
+             or (status = 'running' and locked_until < now() and attempts < ?)
+          order by run_after
+          limit ?
+        )
+        returning *
+        """,
+        [params["p_lease_seconds"], params["p_max_attempts"], params["p_limit"]]
+    ).fetchall()
+    return [db.decode_row("rendition_jobs", row) for row in rows]
+
+
+def list_group_photos_page(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    after_uploaded_at = to_timestamp(params.get("p_after_uploaded_at"))
+    rows = conn.execute(
+        """
+        select id, filename, mime_type, size, uploaded_at, storage_path, renditions
+        from photos
+        where group_id = ?
+          and (? is null or (uploaded_at, id) > (?, ?))
+        order by uploaded_at, id
+        limit ?
+        """,
+        [str(params["p_group_id"]), after_uploaded_at, after_uploaded_at, params.get("p_after_id"), params["p_limit"]]
+    ).fetchall()
+    return [db.decode_row("photos", row) for row in rows]
+
+
+def group_photo_summaries(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    summaries = []
+    for group_id in params["p_group_ids"]:
+        count = conn.execute("select count(*) from photos where group_id = ?", [group_id]).fetchone()[0]
+        cover = conn.execute(
+            """
+            select id, storage_path, renditions from photos
+            where group_id = ?
+            order by uploaded_at desc, id desc
+            limit 1
+            """,
+            [group_id]
+        ).fetchone()
+        cover = db.decode_row("photos", cover) if cover else {}
+        summaries.append({
+            "group_id": group_id,
+            "photo_count": count,
+            "cover_photo_id": cover.get("id"),
+            "cover_storage_path": cover.get("storage_path"),
+            "cover_renditions": cover.get("renditions"),
+        })
+    return summaries
+
+
+def extend_owned_group(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        """
+        update groups
+        set expires_at = add_seconds(max(now(), coalesce(expires_at, now())), ?)
+        where id = ? and owner_user_id = ?
+        returning id, expires_at
+        """,
+        [params["p_days"] * 86400, str(params["p_group_id"]), str(params["p_owner_id"])]
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def set_member_approval(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = conn.execute(
+        """
+        update group_members
+        set approved = ?
+        where id = ?
+          and group_id = ?
+          and exists (
+            select 1 from groups g
+            where g.id = group_members.group_id and g.owner_user_id = ?
+          )
+        returning *
+        """,
+        [bool(params["p_approved"]), str(params["p_member_id"]), str(params["p_group_id"]), str(params["p_owner_id"])]
+    ).fetchall()
+    return [db.decode_row("group_members", row) for row in rows]
+
+
+def pending_expiry_warnings(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    thresholds = sorted(params["p_thresholds"])
+    if not thresholds:
+        return []
+    after_id: Optional[str] = params.get("p_after_id")
+    rows = conn.execute(
+        """
+        select id, title, owner_user_id, expires_at,
+               (julianday(expires_at) - julianday(now())) * 86400 as seconds_left
+        from groups
+        where expires_at > now()
+          and expires_at <= add_seconds(now(), ?)
+          and (? is null or id > ?)
+        order by id
+        """,
+        [thresholds[-1], after_id, after_id]
+    )
+
+    due = []
+    for row in rows:
+        # Only the tightest threshold the group is within
+        threshold = next(t for t in thresholds if row["seconds_left"] <= t)
+        warned = conn.execute(
+            "select 1 from group_warnings where group_id = ? and threshold_seconds = ?",
+            [row["id"], threshold]
+        ).fetchone()
+        if warned:
+            continue
+        due.append({
+            "group_id": row["id"],
+            "title": row["title"],
+            "owner_user_id": row["owner_user_id"],
+            "expires_at": row["expires_at"],
+            "threshold_seconds": threshold,
+        })
+        if len(due) >= params["p_limit"]:
+            break
+    return due
+
+
+def acquire_maintenance_lease(db: LocalDatabase, conn: sqlite3.Connection, params: Dict[str, Any]) -> bool:
+    row = conn.execute(
+        """
+        insert into maintenance_leases (job, holder, locked_until)
+        values (?, ?, add_seconds(now(), ?))
+        on conflict (job) do update
+          set holder = excluded.holder,
+              locked_until = excluded.locked_until
+          where maintenance_leases.holder = excluded.holder
+             or maintenance_leases.locked_until is null
+             or maintenance_leases.locked_until < now()
+        returning 1
+        """,
+        [params["p_job"], params["p_holder"], params["p_lease_seconds"]]
+    ).fetchone()
+    return row is not None
+
+
+FUNCTIONS: Dict[str, Callable[[LocalDatabase, sqlite3.Connection, Dict[str, Any]], Any]] = {
+    "claim_rendition_jobs": claim_rendition_jobs,
+    "list_group_photos_page": list_group_photos_page,
+    "group_photo_summaries": group_photo_summaries,
+    "extend_owned_group": extend_owned_group,
+    "set_member_approval": set_member_approval,
+    "pending_expiry_warnings": pending_expiry_warnings,
+    "acquire_maintenance_lease": acquire_maintenance_lease,
+}
@@ -1,22 +1,74 @@
 """
 Supabase client initialization and configuration.
+
+The synchronous `supabase` client is only used by scripts and tests, so it
+is created on first access (`from app.database.supabase_client import
+supabase` still works) rather than when the API is imported.
 """
 import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import threading
+from typing import Any, Optional
+
+
+def _load_env_file() -> None:
+    # Same search as python-dotenv's find_dotenv(): this directory, then its
+    # parents. Deployments set real environment variables and have no .env
+    # file, so they skip importing dotenv at all.
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
 
 # Load environment variables from .env file
-load_dotenv()
+_load_env_file()
+
+# "supabase" (default) or "local" (SQLite stand-in, see local_backend.py)
+DATABASE_BACKEND: str = os.getenv("DATABASE_BACKEND", "supabase").lower()
 
 # Get Supabase credentials from environment variables
 SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "SUPABASE_URL and SUPABASE_KEY must be set in environment variables"
-    )
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def require_credentials() -> None:
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError(
+            "SUPABASE_URL and SUPABASE_KEY must be set in environment variables"
+        )
+
+
+def get_supabase() -> Any:
+    """The synchronous Supabase client (or the local stand-in's), built once."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if DATABASE_BACKEND == "local":
+                from app.database.local_backend import get_local_database
+
+                # Blocking table/rpc calls over the local database
+                _client = get_local_database().sync_client()
+            else:
+                require_credentials()
+                from supabase import create_client
+
+                # Initialize Supabase client
+                _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _client
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+def __getattr__(name: str) -> Any:
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
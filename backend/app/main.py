@@ -1,18 +1,112 @@
 """
 TripShare FastAPI Backend - Main Application Entry Point
 """
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routes import ping, auth, groups, photos
+from app.routes import ping, auth, groups, photos, dashboard, maintenance, metrics
+from app.database.async_client import db
+from app.utils.cleanup import cleanup_expired_groups
+from app.utils.expiry_warnings import send_expiry_warnings
+from app.utils.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.readiness import readiness
+from app.utils.rendition_queue import rendition_worker, RENDITION_WORKER_ENABLED
+from app.utils.scheduler import (
+    scheduler, MAINTENANCE_SCHEDULER_ENABLED,
+    MAINTENANCE_CLEANUP_INTERVAL, MAINTENANCE_WARNINGS_INTERVAL
+)
+from app.utils.shared_cache import warm_up_cache, close_cache
+from app.utils.upload_utils import UploadSizeLimitMiddleware
+from app.utils.worker_pool import image_pool, IMAGE_POOL_PRELOAD
 
 from fastapi.middleware.cors import CORSMiddleware
 
+async def warm_up_pools():
+    """
+    Open pooled Supabase (and shared cache) connections and start the image
+    workers. Runs before the server accepts requests: uvicorn only starts
+    listening once startup has finished. An unreachable backend is logged
+    rather than fatal (the pools connect on demand later); missing
+    credentials are fatal.
+    """
+    started = time.perf_counter()
+    try:
+        await db.warm_up()
+    except ValueError:
+        raise
+    except Exception as e:
+        print(f"Supabase connection warm-up failed: {e}")
+    try:
+        await warm_up_cache()
+    except Exception as e:
+        print(f"Cache backend warm-up failed: {e}")
+    if IMAGE_POOL_PRELOAD:
+        try:
+            await image_pool.warm_up()
+        except Exception as e:
+            print(f"Image worker warm-up failed: {e}")
+    # First probe results, so /health/ready can answer straight away
+    await readiness.refresh()
+    readiness.mark_warmed_up(time.perf_counter() - started)
+    print(f"Warm-up finished in {readiness.warm_up_seconds:.2f}s ({readiness.report()['status']})")
+
+
+def start_background_workers():
+    """
+    Start the rendition worker that drains the rendition_jobs queue and, if
+    enabled, the maintenance scheduler (cleanup, expiry warnings) and the
+    event-loop stall detector.
+    """
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if RENDITION_WORKER_ENABLED:
+        rendition_worker.start()
+    if MAINTENANCE_SCHEDULER_ENABLED:
+        scheduler.add("cleanup_expired_groups", cleanup_expired_groups, MAINTENANCE_CLEANUP_INTERVAL)
+        scheduler.add("send_expiry_warnings", send_expiry_warnings, MAINTENANCE_WARNINGS_INTERVAL)
+        scheduler.start()
+
+
+async def close_pools():
+    """
+    Stop background workers, then close pooled Supabase and cache
+    connections and image workers.
+    """
+    await scheduler.stop()
+    await rendition_worker.stop()
+    await loop_monitor.stop()
+    await db.aclose()
+    await close_cache()
+    image_pool.shutdown()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pools()
+    start_background_workers()
+    yield
+    # Fail readiness checks while draining
+    readiness.shutting_down = True
+    await close_pools()
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="TripShare",
     description="Backend API for TripShare application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Reject oversized uploads while the body is still arriving
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Profiles requests sent with X-Profile-Token or sampled at PROFILE_SAMPLE_RATE
+app.add_middleware(ProfilingMiddleware)
+
 # CORS configuration
 origins = [
     "http://localhost",
@@ -21,6 +115,8 @@ origins = [
     "null"  # For local file access if opening html directly
 ]
 
+# Around the middleware above, so their early responses (e.g. the upload
+# size limit's 413) carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Allow all for local dev simplicity
@@ -29,11 +125,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timings include the other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(ping.router)
 app.include_router(auth.router)
 app.include_router(groups.router)
 app.include_router(photos.router)
+app.include_router(dashboard.router)
+app.include_router(maintenance.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
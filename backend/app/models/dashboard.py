@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from uuid import UUID
+from app.models.group import GroupDetailsResponse
+from app.models.photo import PhotoPageResponse, SignedURLResponse
+
+class DashboardGroup(GroupDetailsResponse):
+    approved: bool
+    # Only filled in for groups the user is an approved member of
+    photo_count: Optional[int] = None
+    cover_photo_id: Optional[UUID] = None
+    cover_thumb_url: Optional[str] = None
+
+class DashboardResponse(BaseModel):
+    groups: List[DashboardGroup]
+    selected_group_id: Optional[UUID] = None
+    # First page of the selected group's photos; None if the user can't view them
+    photos: Optional[PhotoPageResponse] = None
+    # Thumbnail URLs for `photos`
+    signed_urls: List[SignedURLResponse] = []
@@ -19,6 +19,8 @@ class SignedURLResponse(BaseModel):
 class SignedURLRequest(BaseModel):
     photo_ids: List[UUID]
     expires_in_seconds: Optional[int] = 3600
+    # "thumb", "preview" or "original"
+    rendition: str = "original"
 
 class PhotoResponse(BaseModel):
     id: UUID
@@ -27,3 +29,8 @@ class PhotoResponse(BaseModel):
     size: int
     uploaded_at: datetime
     thumbnail_url: Optional[str] = None
+
+class PhotoPageResponse(BaseModel):
+    photos: List[PhotoResponse]
+    # Pass back as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
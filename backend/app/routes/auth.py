@@ -1,17 +1,23 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.database.supabase_client import supabase
+from app.database.async_client import db
 from app.models.auth import UserSignup, UserLogin, TokenResponse, UserResponse
-from gotrue.errors import AuthApiError
+from app.utils.jwt_utils import (
+    AUTH_VERIFY_MODE, TokenVerificationError, token_cache, token_cache_key,
+    unverified_expiry, user_from_claims, verify_access_token
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 @router.post("/signup", response_model=UserResponse)
 async def signup(user_data: UserSignup):
+    # Imported on first use, like the Auth client itself
+    from gotrue.errors import AuthApiError
+
     try:
         # Sign up with Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        auth_response = await db.auth.sign_up({
             "email": user_data.email,
             "password": user_data.password,
             "options": {
@@ -28,7 +34,7 @@ async def signup(user_data: UserSignup):
         
         # Insert into 'users' table
         try:
-            supabase.table("users").insert({
+            await db.table("users").insert({
                 "id": user_id,
                 "username": user_data.username,
                 "email": user_data.email
@@ -53,8 +59,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 
 @router.post("/login", response_model=TokenResponse)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    from gotrue.errors import AuthApiError
+
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = await db.auth.sign_in_with_password({
             "email": form_data.username,
             "password": form_data.password
         })
@@ -84,10 +92,9 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         # Don't return 500 for auth failures masked as generic exceptions
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-async def get_current_user_dep(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
-    token = credentials.credentials
+async def _get_remote_user(token: str) -> UserResponse:
     try:
-        user_response = supabase.auth.get_user(token)
+        user_response = await db.auth.get_user(token)
         user = user_response.user
         
         if not user:
@@ -102,6 +109,33 @@ async def get_current_user_dep(credentials: HTTPAuthorizationCredentials = Depen
     except Exception as e:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
+async def get_current_user_dep(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
+    token = credentials.credentials
+    if AUTH_VERIFY_MODE != "local":
+        return await _get_remote_user(token)
+
+    cache_key = token_cache_key(token)
+    cached_user = await token_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
+    try:
+        claims = await verify_access_token(token)
+        user = user_from_claims(claims) if claims is not None else None
+    except TokenVerificationError:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    if user is not None:
+        expires_at = claims["exp"]
+    else:
+        # No key to verify this token locally, ask Supabase
+        user = await _get_remote_user(token)
+        expires_at = unverified_expiry(token)
+
+    if expires_at:
+        await token_cache.set(cache_key, user, expires_at=expires_at)
+    return user
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(user: UserResponse = Depends(get_current_user_dep)):
     return user
@@ -0,0 +1,128 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from app.database.async_client import db
+from app.models.auth import UserResponse
+from app.models.dashboard import DashboardGroup, DashboardResponse
+from app.models.photo import SignedURLResponse
+from app.dependencies import get_current_user_dep
+from app.routes.photos import (
+    fetch_photo_rows, photo_page_response,
+    PHOTO_PAGE_DEFAULT_LIMIT, PHOTO_PAGE_MAX_LIMIT
+)
+from app.utils.group_cache import get_groups
+from app.utils.group_utils import is_approved_member, set_memberships
+from app.utils.signed_urls import sign_paths, rendition_path
+from app.utils.time_utils import is_group_expired
+from uuid import UUID
+from typing import Optional
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+DASHBOARD_URL_EXPIRES_SECONDS = 3600
+
+async def load_groups(user_id: str):
+    """
+    The user's groups and, for approved ones, photo summaries (count and
+    latest photo) keyed by group id.
+    """
+    memberships = await db.table("group_members").select("group_id, approved").eq("user_id", user_id).execute()
+    if not memberships.data:
+        return [], {}
+
+    approved = {}
+    for m in memberships.data:
+        approved[m["group_id"]] = m["approved"]
+    await set_memberships(user_id, approved, fill=True)
+    approved_ids = [group_id for group_id, ok in approved.items() if ok]
+
+    async def summaries():
+        if not approved_ids:
+            return []
+        response = await db.rpc("group_photo_summaries", {"p_group_ids": approved_ids}).execute()
+        return response.data or []
+
+    groups_by_id, summary_rows = await asyncio.gather(
+        get_groups(approved),
+        summaries()
+    )
+    groups = [dict(g, approved=approved[group_id]) for group_id, g in groups_by_id.items()]
+    return groups, {s["group_id"]: s for s in summary_rows}
+
+async def load_photos(user_id: str, group_id: Optional[UUID], limit: int):
+    """
+    First photo page of the selected group, or (None, None) if none is
+    selected or the user can't view its photos (e.g. pending approval).
+    """
+    if group_id is None or not await is_approved_member(user_id, group_id):
+        return None, None
+    return await fetch_photo_rows(group_id, limit)
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    group_id: Optional[UUID] = Query(None),
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    current_user: UserResponse = Depends(get_current_user_dep)
+):
+    """
+    Everything the dashboard shows in one round trip: the user's groups (with
+    photo counts and cover thumbnails), the first page of the selected
+    group's photos and their signed thumbnail URLs.
+    """
+    try:
+        user_id = str(current_user.id)
+        (groups, summaries), (rows, next_cursor) = await asyncio.gather(
+            load_groups(user_id),
+            load_photos(user_id, group_id, limit)
+        )
+
+        # No URLs for expired groups, same as /photos/signed-urls
+        active_ids = {g["id"] for g in groups if not is_group_expired(g)}
+
+        # Sign covers and the photo page together, in one bulk call
+        cover_paths = {
+            gid: rendition_path({
+                "storage_path": s["cover_storage_path"],
+                "renditions": s["cover_renditions"]
+            }, "thumb")
+            for gid, s in summaries.items()
+            if s["cover_storage_path"] and gid in active_ids
+        }
+        photo_paths = {}
+        if rows and str(group_id) in active_ids:
+            photo_paths = {p["id"]: rendition_path(p, "thumb") for p in rows}
+        signed = await sign_paths(
+            list(cover_paths.values()) + list(photo_paths.values()),
+            DASHBOARD_URL_EXPIRES_SECONDS
+        )
+
+        dashboard_groups = []
+        for g in groups:
+            summary = summaries.get(g["id"], {})
+            cover = signed.get(cover_paths.get(g["id"]))
+            dashboard_groups.append(DashboardGroup(
+                **g,
+                photo_count=summary.get("photo_count"),
+                cover_photo_id=summary.get("cover_photo_id"),
+                cover_thumb_url=cover[0] if cover else None
+            ))
+
+        signed_urls = []
+        for photo_id, path in photo_paths.items():
+            if path in signed:
+                signed_url, expires_at = signed[path]
+                signed_urls.append(SignedURLResponse(
+                    photo_id=photo_id,
+                    signed_url=signed_url,
+                    expires_at=expires_at
+                ))
+
+        return DashboardResponse(
+            groups=dashboard_groups,
+            selected_group_id=group_id,
+            photos=photo_page_response(rows, next_cursor) if rows is not None else None,
+            signed_urls=signed_urls
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from app.database.supabase_client import supabase
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from app.database.async_client import db
 from app.models.group import (
     CreateGroupRequest, CreateGroupResponse, JoinGroupRequest,
     ApproveMemberRequest, GroupMemberResponse, GroupDetailsResponse,
@@ -7,22 +7,30 @@ from app.models.group import (
 )
 from app.models.auth import UserResponse
 from app.dependencies import get_current_user_dep
-from app.utils.group_utils import generate_group_code, can_manage_group
+from app.utils.group_utils import (
+    insert_group, raise_for_owner_guard, is_approved_member,
+    set_membership, invalidate_group_memberships, listing_version
+)
+from app.utils.group_cache import get_group, get_group_by_code, invalidate_group
+from app.utils.etag import make_etag, conditional_response, etag_matches
+from app.utils.qr_cache import get_qr, QR_CACHE_MAX_AGE, QR_MIN_SIZE, QR_MAX_SIZE
+from app.utils.qr_utils import QR_MEDIA_TYPES
 from app.utils.time_utils import is_group_expired
 from datetime import datetime, timedelta
-import qrcode
-from io import BytesIO
+from typing import Optional
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
 
 @router.get("", response_model=list[GroupDetailsResponse])
 async def list_my_groups(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     try:
         # Get groups where user is a member
         # 1. Get group_ids from group_members
-        memberships = supabase.table("group_members").select("group_id").eq("user_id", str(current_user.id)).execute()
+        memberships = await db.table("group_members").select("group_id").eq("user_id", str(current_user.id)).execute()
         
         if not memberships.data:
             return []
@@ -30,7 +38,13 @@ async def list_my_groups(
         group_ids = [m["group_id"] for m in memberships.data]
         
         # 2. Fetch group details
-        groups_response = supabase.table("groups").select("*").in_("id", group_ids).execute()
+        groups_response = await db.table("groups").select("*").in_("id", group_ids).execute()
+
+        # Changes to any of these groups (or leaving/joining one) change the tag
+        etag = make_etag("groups", current_user.id, sorted((g["id"], g["version"]) for g in groups_response.data))
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
         
         groups = []
         for g in groups_response.data:
@@ -45,29 +59,23 @@ async def create_group(
     group_data: CreateGroupRequest,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
-    code = generate_group_code()
     expires_at = datetime.utcnow() + timedelta(days=group_data.expires_in_days)
     
     try:
-        # Insert group
-        group_response = supabase.table("groups").insert({
-            "code": code,
+        # Insert group (a unique code is allocated on insert)
+        group = await insert_group({
             "owner_user_id": str(current_user.id),
             "title": group_data.title,
             "expires_at": expires_at.isoformat()
-        }).execute()
-        
-        if not group_response.data:
-             raise HTTPException(status_code=500, detail="Failed to create group")
-             
-        group = group_response.data[0]
+        })
         
         # Add owner as approved member
-        supabase.table("group_members").insert({
+        await db.table("group_members").insert({
             "group_id": group["id"],
             "user_id": str(current_user.id),
             "approved": True
         }).execute()
+        await set_membership(current_user.id, group["id"], True)
         
         return CreateGroupResponse(
             id=group["id"],
@@ -80,15 +88,23 @@ async def create_group(
 @router.get("/{group_id}", response_model=GroupDetailsResponse)
 async def get_group_details(
     group_id: str,
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     try:
-        response = supabase.table("groups").select("*").eq("id", group_id).single().execute()
-        if not response.data:
+        # Writes to a group invalidate its cached row, so the cached
+        # version is current
+        group = await get_group(group_id)
+        if not group:
             raise HTTPException(status_code=404, detail="Group not found")
-            
-        group = response.data
+
+        not_modified = conditional_response(request, response, make_etag("group", group_id, group["version"]))
+        if not_modified:
+            return not_modified
         return GroupDetailsResponse(**group)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -99,28 +115,29 @@ async def join_group(
 ):
     try:
         # Find group by code
-        group_response = supabase.table("groups").select("*").eq("code", join_request.code).single().execute()
-        if not group_response.data:
+        group_data = await get_group_by_code(join_request.code)
+        if not group_data:
             raise HTTPException(status_code=404, detail="Invalid group code")
             
-        group_id = group_response.data["id"]
-        group_data = group_response.data
+        group_id = group_data["id"]
 
         # Check for expiry
         if is_group_expired(group_data):
             raise HTTPException(status_code=410, detail="Group has expired")
         
         # Check if already a member
-        member_check = supabase.table("group_members").select("*").eq("group_id", group_id).eq("user_id", str(current_user.id)).execute()
+        member_check = await db.table("group_members").select("*").eq("group_id", group_id).eq("user_id", str(current_user.id)).execute()
         if member_check.data:
+            await set_membership(current_user.id, group_id, member_check.data[0]["approved"])
             return {"message": "Already a member", "status": "exists"}
             
         # Add as pending member
-        supabase.table("group_members").insert({
+        await db.table("group_members").insert({
             "group_id": group_id,
             "user_id": str(current_user.id),
             "approved": False
         }).execute()
+        await set_membership(current_user.id, group_id, False)
         
         return {"message": "Join request sent", "status": "pending"}
     except HTTPException:
@@ -131,18 +148,26 @@ async def join_group(
 @router.get("/{group_id}/members", response_model=list[GroupMemberResponse])
 async def list_members(
     group_id: str,
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     try:
         # Check if user is member
-        member_check = supabase.table("group_members").select("approved").eq("group_id", group_id).eq("user_id", str(current_user.id)).single().execute()
-        if not member_check.data or not member_check.data["approved"]:
+        if not await is_approved_member(current_user.id, group_id):
              raise HTTPException(status_code=403, detail="Not authorized to view members")
 
+        # Member changes bump the listing version; skip the query if unchanged
+        version = await listing_version(group_id, "members")
+        if version is not None:
+            not_modified = conditional_response(request, response, make_etag("members", group_id, version))
+            if not_modified:
+                return not_modified
+
         # Get members with user details
         # Note: Supabase join syntax might differ, doing simple fetch for now
         # Ideally: .select("*, users(username)")
-        members_response = supabase.table("group_members").select("*, users(username)").eq("group_id", group_id).execute()
+        members_response = await db.table("group_members").select("*, users(username)").eq("group_id", group_id).execute()
         
         members = []
         for m in members_response.data:
@@ -155,6 +180,8 @@ async def list_members(
             ))
             
         return members
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -164,12 +191,23 @@ async def approve_member(
     request: ApproveMemberRequest,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
-    if not can_manage_group(current_user.id, group_id):
-        raise HTTPException(status_code=403, detail="Only owner can approve members")
-        
     try:
-        supabase.table("group_members").update({"approved": request.approve}).eq("id", str(request.member_id)).execute()
+        # Authorizes (owner only) and updates in one statement
+        response = await db.rpc("set_member_approval", {
+            "p_group_id": group_id,
+            "p_member_id": str(request.member_id),
+            "p_owner_id": str(current_user.id),
+            "p_approved": request.approve
+        }).execute()
+        if not response.data:
+            await raise_for_owner_guard(current_user.id, group_id, "Only owner can approve members")
+            raise HTTPException(status_code=404, detail="Member not found")
+
+        for m in response.data:
+            await set_membership(m["user_id"], m["group_id"], m["approved"], strict=True)
         return {"message": "Member updated"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -179,7 +217,8 @@ async def leave_group(
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     try:
-        supabase.table("group_members").delete().eq("group_id", group_id).eq("user_id", str(current_user.id)).execute()
+        await db.table("group_members").delete().eq("group_id", group_id).eq("user_id", str(current_user.id)).execute()
+        await set_membership(current_user.id, group_id, False, strict=True)
         return {"message": "Left group"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -189,14 +228,20 @@ async def delete_group(
     group_id: str,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
-    if not can_manage_group(current_user.id, group_id):
-        raise HTTPException(status_code=403, detail="Only owner can delete group")
-        
     try:
+        # Only the owner's delete matches a row
         # Cascading delete should handle members/photos if configured in DB
         # Otherwise need manual deletion
-        supabase.table("groups").delete().eq("id", group_id).execute()
+        response = await db.table("groups").delete().eq("id", group_id).eq("owner_user_id", str(current_user.id)).execute()
+        if not response.data:
+            await raise_for_owner_guard(current_user.id, group_id, "Only owner can delete group")
+            raise HTTPException(status_code=404, detail="Group not found")
+
+        await invalidate_group_memberships(group_id)
+        await invalidate_group(group_id)
         return {"message": "Group deleted"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -206,42 +251,22 @@ async def extend_group(
     request: ExtendGroupRequest,
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
-    if not can_manage_group(current_user.id, group_id):
-        raise HTTPException(status_code=403, detail="Only owner can extend group")
-        
     try:
-        # Get current expiry
-        group_response = supabase.table("groups").select("expires_at").eq("id", group_id).single().execute()
-        if not group_response.data:
+        # Owner can extend an expired group to resurrect it before cleanup runs.
+        # New expiry = max(now, old expiry) + days, computed in the database
+        # in the same statement that checks ownership.
+        response = await db.rpc("extend_owned_group", {
+            "p_group_id": group_id,
+            "p_owner_id": str(current_user.id),
+            "p_days": request.extend_days
+        }).execute()
+        if not response.data:
+            await raise_for_owner_guard(current_user.id, group_id, "Only owner can extend group")
             raise HTTPException(status_code=404, detail="Group not found")
-            
-        current_expires_at_str = group_response.data["expires_at"]
-        # Parse existing expiry
-        # Note: simplistic parsing, assuming Supabase DB format is ISO
-        current_expires_at = datetime.fromisoformat(current_expires_at_str.replace('Z', '+00:00'))
-        
-        # If already expired, can we extend? 
-        # Requirement: "Cannot extend a permanently deleted group"
-        # If it's in DB, it's not permanently deleted yet.
-        # So yes, owner can extend to resurrect it before cleanup runs.
-        
-        # Calculate new expiry
-        # If completely expired, should we extend from NOW or from old expiry?
-        # Usually from NOW if it was expired, or add to existing if not.
-        # Let's simple add to existing for now, or ensure it's at least NOW + days.
-        
-        # Logic: New Expiry = max(Now, OldExpiry) + Days
-        now = datetime.utcnow()
-        if current_expires_at.tzinfo:
-            now = now.replace(tzinfo=current_expires_at.tzinfo) # Match TZ
-            
-        base_time = max(now, current_expires_at)
-        new_expires_at = base_time + timedelta(days=request.extend_days)
-        
-        # Update
-        supabase.table("groups").update({"expires_at": new_expires_at.isoformat()}).eq("id", group_id).execute()
-        
-        return {"message": "Group extended", "new_expires_at": new_expires_at.isoformat()}
+
+        new_expires_at = response.data[0]["expires_at"]
+        await invalidate_group(group_id)
+        return {"message": "Group extended", "new_expires_at": new_expires_at}
         
     except HTTPException:
         raise
@@ -251,22 +276,34 @@ async def extend_group(
 @router.get("/{group_id}/qr")
 async def get_group_qr(
     group_id: str,
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(png|svg)$"),
+    size: Optional[int] = Query(None, ge=QR_MIN_SIZE, le=QR_MAX_SIZE),
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     try:
-        group_response = supabase.table("groups").select("code").eq("id", group_id).single().execute()
-        if not group_response.data:
+        group = await get_group(group_id)
+        if not group:
             raise HTTPException(status_code=404, detail="Group not found")
             
-        code = group_response.data["code"]
-        # In a real app, this would be a deep link URL
-        qr_data = f"tripshare://join?code={code}"
-        
-        img = qrcode.make(qr_data)
-        buf = BytesIO()
-        img.save(buf)
-        buf.seek(0)
-        
-        return Response(content=buf.getvalue(), media_type="image/png")
+        code = group["code"]
+
+        # ?format= wins; otherwise SVG only for clients that ask for it over PNG
+        if fmt is None:
+            accept = request.headers.get("accept", "")
+            fmt = "svg" if "image/svg+xml" in accept and "image/png" not in accept else "png"
+
+        content, etag = await get_qr(code, fmt, size)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"private, max-age={QR_CACHE_MAX_AGE}, immutable",
+            "Vary": "Accept"
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=content, media_type=QR_MEDIA_TYPES[fmt], headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
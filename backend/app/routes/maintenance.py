@@ -0,0 +1,99 @@
+"""
+Status of the in-process maintenance scheduler, caches and event loop.
+
+Operator-only: scheduler, cache and stall stats need MAINTENANCE_TOKEN,
+profiles need PROFILE_TOKEN.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.utils.group_cache import group_cache_stats
+from app.utils.group_utils import membership_cache
+from app.utils.loop_monitor import loop_monitor
+from app.utils.profiling import has_profile_token, profile_store
+from app.utils.qr_cache import qr_cache
+from app.utils.scheduler import scheduler
+from app.utils.signed_urls import signed_url_cache
+
+router = APIRouter(prefix="/maintenance", tags=["Maintenance"])
+
+# Unset disables the status endpoints
+MAINTENANCE_TOKEN = os.getenv("MAINTENANCE_TOKEN", "")
+
+
+def require_maintenance_token(x_maintenance_token: Optional[str] = Header(None)) -> None:
+    """Job, cache and stall stats are for operators, not any signed-in user."""
+    if not MAINTENANCE_TOKEN or not hmac.compare_digest(x_maintenance_token or "", MAINTENANCE_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Maintenance-Token")
+
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Profiles show code paths; only PROFILE_TOKEN holders may read them."""
+    if not has_profile_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+
+@router.get("/jobs", dependencies=[Depends(require_maintenance_token)])
+async def list_jobs():
+    """
+    Scheduled jobs on this replica with their last run's duration and item
+    counts. Runs on other replicas are recorded in `maintenance_leases`.
+    """
+    return scheduler.stats()
+
+
+@router.get("/caches", dependencies=[Depends(require_maintenance_token)])
+async def cache_stats():
+    """
+    Hit-rate counters of this worker's caches, with each cache's backend
+    (and size, for in-process ones).
+    """
+    return {
+        **group_cache_stats(),
+        "memberships": membership_cache.stats(),
+        "signed_urls": signed_url_cache.stats(),
+        "qr_codes": qr_cache.stats(),
+    }
+
+
+@router.get("/loop-stalls", dependencies=[Depends(require_maintenance_token)])
+async def loop_stalls():
+    """
+    Recent event-loop stalls on this replica, newest first, each with its
+    duration, route, blocking function and stack. Empty unless
+    LOOP_MONITOR_ENABLED is set.
+    """
+    return loop_monitor.stats()
+
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """
+    Request profiles kept by this worker, newest first (without stacks).
+    """
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+async def get_profile(profile_id: str):
+    """
+    One request's profile: per-function wall time (`top`) and folded stacks.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@router.get("/profiles/{profile_id}/folded", dependencies=[Depends(require_profile_token)])
+async def get_profile_folded(profile_id: str):
+    """
+    Folded stacks, one per line, for flamegraph.pl or speedscope.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse("\n".join(profile["folded"]) + "\n")
@@ -0,0 +1,28 @@
+"""
+Prometheus scrape endpoint.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import METRICS_ENABLED, METRICS_TOKEN, registry
+
+router = APIRouter(tags=["Monitoring"])
+
+# Starlette appends "; charset=utf-8" to text/* media types
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    This worker's metrics in the Prometheus text format. Requires
+    `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
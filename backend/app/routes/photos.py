@@ -1,12 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, status
-from app.database.supabase_client import supabase
-from app.models.photo import UploadResponse, SignedURLResponse, SignedURLRequest, PhotoResponse
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request, Response, status
+from app.database.async_client import db
+from app.models.photo import UploadResponse, SignedURLResponse, SignedURLRequest, PhotoResponse, PhotoPageResponse
 from app.models.auth import UserResponse
 from app.dependencies import get_current_user_dep
-from app.utils.storage_utils import build_storage_path, generate_thumbnail
+from app.utils.cleanup import photo_object_paths
+from app.utils.etag import make_etag, conditional_response
+from app.utils.group_cache import get_group, get_groups
+from app.utils.group_utils import is_approved_member, approved_group_ids, listing_version
+from app.utils.metrics import UPLOADED_BYTES
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.rendition_queue import enqueue_rendition
+from app.utils.signed_urls import sign_paths, rendition_path
+from app.utils.storage_utils import build_storage_path
 from app.utils.time_utils import is_group_expired
-from app.utils.validation import validate_file_size, validate_mime_type
+from app.utils.upload_utils import open_upload
+from app.utils.validation import validate_mime_type
 from uuid import UUID
+from typing import List, Optional, Tuple
 from datetime import datetime
 import os
 
@@ -21,30 +31,29 @@ async def upload_photo(
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     # Validate membership
-    member_check = supabase.table("group_members").select("approved").eq("group_id", str(group_id)).eq("user_id", str(current_user.id)).single().execute()
-    if not member_check.data or not member_check.data["approved"]:
+    if not await is_approved_member(current_user.id, group_id):
         raise HTTPException(status_code=403, detail="Not authorized to upload to this group")
 
     # Check for expiry
-    group_response = supabase.table("groups").select("expires_at").eq("id", str(group_id)).single().execute()
-    if group_response.data and is_group_expired(group_response.data):
+    group = await get_group(group_id)
+    if group and is_group_expired(group):
         raise HTTPException(status_code=403, detail="Group has expired, cannot upload")
 
-    # Validate file
-    file_content = await file.read()
-    validate_file_size(len(file_content))
+    # Validate file type and size (413 before anything is stored)
     validate_mime_type(file.content_type)
+    body, size = open_upload(file)
     
     # Build path
     storage_path = build_storage_path(group_id, current_user.id, file.filename)
     
     try:
-        # Upload to Storage
-        supabase.storage.from_(SUPABASE_BUCKET_NAME).upload(
-            path=storage_path,
-            file=file_content,
-            file_options={"content-type": file.content_type}
-        )
+        # Upload to Storage (streamed from the request's spooled file)
+        with body:
+            await db.storage.from_(SUPABASE_BUCKET_NAME).upload(
+                path=storage_path,
+                file=body,
+                file_options={"content-type": file.content_type}
+            )
         
         # Insert Metadata
         photo_data = {
@@ -53,30 +62,24 @@ async def upload_photo(
             "storage_path": storage_path,
             "filename": file.filename,
             "mime_type": file.content_type,
-            "size": len(file_content),
+            "size": size,
             "uploaded_at": datetime.utcnow().isoformat()
         }
         
-        photo_response = supabase.table("photos").insert(photo_data).execute()
+        photo_response = await db.table("photos").insert(photo_data).execute()
         if not photo_response.data:
              # Rollback storage if DB fails (simple attempt)
-             supabase.storage.from_(SUPABASE_BUCKET_NAME).remove([storage_path])
+             await db.storage.from_(SUPABASE_BUCKET_NAME).remove([storage_path])
              raise HTTPException(status_code=500, detail="Failed to save photo metadata")
              
         photo = photo_response.data[0]
+        UPLOADED_BYTES.inc(size)
         
-        # Generate and upload thumbnail (optional, best effort)
+        # Renditions (thumb, preview) are generated in the background
         try:
-            thumb_bytes = generate_thumbnail(file_content)
-            thumb_path = f"photos/{group_id}/thumbs/{os.path.basename(storage_path)}"
-            supabase.storage.from_(SUPABASE_BUCKET_NAME).upload(
-                path=thumb_path,
-                file=thumb_bytes,
-                file_options={"content-type": "image/jpeg"}
-            )
-            # Ideally store thumb_path in DB, but for now we can derive it or just use it
+            await enqueue_rendition(photo["id"])
         except Exception as e:
-            print(f"Thumbnail generation failed: {e}")
+            print(f"Failed to queue renditions for photo {photo['id']}: {e}")
 
         return UploadResponse(
             id=photo["id"],
@@ -90,30 +93,74 @@ async def upload_photo(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/groups/{group_id}", response_model=list[PhotoResponse])
+PHOTO_PAGE_DEFAULT_LIMIT = 50
+PHOTO_PAGE_MAX_LIMIT = 200
+
+async def fetch_photo_rows(group_id: UUID, limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Fetches one keyset page of a group's photo rows ordered by (uploaded_at, id).
+    Returns (rows, next_cursor); rows include storage_path and renditions.
+    """
+    after_uploaded_at, after_id = decode_cursor(cursor)
+    # Ask for one extra row to learn whether another page exists
+    response = await db.rpc("list_group_photos_page", {
+        "p_group_id": str(group_id),
+        "p_limit": limit + 1,
+        "p_after_uploaded_at": after_uploaded_at,
+        "p_after_id": after_id
+    }).execute()
+    rows = response.data or []
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last["uploaded_at"], last["id"])
+    return rows[:limit], next_cursor
+
+def photo_page_response(rows: List[dict], next_cursor: Optional[str]) -> PhotoPageResponse:
+    photos = [
+        PhotoResponse(
+            id=p["id"],
+            filename=p["filename"],
+            mime_type=p["mime_type"],
+            size=p["size"],
+            uploaded_at=p["uploaded_at"]
+        )
+        for p in rows
+    ]
+    return PhotoPageResponse(photos=photos, next_cursor=next_cursor)
+
+async def fetch_photo_page(group_id: UUID, limit: int, cursor: Optional[str] = None) -> PhotoPageResponse:
+    """
+    Fetches one keyset page of a group's photos ordered by (uploaded_at, id).
+    """
+    return photo_page_response(*await fetch_photo_rows(group_id, limit, cursor))
+
+@router.get("/groups/{group_id}", response_model=PhotoPageResponse)
 async def list_group_photos(
     group_id: UUID,
+    request: Request,
+    response: Response,
+    limit: int = Query(PHOTO_PAGE_DEFAULT_LIMIT, ge=1, le=PHOTO_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
     current_user: UserResponse = Depends(get_current_user_dep)
 ):
     # Validate membership
-    member_check = supabase.table("group_members").select("approved").eq("group_id", str(group_id)).eq("user_id", str(current_user.id)).single().execute()
-    if not member_check.data or not member_check.data["approved"]:
+    if not await is_approved_member(current_user.id, group_id):
         raise HTTPException(status_code=403, detail="Not authorized to view photos")
         
     try:
-        response = supabase.table("photos").select("*").eq("group_id", str(group_id)).execute()
-        photos = []
-        for p in response.data:
-            # Generate a temporary signed URL for thumbnail if needed, or just return metadata
-            # For now, let's just return metadata. Frontend can request signed URLs.
-            photos.append(PhotoResponse(
-                id=p["id"],
-                filename=p["filename"],
-                mime_type=p["mime_type"],
-                size=p["size"],
-                uploaded_at=p["uploaded_at"]
-            ))
-        return photos
+        # Photo uploads/deletes bump the listing version; skip the page query if unchanged
+        version = await listing_version(group_id, "photos")
+        if version is not None:
+            etag = make_etag("photos", group_id, version, limit, cursor)
+            not_modified = conditional_response(request, response, etag)
+            if not_modified:
+                return not_modified
+
+        return await fetch_photo_page(group_id, limit, cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,7 +174,7 @@ async def get_signed_urls(
     
     try:
         photo_ids = [str(pid) for pid in request.photo_ids]
-        photos_response = supabase.table("photos").select("id, storage_path, group_id").in_("id", photo_ids).execute()
+        photos_response = await db.table("photos").select("id, storage_path, group_id, renditions").in_("id", photo_ids).execute()
         
         if not photos_response.data:
             return []
@@ -136,34 +183,33 @@ async def get_signed_urls(
         group_ids = list(set([p["group_id"] for p in photos_response.data]))
         
         # Get user's approved groups
-        memberships = supabase.table("group_members").select("group_id").eq("user_id", str(current_user.id)).eq("approved", True).in_("group_id", group_ids).execute()
-        allowed_group_ids = [m["group_id"] for m in memberships.data]
+        allowed_group_ids = await approved_group_ids(current_user.id, group_ids)
         
         # Check expiry for these groups
-        groups_response = supabase.table("groups").select("id, expires_at").in_("id", allowed_group_ids).execute()
+        groups = await get_groups(allowed_group_ids)
         
         # Filter out expired groups
         valid_group_ids = []
-        for g in groups_response.data:
+        for g in groups.values():
             if not is_group_expired(g):
                 valid_group_ids.append(g["id"])
         
+        # Fall back to the original until the rendition is ready
+        paths = {
+            p["id"]: rendition_path(p, request.rendition)
+            for p in photos_response.data
+            if p["group_id"] in valid_group_ids
+        }
+        signed = await sign_paths(list(paths.values()), request.expires_in_seconds)
+        
         urls = []
-        for p in photos_response.data:
-            if p["group_id"] in valid_group_ids:
-                # Generate signed URL
-                signed_url = supabase.storage.from_(SUPABASE_BUCKET_NAME).create_signed_url(
-                    path=p["storage_path"], 
-                    expires_in=request.expires_in_seconds
-                )
-                # Note: supabase-py create_signed_url returns a dict or string depending on version
-                # Assuming it returns {'signedURL': '...'} or similar, or just the string.
-                # Adjust based on actual library behavior.
-                url_str = signed_url if isinstance(signed_url, str) else signed_url.get("signedURL")
-                
+        for photo_id, path in paths.items():
+            if path in signed:
+                signed_url, expires_at = signed[path]
                 urls.append(SignedURLResponse(
-                    photo_id=p["id"],
-                    signed_url=url_str
+                    photo_id=photo_id,
+                    signed_url=signed_url,
+                    expires_at=expires_at
                 ))
                 
         return urls
@@ -177,7 +223,7 @@ async def delete_photo(
 ):
     try:
         # Get photo details
-        photo_response = supabase.table("photos").select("*").eq("id", str(photo_id)).single().execute()
+        photo_response = await db.table("photos").select("*").eq("id", str(photo_id)).single().execute()
         if not photo_response.data:
             raise HTTPException(status_code=404, detail="Photo not found")
             
@@ -188,17 +234,20 @@ async def delete_photo(
         # Check permission: Uploader OR Group Owner
         is_uploader = uploader_id == str(current_user.id)
         
-        group_response = supabase.table("groups").select("owner_user_id").eq("id", group_id).single().execute()
-        is_owner = group_response.data and group_response.data["owner_user_id"] == str(current_user.id)
+        group = await get_group(group_id)
+        is_owner = group is not None and group["owner_user_id"] == str(current_user.id)
         
         if not (is_uploader or is_owner):
             raise HTTPException(status_code=403, detail="Not authorized to delete this photo")
             
-        # Delete from Storage
-        supabase.storage.from_(SUPABASE_BUCKET_NAME).remove([photo["storage_path"]])
+        # Drop queued rendition work (explicitly, in case the cascade is missing)
+        await db.table("rendition_jobs").delete().eq("photo_id", str(photo_id)).execute()
+
+        # Delete the original and every rendition from Storage in one call
+        await db.storage.from_(SUPABASE_BUCKET_NAME).remove(photo_object_paths(photo))
         
         # Delete from DB
-        supabase.table("photos").delete().eq("id", str(photo_id)).execute()
+        await db.table("photos").delete().eq("id", str(photo_id)).execute()
         
         return {"message": "Photo deleted"}
     except Exception as e:
@@ -1,7 +1,10 @@
 """
-Test endpoint to verify backend is running.
+Test endpoint to verify backend is running, and health checks for load
+balancers.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from app.utils.readiness import readiness
 
 router = APIRouter()
 
@@ -17,3 +20,25 @@ async def ping():
         "message": "TripShare backend running"
     }
 
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness check: the process is up and its event loop answers. Does no
+    I/O, so it stays cheap however often it is polled.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness check: 200 once startup warm-up has finished and the backend
+    probes pass, 503 otherwise (including while shutting down). Probe
+    results are cached for READINESS_PROBE_TTL seconds.
+    """
+    report = await readiness.check()
+    if report["status"] != "ready":
+        response.status_code = 503
+    return report
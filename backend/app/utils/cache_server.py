@@ -0,0 +1,208 @@
+"""
+In-memory stand-in for a Redis server, for trying CACHE_BACKEND=redis
+without one (locally, in tests, in CI):
+
+    python -m app.utils.cache_server --port 6379
+
+Speaks enough of the Redis protocol for the shared cache and redis-cli:
+PING, ECHO, AUTH, SELECT, GET, MGET, SET (EX/PX/NX/XX/GET), DEL, EXISTS,
+INCR, TTL/PTTL, DBSIZE, FLUSHDB/FLUSHALL and QUIT. Data lives in this
+process only and databases are not separated.
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CommandError(Exception):
+    pass
+
+
+def _encode(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, CommandError):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, bool):
+        return b":%d\r\n" % int(reply)
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """The next command, or None when the client has gone."""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, as typed into telnet
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        if not header.startswith(b"$"):
+            raise CommandError("Protocol error: expected '$'")
+        args.append((await reader.readexactly(int(header[1:]) + 2))[:-2])
+    return args
+
+
+class CacheServer:
+    def __init__(self, password: str = ""):
+        self.password = password
+        # key -> (value, expires_at in monotonic seconds or None)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _set(self, args: List[bytes]) -> Any:
+        if len(args) < 2:
+            raise CommandError("wrong number of arguments for 'set' command")
+        key, value = args[0], args[1]
+        expires_at = None
+        condition = None
+        return_old = False
+        options = iter(args[2:])
+        for option in options:
+            option = option.upper()
+            if option in (b"EX", b"PX"):
+                amount = int(next(options, b"0"))
+                if amount <= 0:
+                    raise CommandError("invalid expire time in 'set' command")
+                expires_at = time.monotonic() + (amount if option == b"EX" else amount / 1000)
+            elif option in (b"NX", b"XX"):
+                condition = option
+            elif option == b"GET":
+                return_old = True
+            else:
+                raise CommandError("syntax error")
+
+        old = self._get(key)
+        stored = not (condition == b"NX" and old is not None or condition == b"XX" and old is None)
+        if stored:
+            self.data[key] = (value, expires_at)
+        if return_old:
+            return old
+        return "OK" if stored else None
+
+    def execute(self, name: bytes, args: List[bytes]) -> Any:
+        if name == b"PING":
+            return args[0] if args else "PONG"
+        if name == b"ECHO":
+            return args[0]
+        if name == b"SELECT":
+            return "OK"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"MGET":
+            return [self._get(key) for key in args]
+        if name == b"SET":
+            return self._set(args)
+        if name == b"DEL":
+            deleted = 0
+            for key in args:
+                if self._get(key) is not None:
+                    del self.data[key]
+                    deleted += 1
+            return deleted
+        if name == b"EXISTS":
+            return sum(self._get(key) is not None for key in args)
+        if name == b"INCR":
+            current = self._get(args[0])
+            try:
+                value = int(current or 0) + 1
+            except ValueError:
+                raise CommandError("value is not an integer or out of range")
+            expires_at = self.data[args[0]][1] if current is not None else None
+            self.data[args[0]] = (str(value).encode(), expires_at)
+            return value
+        if name in (b"TTL", b"PTTL"):
+            if self._get(args[0]) is None:
+                return -2
+            expires_at = self.data[args[0]][1]
+            if expires_at is None:
+                return -1
+            remaining = expires_at - time.monotonic()
+            return int(remaining * 1000) if name == b"PTTL" else int(remaining)
+        if name == b"DBSIZE":
+            return len(self.data)
+        if name in (b"FLUSHDB", b"FLUSHALL"):
+            self.data.clear()
+            return "OK"
+        if name == b"COMMAND":
+            # redis-cli asks for command docs on connect
+            return []
+        raise CommandError(f"unknown command '{name.decode(errors='replace')}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authenticated = not self.password
+        try:
+            while True:
+                try:
+                    command = await _read_command(reader)
+                except CommandError as e:
+                    writer.write(_encode(e))
+                    break
+                if command is None:
+                    break
+                if not command:
+                    continue
+                name, args = command[0].upper(), command[1:]
+                if name == b"QUIT":
+                    writer.write(_encode("OK"))
+                    break
+                if name == b"AUTH":
+                    authenticated = bool(args) and args[-1].decode(errors="replace") == self.password
+                    reply: Any = "OK" if authenticated else CommandError("invalid password")
+                elif not authenticated:
+                    reply = CommandError("NOAUTH Authentication required.")
+                else:
+                    try:
+                        reply = self.execute(name, args)
+                    except (CommandError, IndexError, ValueError) as e:
+                        reply = e if isinstance(e, CommandError) else CommandError(f"wrong arguments for '{name.decode()}'")
+                writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 6379, password: str = "") -> asyncio.AbstractServer:
+    """Starts a stand-in server on the running loop."""
+    server = CacheServer(password)
+    return await asyncio.start_server(server.handle, host, port)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="In-memory Redis stand-in for CACHE_BACKEND=redis")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+
+    server = await serve(args.host, args.port, args.password)
+    print(f"Cache stand-in listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,241 @@
+"""
+Expired-group cleanup engine.
+
+Expired groups are processed a page at a time (keyset on id). For each page
+the photo rows are read in keyset pages, and each photo page's storage
+objects (original, legacy thumb, renditions) are removed in size-limited
+chunks with bounded concurrency before the next is read. Then the database
+rows of every group whose objects are gone are deleted with one set-based
+statement per table.
+
+Progress is checkpointed in `maintenance_checkpoints`, so a run that is
+killed resumes after the last finished page and skips storage removal for
+groups whose objects were already removed.
+"""
+import asyncio
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.database.async_client import db
+from app.utils.group_cache import invalidate_group
+from app.utils.group_utils import invalidate_group_memberships
+
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "photos")
+
+CLEANUP_GROUP_PAGE_SIZE = int(os.getenv("CLEANUP_GROUP_PAGE_SIZE", "100"))
+CLEANUP_PHOTO_PAGE_SIZE = int(os.getenv("CLEANUP_PHOTO_PAGE_SIZE", "1000"))
+# Paths per Storage remove call, and how many calls run at once
+CLEANUP_REMOVE_CHUNK_SIZE = int(os.getenv("CLEANUP_REMOVE_CHUNK_SIZE", "100"))
+CLEANUP_CONCURRENCY = int(os.getenv("CLEANUP_CONCURRENCY", "4"))
+
+CHECKPOINT_JOB = "cleanup_expired_groups"
+
+
+class CleanupStats:
+    """
+    Counters for one cleanup run.
+    """
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.pages = 0
+        self.groups_deleted = 0
+        self.groups_failed = 0
+        self.photos_deleted = 0
+        self.objects_removed = 0
+        self.remove_calls = 0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = self.elapsed
+        return {
+            "dry_run": self.dry_run,
+            "pages": self.pages,
+            "groups_deleted": self.groups_deleted,
+            "groups_failed": self.groups_failed,
+            "photos_deleted": self.photos_deleted,
+            "objects_removed": self.objects_removed,
+            "remove_calls": self.remove_calls,
+            "elapsed_seconds": round(elapsed, 3),
+            "groups_per_second": round(self.groups_deleted / elapsed, 2) if elapsed else 0.0,
+            "objects_per_second": round(self.objects_removed / elapsed, 2) if elapsed else 0.0,
+        }
+
+    def summary(self) -> str:
+        s = self.as_dict()
+        prefix = "[dry run] would delete" if self.dry_run else "Deleted"
+        return (
+            f"{prefix} {s['groups_deleted']} groups, {s['photos_deleted']} photos, "
+            f"{s['objects_removed']} storage objects in {s['elapsed_seconds']}s "
+            f"({s['groups_per_second']} groups/s, {s['objects_per_second']} objects/s, "
+            f"{s['remove_calls']} remove calls, {s['groups_failed']} groups failed)"
+        )
+
+
+async def load_checkpoint() -> Dict[str, Any]:
+    response = await db.table("maintenance_checkpoints").select("state").eq("job", CHECKPOINT_JOB).execute()
+    if response.data:
+        return response.data[0]["state"] or {}
+    return {}
+
+
+async def save_checkpoint(state: Dict[str, Any]) -> None:
+    await db.table("maintenance_checkpoints").upsert({
+        "job": CHECKPOINT_JOB,
+        "state": state,
+        "updated_at": datetime.utcnow().isoformat()
+    }).execute()
+
+
+async def clear_checkpoint() -> None:
+    await db.table("maintenance_checkpoints").delete().eq("job", CHECKPOINT_JOB).execute()
+
+
+async def fetch_expired_page(after_id: Optional[str], limit: int) -> List[str]:
+    query = db.table("groups").select("id").lt("expires_at", datetime.utcnow().isoformat())
+    if after_id:
+        query = query.gt("id", after_id)
+    response = await query.order("id").limit(limit).execute()
+    return [g["id"] for g in response.data]
+
+
+async def iter_group_photos(group_ids: List[str]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """The photo rows of the given groups, in keyset pages of CLEANUP_PHOTO_PAGE_SIZE."""
+    after_id = None
+    while True:
+        query = db.table("photos").select("id, group_id, storage_path, renditions").in_("group_id", group_ids)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = await query.order("id").limit(CLEANUP_PHOTO_PAGE_SIZE).execute()
+        if response.data:
+            yield response.data
+        if len(response.data) < CLEANUP_PHOTO_PAGE_SIZE:
+            return
+        after_id = response.data[-1]["id"]
+
+
+def photo_object_paths(photo: Dict[str, Any]) -> List[str]:
+    """Original, legacy thumbnail and rendition paths of a photo."""
+    storage_path = photo["storage_path"]
+    paths = [storage_path, f"photos/{photo['group_id']}/thumbs/{os.path.basename(storage_path)}"]
+    paths.extend(
+        path for path in (photo.get("renditions") or {}).values()
+        if path != storage_path
+    )
+    return paths
+
+
+async def remove_objects(
+    objects: List[Tuple[str, str]],
+    stats: CleanupStats,
+    dry_run: bool = False,
+) -> Set[str]:
+    """
+    Removes (group_id, path) objects in chunks of CLEANUP_REMOVE_CHUNK_SIZE,
+    at most CLEANUP_CONCURRENCY calls at a time. Returns the ids of groups
+    with a failed chunk; their rows are kept so a later run retries them.
+    """
+    bucket = db.storage.from_(SUPABASE_BUCKET_NAME)
+    semaphore = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+    failed: Set[str] = set()
+
+    async def remove_chunk(chunk: List[Tuple[str, str]]) -> None:
+        async with semaphore:
+            if dry_run:
+                stats.objects_removed += len(chunk)
+                return
+            try:
+                removed = await bucket.remove([path for _, path in chunk])
+                stats.remove_calls += 1
+                # Legacy thumb paths usually don't exist; count what was removed
+                stats.objects_removed += len(removed or [])
+            except Exception as e:
+                print(f"Failed to remove {len(chunk)} storage objects: {e}")
+                failed.update(group_id for group_id, _ in chunk)
+
+    chunks = [
+        objects[start:start + CLEANUP_REMOVE_CHUNK_SIZE]
+        for start in range(0, len(objects), CLEANUP_REMOVE_CHUNK_SIZE)
+    ]
+    await asyncio.gather(*(remove_chunk(chunk) for chunk in chunks))
+    return failed
+
+
+async def delete_group_rows(group_ids: List[str]) -> None:
+    """Set-based delete of the groups and their dependent rows."""
+    # Explicit child deletes in case cascades are missing
+    await db.table("photos").delete().in_("group_id", group_ids).execute()
+    await db.table("group_members").delete().in_("group_id", group_ids).execute()
+    try:
+        await db.table("group_warnings").delete().in_("group_id", group_ids).execute()
+    except Exception:
+        # Table may not exist
+        pass
+    await db.table("groups").delete().in_("id", group_ids).execute()
+    await invalidate_group_memberships(*group_ids)
+    await invalidate_group(*group_ids)
+
+
+async def cleanup_expired_groups(
+    dry_run: bool = False,
+    page_size: int = CLEANUP_GROUP_PAGE_SIZE,
+) -> CleanupStats:
+    """
+    Deletes every expired group with its photos and storage objects.
+    With `dry_run`, only counts what would be deleted (no checkpoint).
+    """
+    stats = CleanupStats(dry_run)
+    state = {} if dry_run else await load_checkpoint()
+    after_id = state.get("after_id")
+    storage_cleared = set(state.get("storage_cleared", []))
+    if after_id or storage_cleared:
+        print(f"Resuming cleanup after group {after_id}")
+
+    while True:
+        group_ids = await fetch_expired_page(after_id, page_size)
+        if not group_ids:
+            break
+        stats.pages += 1
+
+        # One photo page at a time, so a page of groups with many photos
+        # never has to fit in memory at once
+        failed: Set[str] = set()
+        photo_counts: Counter = Counter()
+        async for photos in iter_group_photos(group_ids):
+            photo_counts.update(photo["group_id"] for photo in photos)
+            objects = [
+                (photo["group_id"], path)
+                for photo in photos
+                if photo["group_id"] not in storage_cleared
+                for path in photo_object_paths(photo)
+            ]
+            failed |= await remove_objects(objects, stats, dry_run)
+        done = [group_id for group_id in group_ids if group_id not in failed]
+
+        if done and not dry_run:
+            # Objects are gone; a resumed run only needs to delete the rows
+            await save_checkpoint({"after_id": after_id, "storage_cleared": done})
+            await delete_group_rows(done)
+
+        stats.groups_deleted += len(done)
+        stats.groups_failed += len(failed)
+        stats.photos_deleted += sum(photo_counts[group_id] for group_id in done)
+
+        after_id = group_ids[-1]
+        storage_cleared = set()
+        if not dry_run:
+            await save_checkpoint({"after_id": after_id, "storage_cleared": []})
+        print(f"Page {stats.pages}: {len(done)} groups {'checked' if dry_run else 'cleaned'}, {len(failed)} failed")
+
+    if not dry_run:
+        await clear_checkpoint()
+    stats.finished_at = time.monotonic()
+    return stats
@@ -0,0 +1,48 @@
+"""
+ETag helpers for conditional GETs.
+
+Listing ETags are derived from the per-group `version` counter (bumped by
+database triggers on any write to a group, its members or its photos), so a
+route can answer 304 Not Modified after one cheap lookup, without running the
+listing query or serializing the body.
+"""
+import hashlib
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response
+
+# Clients must revalidate every time, but may keep the body and send
+# If-None-Match; private because responses depend on the caller.
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the given parts (route, ids, versions, query params)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates: Iterable[str] = (c.strip() for c in if_none_match.split(","))
+    return any((c[2:] if c.startswith("W/") else c) == opaque for c in candidates)
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Sets the ETag on `response` and returns a 304 response if the client
+    already holds this version, or None to carry on building the body.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+        )
+    return None
@@ -0,0 +1,76 @@
+"""
+Expiry warnings.
+
+One `pending_expiry_warnings` call returns a page of groups that are inside
+a warning window and haven't been warned for it yet (an anti-join against
+`group_warnings`); the page is recorded with a single bulk insert. Any number
+of thresholds costs the same two statements per page.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from app.database.async_client import db
+from app.utils.time_utils import parse_duration
+
+# Comma-separated, e.g. "3d,1d,1h"
+EXPIRY_WARNING_THRESHOLDS = [
+    parse_duration(t) for t in os.getenv("EXPIRY_WARNING_THRESHOLDS", "3d,1d,1h").split(",") if t.strip()
+]
+EXPIRY_WARNING_PAGE_SIZE = int(os.getenv("EXPIRY_WARNING_PAGE_SIZE", "500"))
+
+
+async def fetch_pending_warnings(
+    thresholds: List[int],
+    limit: int,
+    after_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    response = await db.rpc("pending_expiry_warnings", {
+        "p_thresholds": thresholds,
+        "p_limit": limit,
+        "p_after_id": after_id
+    }).execute()
+    return response.data or []
+
+
+async def send_expiry_warnings(
+    thresholds: Optional[List[int]] = None,
+    page_size: int = EXPIRY_WARNING_PAGE_SIZE,
+) -> Dict[str, int]:
+    """
+    Records a warning for every group due one. Returns counts per threshold
+    (in seconds) plus the total.
+    """
+    thresholds = thresholds or EXPIRY_WARNING_THRESHOLDS
+    counts = {str(t): 0 for t in thresholds}
+    total = 0
+    after_id = None
+    while True:
+        due = await fetch_pending_warnings(thresholds, page_size, after_id)
+        if not due:
+            break
+
+        # Existing (group, threshold) rows are skipped, so concurrent runs
+        # can't double-warn
+        await db.table("group_warnings").upsert(
+            [
+                {
+                    "group_id": g["group_id"],
+                    "threshold_seconds": g["threshold_seconds"],
+                    "days_left": g["threshold_seconds"] // 86400
+                }
+                for g in due
+            ],
+            on_conflict="group_id,threshold_seconds",
+            ignore_duplicates=True
+        ).execute()
+        # Here we would send Email/Push notifications
+
+        for g in due:
+            counts[str(g["threshold_seconds"])] = counts.get(str(g["threshold_seconds"]), 0) + 1
+        total += len(due)
+        if len(due) < page_size:
+            break
+        after_id = due[-1]["group_id"]
+
+    counts["total"] = total
+    return counts
@@ -0,0 +1,108 @@
+"""
+Group metadata cache.
+
+Full `groups` rows cached by id, with a secondary code -> id index for join
+lookups. An entry never outlives the group's own `expires_at`, so the
+expiry checks done on cached rows (`is_group_expired`) stay correct and an
+expired group drops out of the cache by itself. Writes that change a group
+(extend, delete) invalidate it; with a shared cache backend every worker
+sees that at once, with the in-process one other workers pick the change up
+within GROUP_CACHE_TTL.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Union
+from uuid import UUID
+
+from app.database.async_client import db
+from app.utils.shared_cache import SharedCache
+
+GROUP_CACHE_TTL = int(os.getenv("GROUP_CACHE_TTL", "60"))
+GROUP_CACHE_SIZE = int(os.getenv("GROUP_CACHE_SIZE", "10000"))
+
+group_cache = SharedCache("groups", maxsize=GROUP_CACHE_SIZE, ttl=GROUP_CACHE_TTL)
+# code -> group id. Codes never change, and a lookup checks the row it
+# points at, so entries can outlive their group's row.
+group_code_index = SharedCache("group_codes", maxsize=GROUP_CACHE_SIZE, ttl=GROUP_CACHE_TTL)
+
+
+def _entry_expiry(group: Dict[str, Any]) -> float:
+    """GROUP_CACHE_TTL from now, or the group's expiry if that is sooner."""
+    expires = time.time() + GROUP_CACHE_TTL
+    expires_at = group.get("expires_at")
+    if expires_at:
+        group_expiry = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+        if group_expiry.tzinfo is None:
+            group_expiry = group_expiry.replace(tzinfo=timezone.utc)
+        # Already expired groups stay expired until extended (which invalidates)
+        if group_expiry.timestamp() > time.time():
+            expires = min(expires, group_expiry.timestamp())
+    return expires
+
+
+async def cache_group(group: Dict[str, Any]) -> None:
+    """Stores a full groups row (e.g. after it was read or created)."""
+    expires = _entry_expiry(group)
+    await group_cache.set(group["id"], group, expires_at=expires)
+    if group.get("code"):
+        await group_code_index.set(group["code"], group["id"], expires_at=expires)
+
+
+async def get_group(group_id: Union[UUID, str]) -> Optional[Dict[str, Any]]:
+    """The groups row for `group_id`, or None if there is no such group."""
+    group_id = str(group_id)
+    group = await group_cache.get(group_id)
+    if group is not None:
+        return group
+
+    response = await db.table("groups").select("*").eq("id", group_id).execute()
+    if not response.data:
+        return None
+    group = response.data[0]
+    await cache_group(group)
+    return group
+
+
+async def get_groups(group_ids: Iterable[Union[UUID, str]]) -> Dict[str, Dict[str, Any]]:
+    """Bulk `get_group`: {group_id: row} for the groups that exist."""
+    group_ids = list(dict.fromkeys(str(g) for g in group_ids))
+    groups = await group_cache.get_many(group_ids)
+    missing = [group_id for group_id in group_ids if group_id not in groups]
+
+    if missing:
+        response = await db.table("groups").select("*").in_("id", missing).execute()
+        # Rows expire at different times, so one write each (concurrently)
+        await asyncio.gather(*(cache_group(group) for group in response.data))
+        for group in response.data:
+            groups[group["id"]] = group
+    return groups
+
+
+async def get_group_by_code(code: str) -> Optional[Dict[str, Any]]:
+    """The groups row with join code `code`, or None."""
+    group_id = await group_code_index.get(code)
+    if group_id is not None:
+        group = await get_group(group_id)
+        if group is not None and group.get("code") == code:
+            return group
+
+    response = await db.table("groups").select("*").eq("code", code).execute()
+    if not response.data:
+        return None
+    group = response.data[0]
+    await cache_group(group)
+    return group
+
+
+async def invalidate_group(*group_ids: Union[UUID, str]) -> None:
+    """Drops the cached rows of the given groups, for every worker."""
+    await group_cache.delete(*(str(group_id) for group_id in group_ids))
+
+
+def group_cache_stats() -> Dict[str, Any]:
+    return {
+        "groups": group_cache.stats(),
+        "codes": group_code_index.stats(),
+    }
@@ -1,26 +1,150 @@
-import random
+import os
+import secrets
 import string
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
 from uuid import UUID
-from app.database.supabase_client import supabase
+from fastapi import HTTPException
+from app.database.async_client import db
+from app.utils.shared_cache import SharedCache
 
-def generate_group_code(length: int = 6) -> str:
+if TYPE_CHECKING:
+    from postgrest.exceptions import APIError
+
+GROUP_CODE_LENGTH = 6
+GROUP_CODE_CHARS = string.ascii_uppercase + string.digits
+# 36^6 codes make a clash rare; a handful of retries covers bad luck
+GROUP_CODE_MAX_ATTEMPTS = 8
+
+MEMBERSHIP_CACHE_TTL = int(os.getenv("MEMBERSHIP_CACHE_TTL", "300"))
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "50000"))
+
+# Approved flag keyed by (user_id, group_id); False covers pending and non-members.
+# Scoped by group, so a group's memberships can be dropped together.
+membership_cache = SharedCache(
+    "memberships", maxsize=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL, scope=lambda key: key[1]
+)
+
+def generate_group_code(length: int = GROUP_CODE_LENGTH) -> str:
+    """
+    Generates a random group code. Uniqueness is enforced by the database,
+    see `insert_group`.
+    """
+    return ''.join(secrets.choice(GROUP_CODE_CHARS) for _ in range(length))
+
+def _is_code_conflict(error: "APIError") -> bool:
+    # 23505 = unique_violation; only retry when it's the code that clashed
+    return error.code == "23505" and "code" in f"{error.message} {error.details}"
+
+async def insert_group(group: dict) -> dict:
     """
-    Generates a unique random code for a group.
-    Ensures uniqueness by checking against the database.
+    Inserts a group with a freshly generated code and returns the new row.
+    The unique constraint on groups.code catches collisions, in which case
+    the insert is retried with another code, so creating a group is a single
+    write unless codes collide.
     """
-    chars = string.ascii_uppercase + string.digits
-    while True:
-        code = ''.join(random.choices(chars, k=length))
-        # Check if code exists
-        response = supabase.table("groups").select("id").eq("code", code).execute()
+    # postgrest (and httpx) load with the database client, not at import
+    from postgrest.exceptions import APIError
+
+    for _ in range(GROUP_CODE_MAX_ATTEMPTS):
+        try:
+            response = await db.table("groups").insert(dict(group, code=generate_group_code())).execute()
+        except APIError as e:
+            if _is_code_conflict(e):
+                continue
+            raise
         if not response.data:
-            return code
+            raise RuntimeError("Failed to create group")
+        return response.data[0]
+    raise RuntimeError("Could not allocate a unique group code")
+
+async def raise_for_owner_guard(user_id: Union[UUID, str], group_id: Union[UUID, str], forbidden_detail: str):
+    """
+    Called when an owner-scoped write matched no rows, to tell the cases
+    apart: 404 if the group doesn't exist, 403 if the user doesn't own it.
+    Returns normally if the user does own the group (e.g. the member row
+    was missing instead).
+    """
+    response = await db.table("groups").select("owner_user_id").eq("id", str(group_id)).execute()
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if response.data[0]["owner_user_id"] != str(user_id):
+        raise HTTPException(status_code=403, detail=forbidden_detail)
+
+async def is_approved_member(user_id: Union[UUID, str], group_id: Union[UUID, str]) -> bool:
+    """
+    Checks if a user is an approved member of a group.
+    Served from the membership cache after the first lookup.
+    """
+    key = (str(user_id), str(group_id))
+    approved = await membership_cache.get(key)
+    if approved is not None:
+        return approved
 
-def can_manage_group(user_id: UUID, group_id: UUID) -> bool:
+    response = await db.table("group_members").select("approved").eq("group_id", key[1]).eq("user_id", key[0]).execute()
+    approved = bool(response.data and response.data[0]["approved"])
+    await membership_cache.set(key, approved, fill=True)
+    return approved
+
+async def approved_group_ids(user_id: Union[UUID, str], group_ids: Iterable[str]) -> List[str]:
+    """
+    Bulk version of `is_approved_member`: returns the subset of `group_ids`
+    the user is an approved member of, querying only cache misses.
+    """
+    user_id = str(user_id)
+    group_ids = [str(group_id) for group_id in group_ids]
+    cached = await membership_cache.get_many((user_id, group_id) for group_id in group_ids)
+    allowed = []
+    missing = []
+    for group_id in group_ids:
+        approved = cached.get((user_id, group_id))
+        if approved is None:
+            missing.append(group_id)
+        elif approved:
+            allowed.append(group_id)
+
+    if missing:
+        response = await db.table("group_members").select("group_id").eq("user_id", user_id).eq("approved", True).in_("group_id", missing).execute()
+        found = {m["group_id"] for m in response.data}
+        await membership_cache.set_many({(user_id, group_id): group_id in found for group_id in missing}, fill=True)
+        allowed.extend(group_id for group_id in missing if group_id in found)
+
+    return allowed
+
+async def listing_version(group_id: Union[UUID, str], listing: str) -> Optional[int]:
     """
-    Checks if a user is the owner of a group.
+    Returns the change counter of a group's "members" or "photos" listing
+    (bumped by writes that change what the listing shows), or None if the
+    group doesn't exist.
     """
-    response = supabase.table("groups").select("owner_user_id").eq("id", str(group_id)).single().execute()
+    response = await db.table("group_listing_versions").select(listing).eq("group_id", str(group_id)).execute()
     if response.data:
-        return response.data["owner_user_id"] == str(user_id)
-    return False
+        return response.data[0][listing]
+    return None
+
+async def set_membership(user_id: Union[UUID, str], group_id: Union[UUID, str], approved: bool, strict: bool = False):
+    """
+    Write-through update after a membership row is inserted, updated or deleted.
+    With a shared cache backend every worker sees the new value at once.
+    Pass `strict` for writes that revoke access: if the cache can't be
+    updated it raises CacheBackendError, so the revocation isn't reported
+    as done while a stale approval is still cached.
+    """
+    await set_memberships(user_id, {group_id: approved}, strict=strict)
+
+async def set_memberships(user_id: Union[UUID, str], approved: Dict[str, bool], strict: bool = False, fill: bool = False):
+    """
+    Bulk `set_membership` for one user: {group_id: approved}. Pass `fill`
+    when the values come from a read rather than a write, so they don't
+    overwrite a concurrent write-through (see SharedCache.set_many).
+    """
+    await membership_cache.set_many(
+        {(str(user_id), str(group_id)): ok for group_id, ok in approved.items()}, strict=strict, fill=fill
+    )
+
+async def invalidate_group_memberships(*group_ids: Union[UUID, str]):
+    """
+    Drops every cached membership for the given groups (e.g. when they are
+    deleted), on every worker, by invalidating the groups' cache scopes.
+    Raises CacheBackendError if that fails, like a strict `set_membership`.
+    """
+    await membership_cache.invalidate(*(str(group_id) for group_id in group_ids), strict=True)
@@ -0,0 +1,151 @@
+"""
+Local verification of Supabase access tokens.
+
+With AUTH_VERIFY_MODE=local, `get_current_user_dep` checks the token's
+signature and expiry here instead of calling Supabase Auth on every request.
+Verified users are cached until their token expires, in the shared cache so
+a token verified by one worker is known to all of them.
+"""
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+import jwt
+
+from app.database.supabase_client import SUPABASE_URL
+from app.models.auth import UserResponse
+from app.utils.shared_cache import SharedCache, cache_type
+
+# "remote" calls Supabase Auth for every request (default), "local" verifies
+# the token in-process and only falls back to Supabase when it can't.
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "remote").lower()
+
+# HS256 projects sign tokens with the project's JWT secret.
+JWT_SECRET = os.getenv("JWT_SECRET", "")
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+
+# Projects using asymmetric signing keys publish them as a JWKS.
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+)
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "600"))
+JWKS_MIN_REFRESH_SECONDS = 30
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+cache_type(UserResponse)
+
+# Decoded UserResponse objects keyed by token hash, evicted at token `exp`
+token_cache = SharedCache("tokens", maxsize=AUTH_TOKEN_CACHE_SIZE)
+
+_jwks: Dict[str, Any] = {"keys": {}, "fetched_at": 0.0}
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token was checked locally and is not valid."""
+
+
+def token_cache_key(token: str) -> str:
+    """Hashes the token so raw credentials are never kept (or shared) as keys."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def unverified_expiry(token: str) -> Optional[float]:
+    """Reads the `exp` claim without checking the signature."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if exp else None
+
+
+def user_from_claims(claims: Dict[str, Any]) -> UserResponse:
+    """
+    The user a verified token describes. Raises TokenVerificationError for
+    claims that don't make a UserResponse, e.g. the empty `email` of phone
+    and anonymous users, which the remote lookup rejects too.
+    """
+    metadata = claims.get("user_metadata") or {}
+    try:
+        return UserResponse(
+            id=claims["sub"],
+            email=claims.get("email"),
+            username=metadata.get("username"),
+            metadata=metadata
+        )
+    except (KeyError, ValueError) as e:
+        # pydantic's ValidationError is a ValueError
+        raise TokenVerificationError(f"Unusable token claims: {e}")
+
+
+async def _jwks_key(kid: Optional[str]):
+    now = time.time()
+    stale = now - _jwks["fetched_at"] > JWKS_CACHE_SECONDS
+    unknown_kid = kid not in _jwks["keys"]
+    # An unknown kid may mean the keys were rotated, but don't refetch on
+    # every request carrying a bogus kid.
+    if stale or (unknown_kid and now - _jwks["fetched_at"] > JWKS_MIN_REFRESH_SECONDS):
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(SUPABASE_JWKS_URL)
+                response.raise_for_status()
+                key_set = response.json().get("keys", [])
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"JWKS fetch failed: {e}")
+            return None
+
+        keys = {}
+        for key_data in key_set:
+            try:
+                keys[key_data.get("kid")] = jwt.PyJWK(key_data)
+            except jwt.PyJWTError:
+                continue
+        _jwks["keys"] = keys
+        _jwks["fetched_at"] = now
+
+    jwk = _jwks["keys"].get(kid)
+    return jwk.key if jwk else None
+
+
+async def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verifies a Supabase access token's signature, expiry and audience.
+
+    Returns the claims, or None if the token can't be checked locally
+    (no secret / signing key available for its algorithm).
+    Raises TokenVerificationError if the token is invalid.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e))
+
+    algorithm = header.get("alg")
+    if algorithm == "HS256":
+        if not JWT_SECRET:
+            return None
+        key = JWT_SECRET
+    elif algorithm in ("RS256", "ES256"):
+        key = await _jwks_key(header.get("kid"))
+        if key is None:
+            return None
+    else:
+        return None
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=JWT_AUDIENCE or None,
+            options={
+                "require": ["exp", "sub"],
+                "verify_aud": bool(JWT_AUDIENCE),
+            },
+        )
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e))
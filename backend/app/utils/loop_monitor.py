@@ -0,0 +1,211 @@
+"""
+Event-loop stall detector (opt-in, LOOP_MONITOR_ENABLED=true).
+
+A heartbeat task wakes every LOOP_MONITOR_INTERVAL_MS and records how late
+it woke (event-loop lag). A watchdog thread watches the heartbeat: once it is
+more than LOOP_STALL_THRESHOLD_MS late, the loop is stuck in one callback,
+so the watchdog grabs the loop thread's current stack - the blocking frame,
+e.g. `generate_thumbnail` or a synchronous `.execute()` - and the route of
+the request it belongs to. When the loop gets going again the stall is
+logged with its duration, counted in /metrics and kept for
+GET /maintenance/loop-stalls.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from types import FrameType
+from typing import Any, Deque, Dict, Optional
+
+from app.utils.metrics import registry, route_label
+
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "false").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "25"))
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+# Innermost frames kept per stall
+LOOP_STALL_STACK_DEPTH = int(os.getenv("LOOP_STALL_STACK_DEPTH", "30"))
+# Stalls kept for /maintenance/loop-stalls
+LOOP_STALL_HISTORY = int(os.getenv("LOOP_STALL_HISTORY", "50"))
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOOP_LAG = registry.histogram(
+    "tripshare_event_loop_lag_seconds",
+    "How late the event-loop heartbeat woke up (only while the loop monitor runs).",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = registry.counter(
+    "tripshare_event_loop_stalls_total",
+    "Event-loop stalls over LOOP_STALL_THRESHOLD_MS, by route and blocking function.",
+    ("route", "site"),
+)
+LOOP_STALL_SECONDS = registry.counter(
+    "tripshare_event_loop_stall_seconds_total",
+    "Time the event loop spent blocked in stalls, by route and blocking function.",
+    ("route", "site"),
+)
+
+
+def frame_name(frame: FrameType) -> str:
+    """"module.qualname" of the function a frame is running."""
+    module = frame.f_globals.get("__name__", "?")
+    # co_qualname is new in Python 3.11
+    code = frame.f_code
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def blocking_site(frame: FrameType) -> str:
+    """
+    The innermost function of this app on the stack (the code that made the
+    blocking call), or the innermost frame if none of it is ours. ASGI
+    middleware (anything taking `scope`) is only plumbing and is skipped.
+    """
+    current: Optional[FrameType] = frame
+    while current is not None:
+        code = current.f_code
+        if code.co_filename.startswith(APP_DIR) and code.co_name != "<module>" and "scope" not in code.co_varnames:
+            return frame_name(current)
+        current = current.f_back
+    return frame_name(frame)
+
+
+def request_scope(frame: FrameType) -> Optional[dict]:
+    """
+    The ASGI scope of the request being handled on this stack. A request's
+    middleware and endpoint run in one task, so their coroutine frames are
+    chained and one of them has `scope` as a local.
+    """
+    found = None
+    current: Optional[FrameType] = frame
+    while current is not None:
+        if "scope" in current.f_code.co_varnames:
+            scope = current.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                if "route" in scope:
+                    return scope
+                found = found or scope
+        current = current.f_back
+    return found
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and captures the stack behind each stall.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_MS / 1000,
+        threshold: float = LOOP_STALL_THRESHOLD_MS / 1000,
+        history: int = LOOP_STALL_HISTORY,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.total_stalls = 0
+        self._lock = threading.Lock()
+        self._beat = time.perf_counter()
+        # Stack captured by the watchdog for the current (unfinished) stall
+        self._pending: Optional[Dict[str, Any]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Starts monitoring the running loop. Call from the loop's thread."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self._beat = now
+            LOOP_LAG.observe(lag)
+            if pending is not None and lag >= self.threshold:
+                self._record(pending, lag)
+
+    def _watch(self) -> None:
+        check_every = max(0.001, min(self.interval, self.threshold / 4))
+        while not self._stopping.wait(check_every):
+            beat = self._beat
+            if self._pending is not None or time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            stall = self._capture()
+            if stall is None:
+                continue
+            with self._lock:
+                # Only if the loop is still stuck in the same stall
+                if self._beat == beat and self._pending is None:
+                    self._pending = stall
+
+    def _capture(self) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        scope = request_scope(frame)
+        return {
+            "at": datetime.utcnow().isoformat(),
+            "method": scope["method"] if scope else None,
+            "route": route_label(scope),
+            "site": blocking_site(frame),
+            "stack": traceback.format_list(traceback.extract_stack(frame, limit=LOOP_STALL_STACK_DEPTH)),
+        }
+
+    def _record(self, stall: Dict[str, Any], lag: float) -> None:
+        # The heartbeat's lateness: a lower bound on how long the callback ran
+        stall["duration_ms"] = round(lag * 1000, 1)
+        self.total_stalls += 1
+        self.stalls.append(stall)
+        LOOP_STALLS.inc(route=stall["route"], site=stall["site"])
+        LOOP_STALL_SECONDS.inc(lag, route=stall["route"], site=stall["site"])
+
+        where = f"{stall['method']} {stall['route']}" if stall["method"] else stall["route"]
+        print(
+            f"Event loop blocked for {stall['duration_ms']:.0f} ms in {stall['site']} ({where}):\n"
+            + "".join(stall["stack"]).rstrip()
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "total_stalls": self.total_stalls,
+            "recent": list(reversed(self.stalls)),
+        }
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+
+def encode_cursor(uploaded_at: str, photo_id: str) -> str:
+    """
+    Builds an opaque cursor pointing just after the given (uploaded_at, id) row.
+    """
+    raw = json.dumps({"u": str(uploaded_at), "i": str(photo_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns the (uploaded_at, id) position encoded in a cursor, or (None, None)
+    for the first page. Raises 400 for anything that isn't a cursor we issued.
+    """
+    if not cursor:
+        return None, None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        uploaded_at = datetime.fromisoformat(data["u"].replace('Z', '+00:00'))
+        photo_id = UUID(data["i"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return uploaded_at.isoformat(), str(photo_id)
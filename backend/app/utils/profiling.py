@@ -0,0 +1,314 @@
+"""
+On-demand profiling of single requests.
+
+Set PROFILE_TOKEN to enable. A request is profiled when it sends
+`X-Profile-Token: <PROFILE_TOKEN>`, or at random with probability
+PROFILE_SAMPLE_RATE. While it runs, a sampler thread looks at it every
+PROFILE_INTERVAL_MS: when the request's task is running on the event loop it
+records the loop thread's stack, and when the task is suspended it records
+the chain of `await`s it is parked in (ending in "<await>"), so time spent
+waiting on Supabase shows up next to CPU time.
+
+Each profile (folded stacks for flame graphs, plus per-function totals) is
+stored under an id generated here (prefixed with the request's
+`X-Request-ID`, if any), which is sent back in `X-Profile-ID`. Only the
+newest PROFILE_RETENTION profiles are kept, in memory and, with PROFILE_DIR
+set, as JSON files shared by the workers on a host.
+"""
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.loop_monitor import frame_name
+from app.utils.metrics import route_label
+
+# Empty disables profiling
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_RETENTION = int(os.getenv("PROFILE_RETENTION", "100"))
+# Requests profiled at the same time (per worker); others run unprofiled
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "4"))
+# Sampling stops after this long; the profile is marked truncated
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+# Empty keeps profiles in memory only
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+PROFILE_HEADER = "x-profile-token"
+WAIT_FRAME = "<await>"
+MAX_STACK_DEPTH = 128
+TOP_FUNCTIONS = 40
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+# An optional request id, "-" and a uuid4
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,97}$")
+
+Stack = Tuple[str, ...]
+
+
+def _coroutine_frames(coro: Any) -> List[FrameType]:
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first."""
+    frames = []
+    current = coro
+    while current is not None and len(frames) < MAX_STACK_DEPTH:
+        frame = getattr(current, "cr_frame", None) or getattr(current, "gi_frame", None) or getattr(current, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        current = getattr(current, "cr_await", None) or getattr(current, "gi_yieldfrom", None) or getattr(current, "ag_await", None)
+    return frames
+
+
+class RequestProfile:
+    """
+    Samples one request. `root` is the profiling middleware's own frame;
+    stacks start below it.
+    """
+
+    def __init__(
+        self,
+        profile_id: str,
+        request_id: Optional[str],
+        scope: dict,
+        task: asyncio.Task,
+        root: FrameType,
+        loop_thread_id: int,
+    ):
+        self.profile_id = profile_id
+        self.request_id = request_id
+        self.scope = scope
+        self.task = task
+        self.root = root
+        self.loop_thread_id = loop_thread_id
+        self.interval = PROFILE_INTERVAL_MS / 1000
+        self.started_at = datetime.utcnow()
+        self.status: Optional[int] = None
+        self.stacks: Counter = Counter()
+        self.waiting = 0
+        self.truncated = False
+        self.duration = 0.0
+        self._started = time.perf_counter()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profile-{profile_id}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.duration = time.perf_counter() - self._started
+        self._done.set()
+        self._thread.join(timeout=1)
+
+    def _run(self) -> None:
+        deadline = self._started + PROFILE_MAX_SECONDS
+        while not self._done.wait(self.interval):
+            if time.perf_counter() > deadline:
+                self.truncated = True
+                return
+            self.sample()
+
+    def _running_stack(self) -> Optional[Stack]:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        names = []
+        while frame is not None:
+            if frame is self.root:
+                return tuple(reversed(names))
+            names.append(frame_name(frame))
+            frame = frame.f_back
+        # The loop is running some other request or callback
+        return None
+
+    def _waiting_stack(self) -> Stack:
+        frames = _coroutine_frames(self.task.get_coro())
+        for i, frame in enumerate(frames):
+            if frame is self.root:
+                return tuple(frame_name(f) for f in frames[i + 1:]) + (WAIT_FRAME,)
+        return (WAIT_FRAME,)
+
+    def sample(self) -> None:
+        stack = self._running_stack()
+        waiting = stack is None
+        if waiting:
+            stack = self._waiting_stack()
+        # Taken after stop(): the loop thread is in our join()
+        if self._done.is_set():
+            return
+        self.waiting += waiting
+        self.stacks[stack[-MAX_STACK_DEPTH:]] += 1
+
+    def result(self) -> Dict[str, Any]:
+        samples = sum(self.stacks.values())
+        ms_per_sample = self.duration * 1000 / samples if samples else 0.0
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            if stack:
+                own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+
+        return {
+            "id": self.profile_id,
+            "request_id": self.request_id,
+            "method": self.scope["method"],
+            "path": self.scope["path"],
+            "route": route_label(self.scope),
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": samples,
+            "waiting_samples": self.waiting,
+            "truncated": self.truncated,
+            # Wall time attributed to each function: `self_ms` while it was
+            # the innermost frame, `total_ms` while it was anywhere on the stack
+            "top": [
+                {
+                    "function": name,
+                    "self_ms": round(own[name] * ms_per_sample, 1),
+                    "total_ms": round(count * ms_per_sample, 1),
+                }
+                for name, count in total.most_common(TOP_FUNCTIONS)
+            ],
+            # Brendan Gregg's folded format: flamegraph.pl, speedscope
+            "folded": [f"{';'.join(stack) or 'root'} {count}" for stack, count in self.stacks.most_common()],
+        }
+
+
+class ProfileStore:
+    """
+    The newest `maxsize` profiles by id, in memory and optionally as
+    `<id>.json` files in `directory`.
+    """
+
+    def __init__(self, maxsize: int = PROFILE_RETENTION, directory: str = PROFILE_DIR):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            self._profiles.move_to_end(profile["id"])
+            while len(self._profiles) > self.maxsize:
+                self._profiles.popitem(last=False)
+        if self.directory:
+            self._write(profile)
+
+    def _write(self, profile: Dict[str, Any]) -> None:
+        # Write then rename, so readers never see a partial file
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, self._path(profile["id"]))
+
+            files = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            for entry in files[:-self.maxsize]:
+                os.remove(entry.path)
+        except OSError as e:
+            print(f"Could not write profile {profile['id']}: {e}")
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+        if profile is not None or not self.directory or not _PROFILE_ID.match(profile_id):
+            return profile
+        try:
+            with open(self._path(profile_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of this worker's profiles, newest first."""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [
+            {key: value for key, value in profile.items() if key not in ("top", "folded")}
+            for profile in reversed(profiles)
+        ]
+
+
+profile_store = ProfileStore()
+
+
+def has_profile_token(value: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(value or "", PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that ask for it (admin token header) or are sampled.
+    Everything else passes straight through.
+    """
+
+    def __init__(self, app, skip_prefixes: Tuple[str, ...] = ("/metrics", "/maintenance/profiles")):
+        self.app = app
+        self.skip_prefixes = skip_prefixes
+        self.active = 0
+
+    def _wanted(self, scope: dict) -> bool:
+        if not PROFILE_TOKEN or scope["type"] != "http" or scope["path"].startswith(self.skip_prefixes):
+            return False
+        if self.active >= PROFILE_MAX_CONCURRENT:
+            return False
+        headers = dict(scope["headers"])
+        token = headers.get(PROFILE_HEADER.encode())
+        if token is not None and has_profile_token(token.decode("latin-1")):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Always generated here, so a client can't pick (or overwrite) another's id
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        request_id = incoming if _REQUEST_ID.match(incoming) else None
+        profile_id = f"{request_id}-{uuid.uuid4().hex}" if request_id else uuid.uuid4().hex
+        profile = RequestProfile(
+            profile_id, request_id, scope, asyncio.current_task(), sys._getframe(), threading.get_ident()
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        self.active += 1
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            self.active -= 1
+            result = profile.result()
+            if profile_store.directory:
+                await run_in_threadpool(profile_store.add, result)
+            else:
+                profile_store.add(result)
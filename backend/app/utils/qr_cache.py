@@ -0,0 +1,113 @@
+"""
+Rendered QR code cache.
+
+A group's join code never changes, so its QR image is rendered once per
+(code, format, size) and then served from an in-process LRU, backed by an
+optional on-disk tier (QR_CACHE_DIR) that survives restarts and is shared by
+workers on the same host. Concurrent requests for an image that isn't cached
+yet wait for a single render instead of each rendering it.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.cache import TTLCache
+from app.utils.qr_utils import render_qr
+from app.utils.worker_pool import image_pool
+
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "1024"))
+# Empty disables the disk tier
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", "")
+QR_CACHE_MAX_AGE = int(os.getenv("QR_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Allowed PNG sizes, in pixels
+QR_MIN_SIZE = 64
+QR_MAX_SIZE = 2048
+
+QRKey = Tuple[str, str, Optional[int]]
+
+# (code, fmt, size) -> (image bytes, strong ETag)
+qr_cache = TTLCache(maxsize=QR_CACHE_SIZE)
+_pending: Dict[QRKey, asyncio.Future] = {}
+
+
+def join_link(code: str) -> str:
+    # In a real app, this would be a deep link URL
+    return f"tripshare://join?code={code}"
+
+
+def _etag(content: bytes) -> str:
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+def _disk_path(key: QRKey) -> str:
+    code, fmt, size = key
+    name = hashlib.sha256(f"{code}|{size}".encode()).hexdigest()
+    return os.path.join(QR_CACHE_DIR, f"{name}.{fmt}")
+
+
+def _read_disk(key: QRKey) -> Optional[bytes]:
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(key: QRKey, content: bytes) -> None:
+    # Write then rename, so readers never see a partial file
+    try:
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=QR_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, _disk_path(key))
+    except OSError as e:
+        print(f"Could not write QR cache file: {e}")
+
+
+async def _load(key: QRKey) -> Tuple[bytes, str]:
+    content = await run_in_threadpool(_read_disk, key) if QR_CACHE_DIR else None
+    if content is None:
+        code, fmt, size = key
+        content = await image_pool.run(render_qr, join_link(code), fmt, size)
+        if QR_CACHE_DIR:
+            await run_in_threadpool(_write_disk, key, content)
+    entry = (content, _etag(content))
+    qr_cache.set(key, entry)
+    return entry
+
+
+async def get_qr(code: str, fmt: str = "png", size: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Returns (image bytes, strong ETag) for a group code's join QR.
+    """
+    key = (code, fmt, size if fmt == "png" else None)
+    entry = qr_cache.get(key)
+    if entry is not None:
+        return entry
+
+    pending = _pending.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _pending[key] = future
+    try:
+        entry = await _load(key)
+        future.set_result(entry)
+        return entry
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody else may be waiting; don't warn about an unretrieved exception
+        future.exception()
+        raise
+    finally:
+        del _pending[key]
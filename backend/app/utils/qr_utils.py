@@ -0,0 +1,34 @@
+from io import BytesIO
+from typing import Optional
+
+QR_BORDER = 4
+
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+def render_qr(data: str, fmt: str = "png", size: Optional[int] = None) -> bytes:
+    """
+    Renders `data` as a QR code in `fmt` ("png" or "svg").
+    Module-level so it can run in the image worker pool.
+    For PNG, `size` is the largest width/height in pixels; modules stay whole
+    pixels, so the image may come out slightly smaller. SVG ignores it.
+    """
+    # Imported here: only the image workers render QR codes
+    import qrcode
+    import qrcode.image.svg
+
+    qr = qrcode.QRCode(border=QR_BORDER)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    if fmt == "svg":
+        return qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string()
+
+    if size:
+        qr.box_size = max(1, size // (qr.modules_count + 2 * QR_BORDER))
+    img = qr.make_image()
+    buf = BytesIO()
+    img.save(buf)
+    return buf.getvalue()
@@ -0,0 +1,98 @@
+"""
+Readiness state for load balancer health checks.
+
+An instance is ready once startup warm-up has finished and the latest
+backend probes passed within READINESS_MAX_LATENCY_MS. Probe results are
+reused for READINESS_PROBE_TTL seconds and concurrent checks share one
+probe round, so however often the load balancer asks, each worker sends at
+most one set of (header-only) probe requests per TTL.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.database.async_client import db
+
+READINESS_PROBE_TTL = float(os.getenv("READINESS_PROBE_TTL", "10"))
+READINESS_PROBE_TIMEOUT = float(os.getenv("READINESS_PROBE_TIMEOUT", "2"))
+# A backend this slow to answer counts as not ready
+READINESS_MAX_LATENCY_MS = float(os.getenv("READINESS_MAX_LATENCY_MS", "1000"))
+
+
+class Readiness:
+    def __init__(
+        self,
+        ttl: float = READINESS_PROBE_TTL,
+        timeout: float = READINESS_PROBE_TIMEOUT,
+        max_latency_ms: float = READINESS_MAX_LATENCY_MS,
+    ):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_latency_ms = max_latency_ms
+        self.warmed_up = False
+        self.warm_up_seconds: Optional[float] = None
+        self.shutting_down = False
+        self.probes: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Optional[datetime] = None
+        self._checked = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def mark_warmed_up(self, seconds: float) -> None:
+        self.warmed_up = True
+        self.warm_up_seconds = round(seconds, 3)
+
+    async def _probe(self, service: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.probe(service), self.timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "latency_ms": None, "error": f"no answer within {self.timeout:g}s"}
+        except Exception as e:
+            return {"ok": False, "latency_ms": None, "error": str(e) or type(e).__name__}
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        if latency_ms > self.max_latency_ms:
+            return {"ok": False, "latency_ms": latency_ms, "error": f"slower than {self.max_latency_ms:g} ms"}
+        return {"ok": True, "latency_ms": latency_ms, "error": None}
+
+    async def refresh(self) -> None:
+        """Probes every backend service now."""
+        services = db.probe_services
+        results = await asyncio.gather(*(self._probe(service) for service in services))
+        self.probes = dict(zip(services, results))
+        self.checked_at = datetime.utcnow()
+        self._checked = time.monotonic()
+
+    async def check(self) -> Dict[str, Any]:
+        """The readiness report, probing first if the last results are stale."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.warmed_up and not self.shutting_down and time.monotonic() - self._checked >= self.ttl:
+            async with self._lock:
+                # Another check may have refreshed while we waited
+                if time.monotonic() - self._checked >= self.ttl:
+                    await self.refresh()
+        return self.report()
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.warmed_up
+            and not self.shutting_down
+            and bool(self.probes)
+            and all(probe["ok"] for probe in self.probes.values())
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "not_ready",
+            "warmed_up": self.warmed_up,
+            "warm_up_seconds": self.warm_up_seconds,
+            "shutting_down": self.shutting_down,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "probes": self.probes,
+        }
+
+
+readiness = Readiness()
@@ -0,0 +1,172 @@
+"""
+Background rendition pipeline.
+
+`upload_photo` stores the original, records a row in `rendition_jobs` and
+returns. The worker started with the app claims due jobs, renders every size
+in the image pool, uploads them and records their paths on the `photos` row.
+Failed jobs are retried with exponential backoff from the persistent queue,
+so a crash or restart never loses work.
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Union
+from uuid import UUID
+
+from app.database.async_client import db
+from app.utils.metrics import THUMBNAIL_FAILURES
+from app.utils.storage_utils import build_rendition_path, generate_renditions, rendition_format
+from app.utils.worker_pool import image_pool
+
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "photos")
+
+RENDITION_WORKER_ENABLED = os.getenv("RENDITION_WORKER_ENABLED", "true").lower() == "true"
+RENDITION_POLL_SECONDS = float(os.getenv("RENDITION_POLL_SECONDS", "10"))
+RENDITION_BATCH_SIZE = int(os.getenv("RENDITION_BATCH_SIZE", "4"))
+RENDITION_LEASE_SECONDS = int(os.getenv("RENDITION_LEASE_SECONDS", "300"))
+RENDITION_MAX_ATTEMPTS = int(os.getenv("RENDITION_MAX_ATTEMPTS", "5"))
+RENDITION_RETRY_BASE_SECONDS = int(os.getenv("RENDITION_RETRY_BASE_SECONDS", "30"))
+
+
+async def enqueue_rendition(photo_id: Union[UUID, str]) -> None:
+    """
+    Queues rendition generation for a stored photo.
+    """
+    await db.table("rendition_jobs").insert({"photo_id": str(photo_id)}).execute()
+    rendition_worker.wake()
+
+
+async def render_photo(photo: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Renders, uploads and records every rendition of one photo.
+    Returns the rendition paths stored on the photo row.
+    """
+    bucket = db.storage.from_(SUPABASE_BUCKET_NAME)
+    # Streamed to a temporary file the image worker decodes from, so
+    # neither this process nor the pool's pipe holds the whole original
+    with tempfile.NamedTemporaryFile(prefix="rendition-") as original:
+        await db.download_to(SUPABASE_BUCKET_NAME, photo["storage_path"], original)
+        original.flush()
+        try:
+            rendered = await image_pool.run(generate_renditions, original.name)
+        except Exception:
+            THUMBNAIL_FAILURES.inc()
+            raise
+
+    _, ext, content_type = rendition_format()
+    renditions = {"original": photo["storage_path"]}
+    for name, data in rendered.items():
+        path = build_rendition_path(photo["group_id"], photo["storage_path"], name, ext)
+        await bucket.upload(
+            path=path,
+            file=data,
+            file_options={"content-type": content_type, "x-upsert": "true"}
+        )
+        renditions[name] = path
+
+    response = await db.table("photos").update({"renditions": renditions}).eq("id", photo["id"]).execute()
+    if not response.data:
+        # Deleted while rendering; don't leave its renditions behind
+        await bucket.remove([path for name, path in renditions.items() if name != "original"])
+    return renditions
+
+
+class RenditionWorker:
+    """
+    Polls `rendition_jobs` and processes claimed jobs concurrently.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.processed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Skips the rest of the poll interval (a job was just queued)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                jobs = await self.claim()
+                if jobs:
+                    await asyncio.gather(*(self.process(job) for job in jobs))
+                    # More may be due; poll again straight away
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Rendition worker error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=RENDITION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def claim(self) -> list:
+        response = await db.rpc("claim_rendition_jobs", {
+            "p_limit": RENDITION_BATCH_SIZE,
+            "p_lease_seconds": RENDITION_LEASE_SECONDS,
+            "p_max_attempts": RENDITION_MAX_ATTEMPTS
+        }).execute()
+        return response.data or []
+
+    async def process(self, job: Dict[str, Any]) -> None:
+        try:
+            photo_response = await db.table("photos").select("id, group_id, storage_path").eq("id", job["photo_id"]).execute()
+            if photo_response.data:
+                await render_photo(photo_response.data[0])
+            await db.table("rendition_jobs").update({
+                "status": "done",
+                "last_error": None,
+                "locked_until": None,
+                "updated_at": datetime.utcnow().isoformat()
+            }).eq("id", job["id"]).execute()
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Rendition job {job['id']} failed (attempt {job['attempts']}): {e}")
+            await self._retry_later(job, e)
+
+    async def _retry_later(self, job: Dict[str, Any], error: Exception) -> None:
+        give_up = job["attempts"] >= RENDITION_MAX_ATTEMPTS
+        delay = RENDITION_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+        try:
+            await db.table("rendition_jobs").update({
+                "status": "failed" if give_up else "pending",
+                "last_error": str(error)[:1000],
+                "locked_until": None,
+                "run_after": (datetime.utcnow() + timedelta(seconds=delay)).isoformat(),
+                "updated_at": datetime.utcnow().isoformat()
+            }).eq("id", job["id"]).execute()
+        except Exception as e:
+            # The lease expires and the job is claimed again anyway
+            print(f"Could not reschedule rendition job {job['id']}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+rendition_worker = RenditionWorker()
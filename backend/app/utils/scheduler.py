@@ -0,0 +1,212 @@
+"""
+In-process scheduler for maintenance jobs (cleanup, expiry warnings).
+
+Each job runs on its own interval with random jitter, so replicas started
+together don't all wake at once. Before running, a replica takes the job's
+lease in `maintenance_leases` (renewed while the job runs); replicas that
+can't get it skip that round. If a renewal is refused, or keeps failing
+until the lease has run out, the job is cancelled so two replicas never run
+it at once. The last run's duration and result are kept in memory and on
+the lease row.
+"""
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.database.async_client import db
+
+MAINTENANCE_SCHEDULER_ENABLED = os.getenv("MAINTENANCE_SCHEDULER_ENABLED", "false").lower() == "true"
+MAINTENANCE_JITTER = float(os.getenv("MAINTENANCE_JITTER", "0.1"))
+MAINTENANCE_CLEANUP_INTERVAL = float(os.getenv("MAINTENANCE_CLEANUP_INTERVAL", "3600"))
+MAINTENANCE_WARNINGS_INTERVAL = float(os.getenv("MAINTENANCE_WARNINGS_INTERVAL", "900"))
+
+
+def _result_dict(result: Any) -> Optional[Dict[str, Any]]:
+    if result is None or isinstance(result, dict):
+        return result
+    if hasattr(result, "as_dict"):
+        return result.as_dict()
+    return {"result": result}
+
+
+class ScheduledJob:
+    """
+    A maintenance coroutine run every `interval` seconds (± jitter).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        lease_seconds: Optional[int] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        # Renewed every lease/3 seconds while running
+        self.lease_seconds = lease_seconds or max(60, int(interval))
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.running = False
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+class Scheduler:
+    """
+    Runs registered jobs in background tasks on the app's event loop.
+    """
+
+    def __init__(self, jitter: float = MAINTENANCE_JITTER):
+        self.jitter = jitter
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, func: Callable[[], Awaitable[Any]], interval: float, lease_seconds: Optional[int] = None) -> ScheduledJob:
+        job = ScheduledJob(name, func, interval, lease_seconds)
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        for name, job in self.jobs.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._loop(job))
+
+    async def stop(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = {}
+
+    def _delay(self, interval: float) -> float:
+        return max(0.0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        # Spread the first run over the jitter window too
+        await asyncio.sleep(random.uniform(0, job.interval * self.jitter))
+        while True:
+            try:
+                await self.run_once(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Scheduler error in {job.name}: {e}")
+            await asyncio.sleep(self._delay(job.interval))
+
+    async def acquire(self, job: ScheduledJob) -> bool:
+        response = await db.rpc("acquire_maintenance_lease", {
+            "p_job": job.name,
+            "p_holder": self.holder,
+            "p_lease_seconds": job.lease_seconds
+        }).execute()
+        return bool(response.data)
+
+    async def _renew(self, job: ScheduledJob, work: asyncio.Task) -> None:
+        """
+        Renews the lease every lease/3 seconds while `work` runs. Cancels
+        `work` and returns once the lease is lost.
+        """
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(job.lease_seconds / 3)
+            try:
+                held = await self.acquire(job)
+            except Exception as e:
+                print(f"Could not renew lease for {job.name}: {e}")
+                # Still ours until it runs out
+                held = time.monotonic() - renewed_at < job.lease_seconds
+            else:
+                if held:
+                    renewed_at = time.monotonic()
+            if not held:
+                print(f"Lost lease for {job.name}; cancelling the run")
+                work.cancel()
+                return
+
+    async def run_once(self, job: ScheduledJob) -> bool:
+        """
+        Runs the job if this replica gets its lease. Returns whether it ran.
+        """
+        if not await self.acquire(job):
+            job.skipped += 1
+            return False
+
+        job.running = True
+        job.last_started_at = datetime.utcnow()
+        started = time.monotonic()
+        work = asyncio.create_task(job.func())
+        renew_task = asyncio.create_task(self._renew(job, work))
+        try:
+            job.last_result = _result_dict(await work)
+            job.last_error = None
+            job.runs += 1
+        except asyncio.CancelledError:
+            # Cancelled by _renew (lease lost) rather than by stop()
+            if not renew_task.done() or renew_task.cancelled():
+                work.cancel()
+                raise
+            job.failures += 1
+            job.last_result = None
+            job.last_error = "lost lease"
+        except Exception as e:
+            job.failures += 1
+            job.last_result = None
+            job.last_error = str(e)
+            print(f"Maintenance job {job.name} failed: {e}")
+        finally:
+            renew_task.cancel()
+            job.running = False
+            job.last_duration_seconds = round(time.monotonic() - started, 3)
+            await self.release(job)
+        return True
+
+    async def release(self, job: ScheduledJob) -> None:
+        """Frees the lease and records the run on the lease row."""
+        try:
+            await db.table("maintenance_leases").update({
+                "locked_until": None,
+                "last_started_at": job.last_started_at.isoformat(),
+                "last_finished_at": datetime.utcnow().isoformat(),
+                "last_duration_seconds": job.last_duration_seconds,
+                "last_result": job.last_result,
+                "last_error": job.last_error
+            }).eq("job", job.name).eq("holder", self.holder).execute()
+        except Exception as e:
+            # The lease simply runs out
+            print(f"Could not release lease for {job.name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "holder": self.holder,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()},
+        }
+
+
+scheduler = Scheduler()
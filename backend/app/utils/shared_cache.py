@@ -0,0 +1,694 @@
+"""
+Caches that can be shared by every worker and replica of a deployment.
+
+Auth tokens, memberships, signed URLs and group rows are cached through
+`SharedCache`, whose entries live in the backend picked by CACHE_BACKEND:
+
+- "memory" (default): an in-process LRU per cache. Each worker has its own
+  copy, which suits a single worker.
+- "file": one file per entry under CACHE_DIR, shared by the workers on a
+  host. Put CACHE_DIR on tmpfs (e.g. /dev/shm) to keep it in memory.
+- "redis": a Redis-protocol server at CACHE_REDIS_URL, shared by every
+  replica. `python -m app.utils.cache_server` runs a small stand-in.
+
+Entries can be grouped into scopes (e.g. all memberships of one group).
+Each scope has a generation token stored next to its entries and an entry
+only counts while the token it was written with is current, so
+`invalidate(scope)` drops a whole scope, for every worker, by deleting one
+key. A backend call that fails (or, with Redis, takes longer than
+CACHE_TIMEOUT) is treated as a miss, so requests fall back to Supabase
+rather than erroring. Writes that revoke access pass `strict=True`: they are
+retried, and a write that still fails raises so the request fails too.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.cache import TTLCache
+from app.utils.metrics import registry
+
+# "memory", "file" or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "tripshare-cache"))
+# Files kept in CACHE_DIR; past this the least recently written are pruned
+CACHE_DIR_MAX_ENTRIES = int(os.getenv("CACHE_DIR_MAX_ENTRIES", "200000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+# Connections per worker
+CACHE_REDIS_POOL_SIZE = int(os.getenv("CACHE_REDIS_POOL_SIZE", "8"))
+# A Redis call slower than this counts as a miss (seconds)
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", "0.5"))
+# Prepended to every key, so deployments can share one server
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "tripshare:")
+
+# Scope generations outlive the entries they guard; one that expires early
+# only turns its scope's entries into misses
+CACHE_GENERATION_TTL = 24 * 3600
+# Writes between two prunes of CACHE_DIR (per worker)
+CACHE_DIR_PRUNE_EVERY = 1000
+# Seconds between two warnings about the same failing cache
+CACHE_WARNING_INTERVAL = 60
+# Tries for a strict write before it raises
+CACHE_STRICT_ATTEMPTS = int(os.getenv("CACHE_STRICT_ATTEMPTS", "3"))
+
+CACHE_LOOKUPS = registry.counter(
+    "tripshare_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+CACHE_ERRORS = registry.counter(
+    "tripshare_cache_errors_total",
+    "Failed cache backend calls by cache and operation.",
+    ("cache", "operation"),
+)
+
+# (key, value, ttl in seconds or None for no expiry)
+Entry = Tuple[str, Any, Optional[float]]
+
+
+class CacheBackendError(Exception):
+    """Raised when the cache server answers with an error."""
+
+
+# What a failing backend raises. Lost connections are OSErrors; asyncio
+# timeouts are too from Python 3.11, but not before, so they are listed.
+BACKEND_ERRORS = (OSError, EOFError, asyncio.TimeoutError, CacheBackendError)
+
+
+class CacheBackend:
+    """
+    Stores values under string keys. Values that are missing or expired
+    read as None.
+    """
+
+    name = ""
+
+    async def get_many(self, keys: Sequence[str]) -> List[Any]:
+        raise NotImplementedError
+
+    async def set_many(self, entries: Sequence[Entry]) -> None:
+        raise NotImplementedError
+
+    async def add_many(self, entries: Sequence[Entry]) -> List[Any]:
+        """Stores each entry unless its key is set; returns the values now stored."""
+        raise NotImplementedError
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        raise NotImplementedError
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """An in-process LRU holding the values themselves (no serialisation)."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 1024):
+        self.store = TTLCache(maxsize=maxsize)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Any]:
+        return [self.store.get(key) for key in keys]
+
+    async def set_many(self, entries: Sequence[Entry]) -> None:
+        for key, value, ttl in entries:
+            self.store.set(key, value, ttl=ttl)
+
+    async def add_many(self, entries: Sequence[Entry]) -> List[Any]:
+        stored = []
+        for key, value, ttl in entries:
+            current = self.store.get(key)
+            if current is None:
+                self.store.set(key, value, ttl=ttl)
+                current = value
+            stored.append(current)
+        return stored
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self.store.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "size": len(self.store), "maxsize": self.store.maxsize}
+
+
+# Pydantic models cached values may contain, by class name (see cache_type)
+_CACHE_TYPES: Dict[str, type] = {}
+# Tags for what JSON has no type for; a plain dict using one is wrapped
+_TAGS = ("__tuple__", "__datetime__", "__model__", "__dict__")
+
+
+def cache_type(cls: type) -> type:
+    """Lets values stored in a shared backend contain instances of `cls`."""
+    _CACHE_TYPES[cls.__name__] = cls
+    return cls
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        encoded = {key: _encode(item) for key, item in value.items()}
+        return {"__dict__": encoded} if any(tag in value for tag in _TAGS) else encoded
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if _CACHE_TYPES.get(type(value).__name__) is type(value):
+        return {"__model__": type(value).__name__, "fields": _encode(value.dict())}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"{type(value).__name__} can't be stored in a shared cache (see cache_type)")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__tuple__" in value:
+        return tuple(_decode(item) for item in value["__tuple__"])
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__model__" in value:
+        return _CACHE_TYPES[value["__model__"]](**_decode(value["fields"]))
+    if "__dict__" in value:
+        value = value["__dict__"]
+    return {key: _decode(item) for key, item in value.items()}
+
+
+def _dumps(value: Any) -> bytes:
+    # JSON rather than pickle: whoever can write to CACHE_DIR or the cache
+    # server must not be able to run code in the workers reading it
+    return json.dumps(_encode(value), separators=(",", ":")).encode()
+
+
+def _loads(data: Optional[bytes]) -> Any:
+    if data is None:
+        return None
+    try:
+        return _decode(json.loads(data))
+    except Exception:
+        # Written by an incompatible version of the app (or not by the app); a miss
+        return None
+
+
+class FileBackend(CacheBackend):
+    """
+    One JSON (expires_at, value) file per key in `directory`, named by
+    the key's hash. Files are written then renamed, so readers never see a
+    partial entry, and `add_many` links rather than renames so only the
+    first writer of a key wins.
+    """
+
+    name = "file"
+
+    def __init__(self, directory: str = CACHE_DIR, max_entries: int = CACHE_DIR_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def _read(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = _loads(f.read())
+        except FileNotFoundError:
+            return None
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return value
+
+    def _temp_file(self, value: Any, ttl: Optional[float]) -> str:
+        expires_at = time.time() + ttl if ttl is not None else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_dumps((expires_at, value)))
+        return tmp_path
+
+    def _written(self, count: int) -> None:
+        self._writes += count
+        if self._writes >= CACHE_DIR_PRUNE_EVERY:
+            self._writes = 0
+            self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+        if len(entries) <= self.max_entries:
+            return
+        # Down to 90%, so pruning doesn't run again after a few more writes
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries * 9 // 10]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _set_many(self, entries: Sequence[Entry]) -> None:
+        for key, value, ttl in entries:
+            os.replace(self._temp_file(value, ttl), self._path(key))
+        self._written(len(entries))
+
+    def _add_many(self, entries: Sequence[Entry]) -> List[Any]:
+        stored = []
+        for key, value, ttl in entries:
+            tmp_path = self._temp_file(value, ttl)
+            try:
+                os.link(tmp_path, self._path(key))
+                stored.append(value)
+                continue
+            except FileExistsError:
+                current = self._read(key)
+            finally:
+                os.remove(tmp_path)
+            if current is None:
+                # The existing file had expired
+                os.replace(self._temp_file(value, ttl), self._path(key))
+                current = self._read(key)
+            stored.append(current)
+        self._written(len(entries))
+        return stored
+
+    def _delete(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    async def get_many(self, keys: Sequence[str]) -> List[Any]:
+        return await run_in_threadpool(lambda: [self._read(key) for key in keys])
+
+    async def set_many(self, entries: Sequence[Entry]) -> None:
+        await run_in_threadpool(self._set_many, entries)
+
+    async def add_many(self, entries: Sequence[Entry]) -> List[Any]:
+        return await run_in_threadpool(self._add_many, entries)
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        await run_in_threadpool(self._delete, keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "directory": self.directory}
+
+
+def _encode_command(command: Sequence[Any]) -> bytes:
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    """One RESP reply; error replies are returned as CacheBackendError."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the cache server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return CacheBackendError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise CacheBackendError(f"Unexpected reply from the cache server: {line[:32]!r}")
+
+
+def _raise_errors(replies: List[Any]) -> List[Any]:
+    for reply in replies:
+        if isinstance(reply, CacheBackendError):
+            raise reply
+    return replies
+
+
+class RedisBackend(CacheBackend):
+    """
+    A minimal client for the Redis protocol (RESP2) over pooled asyncio
+    connections. Each call sends its commands as one pipeline, so a batch
+    lookup is one round trip. Supports redis:// and rediss:// URLs with a
+    password (AUTH) and database number (SELECT).
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = CACHE_REDIS_URL, pool_size: int = CACHE_REDIS_POOL_SIZE, timeout: float = CACHE_TIMEOUT):
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", "rediss"):
+            raise ValueError(f"CACHE_REDIS_URL must be a redis:// or rediss:// URL, got {url!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.ssl = parts.scheme == "rediss"
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _exchange(self, reader, writer, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        writer.write(b"".join(_encode_command(command) for command in commands))
+        await writer.drain()
+        try:
+            return [await _read_reply(reader) for _ in commands]
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Connection closed by the cache server")
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            try:
+                _raise_errors(await self._exchange(reader, writer, setup))
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    async def execute(self, *commands: Sequence[Any]) -> List[Any]:
+        """Sends `commands` in one pipeline; error replies come back as CacheBackendError."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections belong to the loop that opened them (tests may run
+            # each request on a new loop)
+            self._loop = loop
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+                replies = await asyncio.wait_for(self._exchange(*connection, commands), self.timeout)
+            except BaseException:
+                # Replies may still be in flight; the connection can't be reused
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.append(connection)
+            return replies
+
+    def _set_command(self, key: str, value: Any, ttl: Optional[float], *options: str) -> Tuple[Any, ...]:
+        command: Tuple[Any, ...] = ("SET", key, _dumps(value)) + options
+        if ttl is not None:
+            command += ("PX", max(1, int(ttl * 1000)))
+        return command
+
+    async def get_many(self, keys: Sequence[str]) -> List[Any]:
+        if not keys:
+            return []
+        values = _raise_errors(await self.execute(("MGET", *keys)))[0]
+        return [_loads(value) for value in values]
+
+    async def set_many(self, entries: Sequence[Entry]) -> None:
+        if entries:
+            _raise_errors(await self.execute(*(self._set_command(*entry) for entry in entries)))
+
+    async def add_many(self, entries: Sequence[Entry]) -> List[Any]:
+        if not entries:
+            return []
+        commands = []
+        for key, value, ttl in entries:
+            commands.append(self._set_command(key, value, ttl, "NX"))
+            commands.append(("GET", key))
+        replies = _raise_errors(await self.execute(*commands))
+        return [_loads(value) for value in replies[1::2]]
+
+    async def delete(self, keys: Sequence[str]) -> None:
+        if keys:
+            _raise_errors(await self.execute(("DEL", *keys)))
+
+    async def warm_up(self) -> None:
+        _raise_errors(await self.execute(("PING",)))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "server": f"{self.host}:{self.port}/{self.db}",
+            "idle_connections": len(self._idle),
+        }
+
+
+_shared_backend: Optional[CacheBackend] = None
+
+
+def make_backend(maxsize: int) -> CacheBackend:
+    """
+    The backend for a new cache: its own LRU of `maxsize` entries with the
+    memory backend, otherwise the process-wide file or Redis backend.
+    """
+    global _shared_backend
+    if CACHE_BACKEND == "memory":
+        return MemoryBackend(maxsize)
+    if _shared_backend is None:
+        if CACHE_BACKEND == "file":
+            _shared_backend = FileBackend()
+        elif CACHE_BACKEND == "redis":
+            _shared_backend = RedisBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r} (memory, file or redis)")
+    return _shared_backend
+
+
+async def warm_up_cache() -> None:
+    """Connects to the shared cache backend, if there is one."""
+    if _shared_backend is not None:
+        await _shared_backend.warm_up()
+
+
+async def close_cache() -> None:
+    if _shared_backend is not None:
+        await _shared_backend.close()
+
+
+class SharedCache:
+    """
+    A named cache over the configured backend. Keys are strings or tuples
+    (joined with "|"); None can't be cached, it reads as a miss.
+
+    `scope` maps a key to the scope it belongs to, e.g. the group id of a
+    (user_id, group_id) key; `invalidate(scope)` then drops all of them.
+    Hit/miss counters are this worker's.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        scope: Optional[Callable[[Hashable], str]] = None,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.scope = scope
+        self.backend = backend or make_backend(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._prefix = f"{CACHE_KEY_PREFIX}{name}:"
+        self._warned = 0.0
+
+    def _key(self, key: Hashable) -> str:
+        if isinstance(key, tuple):
+            key = "|".join(str(part) for part in key)
+        return f"{self._prefix}k:{key}"
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self._prefix}g:{scope}"
+
+    def _failed(self, operation: str, error: BaseException) -> None:
+        self.errors += 1
+        CACHE_ERRORS.inc(cache=self.name, operation=operation)
+        now = time.monotonic()
+        if now - self._warned >= CACHE_WARNING_INTERVAL:
+            self._warned = now
+            print(f"Cache {self.name}: {self.backend.name} {operation} failed: {error!r}")
+
+    async def get(self, key: Hashable, default: Any = None) -> Any:
+        return (await self.get_many([key])).get(key, default)
+
+    async def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """{key: value} for the keys that are cached, in one backend call."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        scopes = list(dict.fromkeys(self.scope(key) for key in keys)) if self.scope else []
+        lookup = [self._key(key) for key in keys] + [self._generation_key(scope) for scope in scopes]
+        try:
+            values = await self.backend.get_many(lookup)
+        except BACKEND_ERRORS as e:
+            self._failed("get", e)
+            values = [None] * len(lookup)
+        generations = dict(zip(scopes, values[len(keys):]))
+
+        found = {}
+        for key, entry in zip(keys, values):
+            if entry is None:
+                continue
+            generation, value = entry
+            # Written before its scope was last invalidated
+            if self.scope and (generation is None or generation != generations[self.scope(key)]):
+                continue
+            found[key] = value
+        hits = len(found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        if hits:
+            CACHE_LOOKUPS.inc(hits, cache=self.name, result="hit")
+        if hits < len(keys):
+            CACHE_LOOKUPS.inc(len(keys) - hits, cache=self.name, result="miss")
+        return found
+
+    async def _write(self, operation: str, call: Callable[[], Awaitable[None]], strict: bool) -> None:
+        """
+        Runs a backend write. A failure is counted and ignored, unless
+        `strict`: then the write is retried and a last failure raises
+        CacheBackendError.
+        """
+        attempts = CACHE_STRICT_ATTEMPTS if strict else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                await call()
+                return
+            except BACKEND_ERRORS as e:
+                self._failed(operation, e)
+                if attempt == attempts:
+                    if strict:
+                        raise CacheBackendError(f"Cache {self.name}: {operation} failed") from e
+                    return
+
+    async def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+        strict: bool = False,
+        fill: bool = False,
+    ) -> None:
+        await self.set_many({key: value}, ttl=ttl, expires_at=expires_at, strict=strict, fill=fill)
+
+    async def set_many(
+        self,
+        items: Dict[Hashable, Any],
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+        strict: bool = False,
+        fill: bool = False,
+    ) -> None:
+        """
+        Stores values. `expires_at` (epoch seconds) wins over `ttl`, which
+        wins over the cache-wide default TTL.
+
+        Pass `fill` when caching what a read just loaded: values are then
+        only added for keys that aren't stored, so a read that raced a
+        write-through can't put back the value the write replaced.
+        """
+        if not items:
+            return
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return
+        elif ttl is None:
+            ttl = self.ttl
+
+        async def store() -> None:
+            generations: Dict[str, Any] = {}
+            if self.scope:
+                scopes = list(dict.fromkeys(self.scope(key) for key in items))
+                # Starts a generation for scopes without one (never used or invalidated)
+                current = await self.backend.add_many([
+                    (self._generation_key(scope), secrets.token_hex(8), CACHE_GENERATION_TTL)
+                    for scope in scopes
+                ])
+                generations = dict(zip(scopes, current))
+            entries = [
+                (self._key(key), (generations.get(self.scope(key)) if self.scope else None, value), ttl)
+                for key, value in items.items()
+            ]
+            await (self.backend.add_many(entries) if fill else self.backend.set_many(entries))
+
+        await self._write("set", store, strict)
+
+    async def delete(self, *keys: Hashable, strict: bool = False) -> None:
+        await self._write("delete", lambda: self.backend.delete([self._key(key) for key in keys]), strict)
+
+    async def invalidate(self, *scopes: str, strict: bool = False) -> None:
+        """Drops every entry in the given scopes."""
+        await self._write(
+            "invalidate",
+            lambda: self.backend.delete([self._generation_key(str(scope)) for scope in scopes]),
+            strict,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "errors": self.errors,
+        }
@@ -0,0 +1,93 @@
+"""
+Bulk signed-URL generation with an expiry-aware cache.
+
+Signed URLs are cached per (storage_path, expiry bucket). A cached URL is
+handed out again while it still has at least the bucket's lifetime left, so
+repeat gallery views get the same URLs (which browsers can then cache) and
+only paths without a usable URL are signed, in one bulk Storage call.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from app.database.async_client import db
+from app.utils.shared_cache import SharedCache
+
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "photos")
+
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "50000"))
+# URLs are signed for bucket * factor seconds and reused while at least
+# `bucket` seconds remain.
+SIGNED_URL_LIFETIME_FACTOR = 2
+# Max paths per bulk signing request
+SIGNED_URL_BATCH_SIZE = 500
+
+# Requested lifetimes are rounded up to one of these (seconds)
+EXPIRY_BUCKETS = (60, 300, 900, 3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600)
+
+signed_url_cache = SharedCache("signed_urls", maxsize=SIGNED_URL_CACHE_SIZE)
+
+
+def expiry_bucket(expires_in: int) -> int:
+    for bucket in EXPIRY_BUCKETS:
+        if expires_in <= bucket:
+            return bucket
+    return expires_in
+
+
+def rendition_path(photo: Dict[str, Any], rendition: str) -> str:
+    """
+    Storage path of a photo's rendition, falling back to the original until
+    the rendition has been generated.
+    """
+    return (photo.get("renditions") or {}).get(rendition) or photo["storage_path"]
+
+
+async def sign_paths(paths: List[str], expires_in: int) -> Dict[str, Tuple[str, datetime]]:
+    """
+    Returns {storage_path: (signed_url, expires_at)} for every path that could
+    be signed. Each URL stays valid for at least `expires_in` seconds.
+    """
+    bucket = expiry_bucket(expires_in)
+    paths = list(dict.fromkeys(paths))
+    cached = await signed_url_cache.get_many((path, bucket) for path in paths)
+    signed: Dict[str, Tuple[str, datetime]] = {path: entry for (path, _), entry in cached.items()}
+    missing = [path for path in paths if path not in signed]
+
+    lifetime = bucket * SIGNED_URL_LIFETIME_FACTOR
+    storage_bucket = db.storage.from_(SUPABASE_BUCKET_NAME)
+    for start in range(0, len(missing), SIGNED_URL_BATCH_SIZE):
+        batch = missing[start:start + SIGNED_URL_BATCH_SIZE]
+        fresh = {}
+        signed_at = time.time()
+        expires_at = signed_at + lifetime
+        try:
+            results = await storage_bucket.create_signed_urls(batch, lifetime)
+        except Exception as e:
+            # One missing object can fail the whole bulk call; sign the
+            # batch one by one (concurrently) so the rest still get URLs.
+            print(f"Bulk signing failed, retrying individually: {e}")
+            results = await asyncio.gather(
+                *(_sign_one(storage_bucket, path, lifetime) for path in batch)
+            )
+        for path, item in zip(batch, results):
+            if item.get("error") or not item.get("signedURL"):
+                continue
+            # Trust the path echoed back by Storage over list order
+            path = item.get("path") or path
+            entry = (item["signedURL"], datetime.utcfromtimestamp(expires_at))
+            signed[path] = entry
+            fresh[(path, bucket)] = entry
+        # Stop handing the URLs out once less than `bucket` seconds remain
+        await signed_url_cache.set_many(fresh, expires_at=expires_at - bucket)
+
+    return signed
+
+
+async def _sign_one(storage_bucket, path: str, lifetime: int) -> dict:
+    try:
+        return await storage_bucket.create_signed_url(path=path, expires_in=lifetime)
+    except Exception as e:
+        return {"error": str(e)}
@@ -2,7 +2,16 @@ import os
 from datetime import datetime
 from uuid import UUID
 from io import BytesIO
-from PIL import Image
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
+
+# PIL is imported inside the functions that use it: the API process only
+# builds paths, the image work runs in the worker pool.
+
+# Rendition name -> longest edge in pixels. The original is kept as uploaded.
+RENDITION_SIZES = {"thumb": 300, "preview": 1600}
+RENDITION_DIRS = {"thumb": "thumbs", "preview": "previews"}
+RENDITION_FORMAT = os.getenv("RENDITION_FORMAT", "webp").lower()
 
 def build_storage_path(group_id: UUID, uploader_id: UUID, filename: str) -> str:
     """
@@ -13,11 +22,17 @@ def build_storage_path(group_id: UUID, uploader_id: UUID, filename: str) -> str:
     safe_filename = "".join([c for c in filename if c.isalnum() or c in "._-"])
     return f"photos/{group_id}/{uploader_id}/{timestamp}_{safe_filename}"
 
-def generate_thumbnail(file_bytes: bytes, max_size: tuple = (300, 300)) -> bytes:
+def generate_thumbnail(source: Union[bytes, str], max_size: tuple = (300, 300)) -> bytes:
     """
-    Generates a thumbnail from image bytes.
+    Generates a thumbnail from image bytes or the path of an image file.
     """
-    img = Image.open(BytesIO(file_bytes))
+    from PIL import Image
+
+    img = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    # JPEG draft mode decodes at a reduced scale (1/2 .. 1/8) that is still
+    # >= max_size, skipping most of the full-resolution decode work.
+    # No-op for other formats.
+    img.draft("RGB", max_size)
     img.thumbnail(max_size)
     
     thumb_io = BytesIO()
@@ -27,3 +42,46 @@ def generate_thumbnail(file_bytes: bytes, max_size: tuple = (300, 300)) -> bytes
     thumb_io.seek(0)
     
     return thumb_io.getvalue()
+
+@lru_cache(maxsize=None)
+def rendition_format() -> Tuple[str, str, str]:
+    """
+    Returns (PIL format, file extension, content type) for renditions.
+    Falls back to JPEG when WebP isn't requested or PIL lacks WebP support.
+    """
+    if RENDITION_FORMAT == "webp":
+        from PIL import features
+
+        if features.check("webp"):
+            return "WEBP", "webp", "image/webp"
+    return "JPEG", "jpg", "image/jpeg"
+
+def build_rendition_path(group_id: Union[UUID, str], storage_path: str, name: str, ext: str) -> str:
+    """
+    Constructs a rendition path: photos/<group_id>/<thumbs|previews>/<original stem>.<ext>
+    """
+    stem = os.path.splitext(os.path.basename(storage_path))[0]
+    return f"photos/{group_id}/{RENDITION_DIRS.get(name, name)}/{stem}.{ext}"
+
+def generate_renditions(source: Union[bytes, str], sizes: Optional[Dict[str, int]] = None) -> Dict[str, bytes]:
+    """
+    Generates every rendition in `sizes` from a single decode of the source.
+    Sizes are produced largest first, each one downscaled from the previous.
+    """
+    from PIL import Image, ImageOps
+
+    sizes = sizes or RENDITION_SIZES
+    image_format, _, _ = rendition_format()
+    largest = max(sizes.values())
+
+    img = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+    img.draft("RGB", (largest, largest))
+    img = ImageOps.exif_transpose(img).convert("RGB")
+
+    renditions = {}
+    for name, edge in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        img.thumbnail((edge, edge))
+        out = BytesIO()
+        img.save(out, format=image_format, quality=85 if image_format == "JPEG" else 80)
+        renditions[name] = out.getvalue()
+    return renditions
@@ -38,3 +38,15 @@ def is_group_expired(group: Union[Dict, object]) -> bool:
         expires_at = expires_at.replace(tzinfo=None)
         
     return now > expires_at
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(value: str) -> int:
+    """
+    Parses a duration like "3d", "1h", "30m" or "45s" (plain numbers are
+    seconds) into seconds.
+    """
+    value = value.strip().lower()
+    if value and value[-1] in DURATION_UNITS:
+        return int(value[:-1]) * DURATION_UNITS[value[-1]]
+    return int(value)
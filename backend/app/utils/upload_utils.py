@@ -0,0 +1,92 @@
+"""
+Streaming upload helpers.
+
+Starlette's form parser already spools each uploaded file (in memory up to
+1MB, then in a temporary file). Uploads are streamed to Storage straight
+from that spool in UPLOAD_CHUNK_SIZE reads, so there is one copy of the
+body and peak memory per upload is bounded by the chunk size rather than
+the file size.
+"""
+import io
+import os
+from typing import BinaryIO, Iterable, Tuple
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+from app.utils.validation import MAX_UPLOAD_SIZE_MB, validate_file_size
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+# Room for multipart boundaries and the other form fields on top of the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _SpoolReader(io.RawIOBase):
+    """Reads an already spooled upload in place. Closing it leaves the spool open."""
+
+    def __init__(self, source: BinaryIO):
+        self.source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.source.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_upload(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Tuple[io.BufferedReader, int]:
+    """
+    Returns (stream, size) for an uploaded file. The size comes from the
+    spool, so MAX_UPLOAD_SIZE_MB is enforced (413) before anything is sent
+    to Storage; the stream reads the spool from the start, `chunk_size`
+    bytes at a time.
+    """
+    source = file.file
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    validate_file_size(size)
+    source.seek(0)
+    return io.BufferedReader(_SpoolReader(source), chunk_size), size
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects upload requests whose body exceeds MAX_UPLOAD_SIZE_MB while it
+    is still being received, instead of after the whole body is parsed.
+    """
+
+    def __init__(self, app, paths: Iterable[str] = ("/photos/upload",)):
+        self.app = app
+        self.paths = set(paths)
+        self.max_body = MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large. Max size is {MAX_UPLOAD_SIZE_MB}MB"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # Surfaces through the form parser as a normal 413
+                    validate_file_size(received - MULTIPART_OVERHEAD_BYTES)
+            return message
+
+        await self.app(scope, limited_receive, send)
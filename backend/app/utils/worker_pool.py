@@ -0,0 +1,142 @@
+"""
+Worker pool for CPU-bound image work (thumbnails, QR codes).
+
+PIL decoding/encoding and QR rendering hold the CPU for tens to hundreds of
+milliseconds. Running them on the event loop thread would freeze every other
+request, so they are dispatched here instead.
+"""
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# "process" for real parallelism on CPU-bound work, "thread" where forking
+# worker processes isn't possible (e.g. constrained containers)
+IMAGE_POOL_KIND = os.getenv("IMAGE_POOL_KIND", "process").lower()
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Start the workers and import the imaging libraries in them at startup
+IMAGE_POOL_PRELOAD = os.getenv("IMAGE_POOL_PRELOAD", "true").lower() == "true"
+# Modules the workers need for thumbnails and QR codes
+IMAGE_POOL_PRELOAD_MODULES = ("PIL.Image", "PIL.ImageOps", "PIL.WebPImagePlugin", "qrcode", "qrcode.image.svg")
+
+
+def _timed_call(fn: Callable, *args: Any) -> tuple:
+    # Runs inside the worker: report when the task actually started so the
+    # caller can tell queue wait apart from execution time.
+    started_at = time.time()
+    result = fn(*args)
+    return result, started_at, time.time() - started_at
+
+
+def _import_modules(names: Sequence[str]) -> None:
+    for name in names:
+        importlib.import_module(name)
+
+
+class WorkerPool:
+    """
+    Lazily-started executor with queue-depth and task-time counters.
+    """
+
+    def __init__(self, kind: str = IMAGE_POOL_KIND, workers: int = IMAGE_POOL_WORKERS):
+        self.kind = kind
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.total_task_seconds = 0.0
+        self.max_task_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="image-pool"
+                )
+            else:
+                # spawn: don't fork a process that is running an event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Runs `fn(*args)` in the pool. With the process pool, `fn` and its
+        arguments must be picklable (module-level functions, bytes, paths).
+        """
+        loop = asyncio.get_running_loop()
+        submitted_at = time.time()
+        self.in_flight += 1
+        try:
+            for attempt in (1, 2):
+                executor = self.executor
+                try:
+                    result, started_at, duration = await loop.run_in_executor(
+                        executor, _timed_call, fn, *args
+                    )
+                    break
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM on a huge image), failing every
+                    # task on the pool. Start a fresh pool (once, for all of
+                    # them) and retry there; a task that breaks that one too fails.
+                    if self._executor is executor:
+                        executor.shutdown(wait=False)
+                        self._executor = None
+                    if attempt == 2:
+                        raise
+                    self.retried += 1
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.completed += 1
+        self.total_task_seconds += duration
+        self.max_task_seconds = max(self.max_task_seconds, duration)
+        self.total_wait_seconds += max(0.0, started_at - submitted_at)
+        return result
+
+    async def warm_up(self, modules: Sequence[str] = IMAGE_POOL_PRELOAD_MODULES) -> None:
+        """
+        Starts every worker and imports `modules` in it, so the first upload
+        or QR code doesn't wait for process start-up and library imports.
+        """
+        loop = asyncio.get_running_loop()
+        # One task per worker; concurrent submissions start all the processes
+        await asyncio.gather(*(
+            loop.run_in_executor(self.executor, _import_modules, tuple(modules))
+            for _ in range(self.workers)
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "avg_task_seconds": self.total_task_seconds / self.completed if self.completed else 0.0,
+            "max_task_seconds": self.max_task_seconds,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_pool = WorkerPool()
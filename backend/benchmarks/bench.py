@@ -0,0 +1,158 @@
+"""
+Benchmark suite: load tests for the hot endpoints and micro-benchmarks for
+the helpers they call, runnable offline against the local backend.
+
+    python benchmarks/bench.py                              # everything, defaults
+    python benchmarks/bench.py --only micro
+    python benchmarks/bench.py --only import                # app.main import-time budget
+    python benchmarks/bench.py -c 1,16,64 --latency-ms 20 --output results.json
+    python benchmarks/bench.py --baseline results.json      # exit 1 on regressions
+"""
+import argparse
+import asyncio
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test and micro-benchmark the TripShare API")
+    parser.add_argument("--only", choices=("load", "micro", "import"), help="Run only one part of the suite")
+    parser.add_argument("--scenarios", default="groups,list_photos,signed_urls,upload",
+                        help="Comma-separated load scenarios")
+    parser.add_argument("-c", "--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--photos-per-group", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=50, help="Photos per listing / signed-URL request")
+    parser.add_argument("--photo-size", default="4000x3000", help="Uploaded photo size, WIDTHxHEIGHT")
+    parser.add_argument("--latency-ms", type=float, help="Simulated backend round trip (LOCAL_BACKEND_LATENCY_MS)")
+    parser.add_argument("--jitter-ms", type=float, help="± spread on the simulated latency")
+    parser.add_argument("--micro-seconds", type=float, default=0.5, help="Time spent per micro-benchmark")
+    parser.add_argument("--import-runs", type=int, default=5, help="Fresh interpreters timed importing app.main")
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "650")),
+                        help="Fail if app.main's median import time exceeds this (IMPORT_BUDGET_MS)")
+    parser.add_argument("--no-renditions", action="store_true", help="Don't run the rendition worker during the load test")
+    parser.add_argument("--output", help="Write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", help="Compare against a saved results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Fractional slowdown that counts as a regression (default 0.2 = 20%%)")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    # Must happen before the app is imported: settings are read at import
+    os.environ.setdefault("DATABASE_BACKEND", "local")
+    os.environ.setdefault("LOCAL_DB_PATH", ":memory:")
+    os.environ.setdefault("LOCAL_BACKEND_DIR", tempfile.mkdtemp(prefix="tripshare-bench-"))
+    os.environ.setdefault("MAINTENANCE_SCHEDULER_ENABLED", "false")
+    os.environ.setdefault("MOCK_AUTH", "false")
+    if args.latency_ms is not None:
+        os.environ["LOCAL_BACKEND_LATENCY_MS"] = str(args.latency_ms)
+    if args.jitter_ms is not None:
+        os.environ["LOCAL_BACKEND_JITTER_MS"] = str(args.jitter_ms)
+    if args.no_renditions:
+        os.environ["RENDITION_WORKER_ENABLED"] = "false"
+
+
+def main() -> int:
+    args = parse_args()
+    configure_environment(args)
+
+    from benchmarks.micro import run_micro, sample_jpeg
+    from benchmarks.import_time import run_import
+    from benchmarks.report import (
+        compare, format_comparison, format_import, format_load, format_micro, load_results, peak_rss_mb,
+        save_results
+    )
+    from app.utils.storage_utils import generate_thumbnail
+
+    width, height = (int(v) for v in args.photo_size.lower().split("x"))
+    results = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "backend": os.environ["DATABASE_BACKEND"],
+            "latency_ms": float(os.getenv("LOCAL_BACKEND_LATENCY_MS", "0")),
+            "photo_size": args.photo_size,
+            "groups": args.groups,
+            "photos_per_group": args.photos_per_group,
+        },
+        "load": {},
+        "micro": {},
+        "import": {},
+    }
+
+    if args.only in (None, "import"):
+        print("Import time:")
+        results["import"] = run_import(runs=args.import_runs)
+
+    if args.only in (None, "micro"):
+        print("Micro-benchmarks:")
+        results["micro"] = run_micro((width, height), args.micro_seconds)
+
+    if args.only in (None, "load"):
+        from benchmarks.load import SCENARIOS, run_load
+
+        scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            print(f"Unknown scenarios: {', '.join(sorted(unknown))} (choose from {', '.join(SCENARIOS)})")
+            return 2
+        photo = sample_jpeg(width, height)
+        print("Load test:")
+        results["load"] = asyncio.run(run_load(
+            scenarios=scenarios,
+            concurrency_levels=[int(c) for c in args.concurrency.split(",")],
+            requests=args.requests,
+            users=args.users,
+            groups=args.groups,
+            photos_per_group=args.photos_per_group,
+            page_size=args.page_size,
+            photo=photo,
+            thumb=generate_thumbnail(photo),
+        ))
+
+    results["meta"]["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    print()
+    if results["import"]:
+        print(format_import(results["import"], args.import_budget_ms) + "\n")
+    if results["micro"]:
+        print(format_micro(results["micro"]) + "\n")
+    if results["load"]:
+        print(format_load(results["load"]) + "\n")
+    print(f"Peak RSS (process lifetime): {results['meta']['peak_rss_mb']} MB")
+
+    over_budget = [
+        module for module, m in results["import"].items()
+        if m["median_ms"] > args.import_budget_ms or m["lazy_modules_loaded"]
+    ]
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        rows, regressions = compare(results, load_results(args.baseline), args.threshold)
+        print()
+        print(format_comparison(rows, args.baseline))
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    if over_budget:
+        print(f"\nImport-time budget exceeded: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
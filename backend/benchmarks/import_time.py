@@ -0,0 +1,79 @@
+"""
+Import time of `app.main`, which every cold start (and every tool that
+imports the package) pays before serving anything.
+
+Each run is a fresh interpreter under `python -X importtime`, so nothing is
+cached in sys.modules; the median of several runs is checked against a
+budget. Libraries that are meant to load lazily (LAZY_MODULES) must not be
+imported at all.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use: the Supabase client libraries (and httpx) when the
+# first client is built, imaging in the image workers, the sync client by
+# scripts, dotenv only when there is a .env file
+LAZY_MODULES = ("httpx", "gotrue", "postgrest", "storage3", "supabase", "PIL", "qrcode", "dotenv")
+
+_REPORT_LAZY = (
+    "import sys; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def _run_once(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """Returns (total ms, self ms per top-level package, lazy modules loaded)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    # Measure what a deployment imports: the local stand-in builds its
+    # SQLite schema at import, the Supabase backend connects on first use
+    env["DATABASE_BACKEND"] = "supabase"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; {_REPORT_LAZY}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+    total_us = 0
+    per_package: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        per_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+    loaded = [m for m in completed.stdout.strip().split(",") if m]
+    return total_us / 1000, per_package, loaded
+
+
+def run_import(module: str = "app.main", runs: int = 5, top: int = 10) -> Dict[str, Any]:
+    totals = []
+    per_package: Dict[str, List[float]] = defaultdict(list)
+    loaded: List[str] = []
+    for _ in range(runs):
+        total, packages, loaded = _run_once(module)
+        totals.append(total)
+        for name, ms in packages.items():
+            per_package[name].append(ms)
+
+    heaviest = sorted(
+        ((name, statistics.median(values)) for name, values in per_package.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:top]
+    result = {
+        "runs": runs,
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "heaviest_packages_ms": {name: round(ms, 1) for name, ms in heaviest},
+        "lazy_modules_loaded": loaded,
+    }
+    print(f"  import {module}: median {result['median_ms']} ms over {runs} runs")
+    return {module: result}
@@ -0,0 +1,221 @@
+"""
+Concurrent load against the hot endpoints.
+
+The app runs in-process (httpx over ASGI) against whatever backend `db` is;
+`bench.py` selects the local stand-in, so results don't depend on a network
+or a Supabase project. Simulated backend latency comes from
+LOCAL_BACKEND_LATENCY_MS.
+"""
+import asyncio
+import itertools
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+from app.database.async_client import db
+from app.main import app
+from app.utils.group_utils import insert_group
+from app.utils.storage_utils import build_rendition_path, build_storage_path, rendition_format
+
+from benchmarks.report import current_rss_mb, latency_summary
+
+SUPABASE_BUCKET_NAME = os.getenv("SUPABASE_BUCKET_NAME", "photos")
+
+SCENARIOS = ("groups", "list_photos", "signed_urls", "upload")
+
+# (method, url, httpx request kwargs)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Dataset:
+    tokens: List[str] = field(default_factory=list)
+    group_ids: List[str] = field(default_factory=list)
+    photo_ids: Dict[str, List[str]] = field(default_factory=dict)
+
+
+async def seed(users: int, groups: int, photos_per_group: int, thumb: bytes) -> Dataset:
+    """
+    Creates `users` accounts that are all approved members of `groups`
+    groups with `photos_per_group` photos each (rows, stored objects and
+    thumbnail renditions).
+    """
+    data = Dataset()
+    user_ids = []
+    for i in range(users):
+        email = f"bench-{i}-{random.randrange(1 << 30)}@example.com"
+        response = await db.auth.sign_up({
+            "email": email,
+            "password": "benchmark-password",
+            "options": {"data": {"username": f"bench{i}"}}
+        })
+        user_ids.append(response.user.id)
+        data.tokens.append(response.session.access_token)
+        await db.table("users").insert({"id": response.user.id, "username": f"bench{i}", "email": email}).execute()
+
+    bucket = db.storage.from_(SUPABASE_BUCKET_NAME)
+    _, ext, _ = rendition_format()
+    now = datetime.utcnow()
+    for g in range(groups):
+        owner_id = user_ids[g % len(user_ids)]
+        group = await insert_group({
+            "owner_user_id": owner_id,
+            "title": f"Benchmark trip {g}",
+            "expires_at": (now + timedelta(days=30)).isoformat()
+        })
+        data.group_ids.append(group["id"])
+        await db.table("group_members").insert([
+            {"group_id": group["id"], "user_id": user_id, "approved": True}
+            for user_id in user_ids
+        ]).execute()
+
+        rows = []
+        for p in range(photos_per_group):
+            uploader_id = user_ids[p % len(user_ids)]
+            storage_path = build_storage_path(group["id"], uploader_id, f"IMG_{p:05d}.jpg")
+            thumb_path = build_rendition_path(group["id"], storage_path, "thumb", ext)
+            # Signing only needs the objects to exist; originals stay tiny
+            await bucket.upload(storage_path, b"original", {"content-type": "image/jpeg"})
+            await bucket.upload(thumb_path, thumb, {"content-type": "image/webp"})
+            rows.append({
+                "group_id": group["id"],
+                "uploader_id": uploader_id,
+                "storage_path": storage_path,
+                "filename": f"IMG_{p:05d}.jpg",
+                "mime_type": "image/jpeg",
+                "size": 2_000_000,
+                "uploaded_at": (now - timedelta(minutes=photos_per_group - p)).isoformat(),
+                "renditions": {"original": storage_path, "thumb": thumb_path}
+            })
+        response = await db.table("photos").insert(rows).execute()
+        data.photo_ids[group["id"]] = [row["id"] for row in response.data]
+    return data
+
+
+def request_factory(scenario: str, data: Dataset, photo: bytes, page_size: int) -> Callable[[], Request]:
+    upload_numbers = itertools.count()
+
+    def auth() -> Dict[str, str]:
+        return {"Authorization": f"Bearer {random.choice(data.tokens)}"}
+
+    def groups() -> Request:
+        return "GET", "/groups", {"headers": auth()}
+
+    def list_photos() -> Request:
+        group_id = random.choice(data.group_ids)
+        return "GET", f"/photos/groups/{group_id}", {"headers": auth(), "params": {"limit": page_size}}
+
+    def signed_urls() -> Request:
+        photo_ids = data.photo_ids[random.choice(data.group_ids)]
+        sample = random.sample(photo_ids, min(page_size, len(photo_ids)))
+        return "POST", "/photos/signed-urls", {
+            "headers": auth(),
+            "json": {"photo_ids": sample, "rendition": "thumb", "expires_in_seconds": 3600},
+        }
+
+    def upload() -> Request:
+        # Distinct names: storage paths only have one-second resolution
+        filename = f"IMG_upload_{next(upload_numbers)}.jpg"
+        return "POST", "/photos/upload", {
+            "headers": auth(),
+            "data": {"group_id": random.choice(data.group_ids)},
+            "files": {"file": (filename, photo, "image/jpeg")},
+        }
+
+    return {"groups": groups, "list_photos": list_photos, "signed_urls": signed_urls, "upload": upload}[scenario]
+
+
+async def _sample_rss(peak: List[float], interval: float = 0.05) -> None:
+    while True:
+        peak[0] = max(peak[0], current_rss_mb())
+        await asyncio.sleep(interval)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    make_request: Callable[[], Request],
+    total: int,
+    concurrency: int,
+    warmup: int = 5,
+) -> Dict[str, Any]:
+    """
+    Sends `total` requests from `concurrency` concurrent clients and
+    summarizes latency, throughput and memory: RSS when the scenario starts
+    and how far it rose above that while it ran (sampled, as the lifetime
+    peak can't be attributed to one scenario; None without /proc). Any
+    4xx/5xx counts as an error (its latency is still recorded).
+    """
+    for _ in range(warmup):
+        method, url, kwargs = make_request()
+        await client.request(method, url, **kwargs)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            method, url, kwargs = make_request()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    rss_start = current_rss_mb()
+    peak = [rss_start]
+    sampler = asyncio.create_task(_sample_rss(peak)) if rss_start is not None else None
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if sampler is not None:
+            sampler.cancel()
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    summary = latency_summary(latencies, elapsed, errors)
+    summary["concurrency"] = concurrency
+    summary["status_codes"] = {str(status): count for status, count in sorted(statuses.items())}
+    if rss_start is not None:
+        summary["rss_start_mb"] = round(rss_start, 1)
+        summary["rss_growth_mb"] = round(max(peak[0], current_rss_mb()) - rss_start, 1)
+    return summary
+
+
+async def run_load(
+    scenarios: List[str],
+    concurrency_levels: List[int],
+    requests: int,
+    users: int,
+    groups: int,
+    photos_per_group: int,
+    page_size: int,
+    photo: bytes,
+    thumb: bytes,
+) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    async with app.router.lifespan_context(app):
+        # Seeding isn't part of the measurement; skip the simulated latency
+        latency, jitter = getattr(db, "latency_ms", 0), getattr(db, "jitter_ms", 0)
+        if hasattr(db, "latency_ms"):
+            db.latency_ms = db.jitter_ms = 0
+        print(f"Seeding {users} users, {groups} groups x {photos_per_group} photos...")
+        data = await seed(users, groups, photos_per_group, thumb)
+        if hasattr(db, "latency_ms"):
+            db.latency_ms, db.jitter_ms = latency, jitter
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for scenario in scenarios:
+                make_request = request_factory(scenario, data, photo, page_size)
+                for concurrency in concurrency_levels:
+                    name = f"{scenario}@c{concurrency}"
+                    results[name] = await run_scenario(client, make_request, requests, concurrency)
+                    r = results[name]
+                    print(f"  {name}: p50 {r['p50_ms']} ms, p99 {r['p99_ms']} ms, {r['throughput_rps']} req/s, {r['errors']} errors")
+    return results
@@ -0,0 +1,67 @@
+"""
+Micro-benchmarks for the per-request helpers on the hot paths.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Tuple
+
+from PIL import Image
+
+from app.utils.storage_utils import build_storage_path, generate_thumbnail
+from app.utils.time_utils import is_group_expired
+
+from benchmarks.report import percentile
+
+
+def sample_jpeg(width: int, height: int, seed: int = 0) -> bytes:
+    """
+    A photo-like JPEG: a gradient with noise, so it compresses (and decodes)
+    roughly like a camera image rather than a flat colour.
+    """
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 48 + seed % 16)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def time_calls(func: Callable[[], Any], min_seconds: float = 0.5, max_calls: int = 100000) -> Dict[str, Any]:
+    """
+    Calls `func` repeatedly for about `min_seconds` (after one warm-up call)
+    and summarizes the per-call time.
+    """
+    func()
+    durations: List[float] = []
+    deadline = time.perf_counter() + min_seconds
+    while len(durations) < max_calls and (time.perf_counter() < deadline or len(durations) < 5):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+
+    durations.sort()
+    return {
+        "calls": len(durations),
+        "mean_us": round(sum(durations) / len(durations) * 1e6, 2),
+        "p50_us": round(percentile(durations, 50) * 1e6, 2),
+        "p95_us": round(percentile(durations, 95) * 1e6, 2),
+    }
+
+
+def run_micro(photo_size: Tuple[int, int], min_seconds: float = 0.5) -> Dict[str, Dict[str, Any]]:
+    photo = sample_jpeg(*photo_size)
+    group_id, uploader_id = uuid.uuid4(), uuid.uuid4()
+    future = (datetime.utcnow() + timedelta(days=3)).isoformat() + "+00:00"
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "generate_thumbnail": lambda: generate_thumbnail(photo),
+        "is_group_expired": lambda: is_group_expired({"expires_at": future}),
+        "build_storage_path": lambda: build_storage_path(group_id, uploader_id, "IMG_2041 (copy).JPG"),
+    }
+    results = {}
+    for name, func in cases.items():
+        results[name] = time_calls(func, min_seconds)
+        print(f"  {name}: {results[name]['mean_us']} us/call")
+    return results
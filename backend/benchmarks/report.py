@@ -0,0 +1,153 @@
+"""
+Summary statistics, result files and baseline comparison for the benchmarks.
+"""
+import json
+import os
+import resource
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Metrics where a bigger number is better; everything else is a cost
+HIGHER_IS_BETTER = {"throughput_rps"}
+# Metrics compared against the baseline (others, e.g. counts, are informational)
+COMPARED_METRICS = {"p50_ms", "p95_ms", "p99_ms", "throughput_rps", "mean_us", "p50_us", "p95_us", "median_ms"}
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5 - 1e-9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(latencies: List[float], elapsed: float, errors: int) -> Dict[str, Any]:
+    """Latencies in seconds -> p50/p95/p99 (ms) and throughput."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process, in MB, or None without /proc (e.g. macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process so far, in MB (ru_maxrss is KB on Linux, bytes
+    on macOS). It never goes down, so it can't be attributed to a scenario.
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if os.uname().sysname == "Darwin" else maxrss / 1024
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Compares every benchmark present in both runs. Returns (rows, regressions);
+    a regression is a metric more than `threshold` (a fraction) worse than
+    the baseline.
+    """
+    rows, regressions = [], []
+    for section in ("load", "micro", "import"):
+        for name, metrics in sorted(results.get(section, {}).items()):
+            base = baseline.get(section, {}).get(name)
+            if not base:
+                continue
+            for metric, value in sorted(metrics.items()):
+                old = base.get(metric)
+                if metric not in COMPARED_METRICS or not old or value is None:
+                    continue
+                change = (value - old) / old
+                worse = -change if metric in HIGHER_IS_BETTER else change
+                row = {
+                    "benchmark": f"{section}/{name}",
+                    "metric": metric,
+                    "baseline": old,
+                    "current": value,
+                    "change_pct": round(change * 100, 1),
+                    "regressed": worse > threshold,
+                }
+                rows.append(row)
+                if row["regressed"]:
+                    regressions.append(row)
+    return rows, regressions
+
+
+def format_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    cells = [[str(h) for h in headers]] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(row, widths)) for row in cells]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def format_load(load: Dict[str, Dict[str, Any]]) -> str:
+    headers = ("scenario", "requests", "errors", "p50 ms", "p95 ms", "p99 ms", "req/s", "RSS MB", "RSS growth MB")
+    return format_table(headers, [
+        (
+            name, m["requests"], m["errors"], m["p50_ms"], m["p95_ms"], m["p99_ms"], m["throughput_rps"],
+            _or_dash(m.get("rss_start_mb")), _or_dash(m.get("rss_growth_mb")),
+        )
+        for name, m in load.items()
+    ])
+
+
+def _or_dash(value: Any) -> Any:
+    return "-" if value is None else value
+
+
+def format_micro(micro: Dict[str, Dict[str, Any]]) -> str:
+    headers = ("function", "calls", "mean us", "p50 us", "p95 us")
+    return format_table(headers, [
+        (name, m["calls"], m["mean_us"], m["p50_us"], m["p95_us"])
+        for name, m in micro.items()
+    ])
+
+
+def format_import(imports: Dict[str, Dict[str, Any]], budget_ms: float) -> str:
+    lines = []
+    for module, m in imports.items():
+        verdict = "within" if m["median_ms"] <= budget_ms else "OVER"
+        lines.append(
+            f"import {module}: median {m['median_ms']} ms (min {m['min_ms']}, max {m['max_ms']}), "
+            f"{verdict} the {budget_ms:g} ms budget"
+        )
+        lines.append(format_table(("package", "self ms"), list(m["heaviest_packages_ms"].items())))
+        if m["lazy_modules_loaded"]:
+            lines.append(f"Imported eagerly but should be lazy: {', '.join(m['lazy_modules_loaded'])}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]], baseline_name: Optional[str] = None) -> str:
+    headers = ("benchmark", "metric", "baseline", "current", "change %", "")
+    table = format_table(headers, [
+        (r["benchmark"], r["metric"], r["baseline"], r["current"], f"{r['change_pct']:+}", "REGRESSION" if r["regressed"] else "")
+        for r in rows
+    ])
+    return f"Compared with {baseline_name}:\n{table}" if baseline_name else table
@@ -0,0 +1,92 @@
+"""
+Shared pytest fixtures.
+
+Unless the environment says otherwise, tests run against the offline
+stand-in for Supabase (DATABASE_BACKEND=local, see
+app/database/local_backend.py) in a fresh temporary directory, with mock
+auth for the phase tests. Tests that need several distinct users sign them
+up through /auth with real tokens (the `users` fixture).
+"""
+import io
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_BACKEND", "local")
+os.environ.setdefault("LOCAL_BACKEND_DIR", tempfile.mkdtemp(prefix="tripshare-test-"))
+os.environ.setdefault("MOCK_AUTH", "true")
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+@pytest.fixture(scope="session")
+def client():
+    """A client for the app with its lifespan (pools, rendition worker) running."""
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def users(client, monkeypatch):
+    """
+    Factory for signed-up users: `users("alice")` returns the Authorization
+    headers of a new account. Turns mock auth off for the test.
+    """
+    monkeypatch.setenv("MOCK_AUTH", "false")
+
+    def make_user(name: str) -> dict:
+        email = f"{name}-{uuid.uuid4().hex[:8]}@example.com"
+        response = client.post("/auth/signup", json={"email": email, "password": "secret123", "username": name})
+        assert response.status_code == 200, response.text
+        response = client.post("/auth/login", data={"username": email, "password": "secret123"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return make_user
+
+
+@pytest.fixture
+def make_group(client):
+    """Creates a group as `owner` and returns its JSON."""
+    def create(owner: dict, title: str = "Trip") -> dict:
+        response = client.post("/groups", json={"title": title}, headers=owner)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def add_member(client):
+    """Joins `member` to `group` and, unless approve=False, has `owner` approve it."""
+    def join(group: dict, owner: dict, member: dict, approve: bool = True) -> str:
+        response = client.post("/groups/join", json={"code": group["code"]}, headers=member)
+        assert response.status_code == 200, response.text
+        members = client.get(f"/groups/{group['id']}/members", headers=owner).json()
+        member_id = next(m["id"] for m in members if not m["approved"])
+        if approve:
+            response = client.post(
+                f"/groups/{group['id']}/approve", json={"member_id": member_id, "approve": True}, headers=owner
+            )
+            assert response.status_code == 200, response.text
+        return member_id
+
+    return join
+
+
+def jpeg_bytes(width: int = 800, height: int = 600) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def stored_file(storage_path: str, bucket: str = "photos"):
+    """Where the stand-in keeps an uploaded object."""
+    from app.database.local_backend import LOCAL_STORAGE_DIR
+
+    return Path(LOCAL_STORAGE_DIR, bucket, *storage_path.split("/"))
@@ -1,3 +1,6 @@
+import argparse
+import asyncio
+import json
 import os
 import sys
 from datetime import datetime
@@ -5,61 +8,25 @@ from datetime import datetime
 # Add backend directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database.supabase_client import supabase
+from app.database.async_client import db
+from app.utils.cleanup import cleanup_expired_groups as run_cleanup
 
-def cleanup_expired_groups():
+async def cleanup_expired_groups(dry_run: bool = False):
     print(f"Starting cleanup at {datetime.now()}")
     try:
-        # Find expired groups
-        now = datetime.utcnow().isoformat()
-        response = supabase.table("groups").select("id").lt("expires_at", now).execute()
-        
-        expired_groups = response.data
-        print(f"Found {len(expired_groups)} expired groups")
-        
-        for group in expired_groups:
-            group_id = group["id"]
-            print(f"Deleting group {group_id}")
-            
-            # Delete photos from storage bucket
-            try:
-                # Get all photos for this group
-                photos_response = supabase.table("photos").select("storage_path").eq("group_id", group_id).execute()
-                if photos_response.data:
-                    paths = [p["storage_path"] for p in photos_response.data]
-                    # Also try to delete thumbs
-                    thumb_paths = [f"photos/{group_id}/thumbs/{os.path.basename(p)}" for p in paths]
-                    
-                    all_paths = paths + thumb_paths
-                    
-                    # Batch delete (Supabase limits might apply, but for now simple list)
-                    supabase.storage.from_("photos").remove(all_paths)
-                    print(f"Deleted {len(paths)} photos for group {group_id}")
-            except Exception as e:
-                print(f"Error deleting photos for group {group_id}: {e}")
-
-            # Delete photos from DB explicitly (in case cascade is missing)
-            supabase.table("photos").delete().eq("group_id", group_id).execute()
-            
-            # Delete members
-            supabase.table("group_members").delete().eq("group_id", group_id).execute()
-            
-            # Delete warnings (ignore if table missing)
-            try:
-                supabase.table("group_warnings").delete().eq("group_id", group_id).execute()
-            except Exception:
-                pass
-
-            # Delete group
-            supabase.table("groups").delete().eq("id", group_id).execute()
-            
-            print(f"Cleanup finished for group {group_id}")
-            
+        stats = await run_cleanup(dry_run=dry_run)
+        print(stats.summary())
+        print(json.dumps(stats.as_dict()))
         print("Cleanup completed")
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        await db.aclose()
 
 if __name__ == "__main__":
-    cleanup_expired_groups()
+    parser = argparse.ArgumentParser(description="Permanently delete expired groups")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    args = parser.parse_args()
+    asyncio.run(cleanup_expired_groups(dry_run=args.dry_run))
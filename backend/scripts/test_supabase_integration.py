@@ -147,7 +147,7 @@ def run_test():
         with httpx.Client() as client:
             resp = client.get(f"{BASE_URL}/photos/groups/{group_id}")
             if resp.status_code == 200:
-                photos = resp.json()
+                photos = resp.json()["photos"]
                 found = any(p['id'] == photo_id for p in photos)
                 if found:
                     report['list_photos_endpoint'] = 'OK'
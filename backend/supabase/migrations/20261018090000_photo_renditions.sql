@@ -0,0 +1,51 @@
+-- Rendition paths per photo, e.g. {"original": "...", "preview": "...", "thumb": "..."}
+alter table photos add column if not exists renditions jsonb not null default '{}'::jsonb;
+
+-- Durable queue of rendition jobs, processed by the API's background worker
+create table if not exists rendition_jobs (
+  id uuid default uuid_generate_v4() primary key,
+  photo_id uuid references photos(id) on delete cascade not null,
+  status text not null default 'pending' check (status in ('pending', 'running', 'done', 'failed')),
+  attempts int not null default 0,
+  last_error text,
+  run_after timestamp with time zone default timezone('utc'::text, now()) not null,
+  locked_until timestamp with time zone,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+-- Index for the claim query (due pending jobs, stale running jobs)
+create index if not exists idx_rendition_jobs_status_run_after on rendition_jobs(status, run_after);
+
+-- Atomically claims up to p_limit due jobs for one worker.
+-- Jobs left 'running' past their lease (worker crashed) are picked up again,
+-- unless that was their p_max_attempts-th attempt: those fail instead, so a
+-- photo that kills its worker isn't retried forever.
+-- skip locked lets several API replicas poll the queue concurrently.
+drop function if exists claim_rendition_jobs(int, int);
+create or replace function claim_rendition_jobs(p_limit int, p_lease_seconds int, p_max_attempts int)
+returns setof rendition_jobs
+language sql
+as $$
+  update rendition_jobs
+  set status = 'failed',
+      last_error = 'Worker lease expired on the last attempt',
+      locked_until = null,
+      updated_at = now()
+  where status = 'running' and locked_until < now() and attempts >= p_max_attempts;
+
+  update rendition_jobs
+  set status = 'running',
+      attempts = attempts + 1,
+      locked_until = now() + make_interval(secs => p_lease_seconds),
+      updated_at = now()
+  where id in (
+    select id from rendition_jobs
+    where (status = 'pending' and run_after <= now())
+       or (status = 'running' and locked_until < now() and attempts < p_max_attempts)
+    order by run_after
+    limit p_limit
+    for update skip locked
+  )
+  returning *;
+$$;
@@ -0,0 +1,32 @@
+-- Supports keyset pagination of a group's photos ordered by (uploaded_at, id)
+create index if not exists idx_photos_group_uploaded_at_id on photos(group_id, uploaded_at, id);
+
+-- One page of a group's photos after the (p_after_uploaded_at, p_after_id) cursor.
+-- The row comparison lets Postgres seek straight into the index above instead
+-- of scanning every earlier photo. Only the columns the listing needs are returned.
+create or replace function list_group_photos_page(
+  p_group_id uuid,
+  p_limit int,
+  p_after_uploaded_at timestamp with time zone default null,
+  p_after_id uuid default null
+)
+returns table (
+  id uuid,
+  filename text,
+  mime_type text,
+  size bigint,
+  uploaded_at timestamp with time zone
+)
+language sql
+stable
+as $$
+  select p.id::uuid, p.filename::text, p.mime_type::text, p.size::bigint, p.uploaded_at::timestamptz
+  from photos p
+  where p.group_id = p_group_id
+    and (
+      p_after_uploaded_at is null
+      or (p.uploaded_at, p.id) > (p_after_uploaded_at, p_after_id)
+    )
+  order by p.uploaded_at, p.id
+  limit p_limit;
+$$;
@@ -0,0 +1,45 @@
+-- Change counter per group, used as the ETag source for group, member and
+-- photo listings. Any write to the group, its members or its photos bumps it.
+alter table groups add column if not exists version bigint not null default 0;
+
+create or replace function bump_group_version_self()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new is distinct from old then
+    new.version := old.version + 1;
+  end if;
+  return new;
+end;
+$$;
+
+create or replace function bump_group_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    update groups set version = version + 1 where id = old.group_id;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') and (tg_op = 'INSERT' or new.group_id is distinct from old.group_id) then
+    update groups set version = version + 1 where id = new.group_id;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists groups_bump_version on groups;
+create trigger groups_bump_version
+  before update on groups
+  for each row execute function bump_group_version_self();
+
+drop trigger if exists group_members_bump_version on group_members;
+create trigger group_members_bump_version
+  after insert or update or delete on group_members
+  for each row execute function bump_group_version();
+
+drop trigger if exists photos_bump_version on photos;
+create trigger photos_bump_version
+  after insert or update or delete on photos
+  for each row execute function bump_group_version();
@@ -0,0 +1,60 @@
+-- Photo pages also return storage paths and renditions, so callers can sign
+-- thumbnail URLs without a second lookup. The return type changes, so the
+-- function has to be dropped first.
+drop function if exists list_group_photos_page(uuid, int, timestamp with time zone, uuid);
+
+create function list_group_photos_page(
+  p_group_id uuid,
+  p_limit int,
+  p_after_uploaded_at timestamp with time zone default null,
+  p_after_id uuid default null
+)
+returns table (
+  id uuid,
+  filename text,
+  mime_type text,
+  size bigint,
+  uploaded_at timestamp with time zone,
+  storage_path text,
+  renditions jsonb
+)
+language sql
+stable
+as $$
+  select p.id::uuid, p.filename::text, p.mime_type::text, p.size::bigint, p.uploaded_at::timestamptz,
+         p.storage_path::text, p.renditions
+  from photos p
+  where p.group_id = p_group_id
+    and (
+      p_after_uploaded_at is null
+      or (p.uploaded_at, p.id) > (p_after_uploaded_at, p_after_id)
+    )
+  order by p.uploaded_at, p.id
+  limit p_limit;
+$$;
+
+-- Photo count and latest photo (the cover) for each of the given groups, in
+-- one call. Both use idx_photos_group_uploaded_at_id.
+create or replace function group_photo_summaries(p_group_ids uuid[])
+returns table (
+  group_id uuid,
+  photo_count bigint,
+  cover_photo_id uuid,
+  cover_storage_path text,
+  cover_renditions jsonb
+)
+language sql
+stable
+as $$
+  select g.gid,
+         (select count(*) from photos p where p.group_id = g.gid),
+         c.id, c.storage_path::text, c.renditions
+  from unnest(p_group_ids) as g(gid)
+  left join lateral (
+    select p.id, p.storage_path, p.renditions
+    from photos p
+    where p.group_id = g.gid
+    order by p.uploaded_at desc, p.id desc
+    limit 1
+  ) c on true;
+$$;
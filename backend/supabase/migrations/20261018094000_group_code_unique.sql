@@ -0,0 +1,3 @@
+-- Group codes are allocated by inserting a random code and retrying on a
+-- unique violation, so the database must reject duplicate codes.
+create unique index if not exists groups_code_key on groups(code);
@@ -0,0 +1,29 @@
+-- Owner-scoped writes: each authorizes (owner_user_id = p_owner_id) and
+-- mutates in one statement, returning the affected rows. No rows back means
+-- the group/member doesn't exist or the caller isn't the owner.
+
+-- Extends a group by p_days from max(now, expires_at)
+create or replace function extend_owned_group(p_group_id uuid, p_owner_id uuid, p_days int)
+returns table (id uuid, expires_at timestamp with time zone)
+language sql
+as $$
+  update groups g
+  set expires_at = greatest(now(), coalesce(g.expires_at, now())) + make_interval(days => p_days)
+  where g.id = p_group_id and g.owner_user_id = p_owner_id
+  returning g.id, g.expires_at;
+$$;
+
+-- Approves (or un-approves) a member of a group owned by p_owner_id
+create or replace function set_member_approval(p_group_id uuid, p_member_id uuid, p_owner_id uuid, p_approved boolean)
+returns setof group_members
+language sql
+as $$
+  update group_members m
+  set approved = p_approved
+  from groups g
+  where m.id = p_member_id
+    and m.group_id = p_group_id
+    and g.id = m.group_id
+    and g.owner_user_id = p_owner_id
+  returning m.*;
+$$;
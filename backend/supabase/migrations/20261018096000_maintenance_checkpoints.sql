@@ -0,0 +1,6 @@
+-- Progress of resumable maintenance jobs (e.g. expired-group cleanup)
+create table if not exists maintenance_checkpoints (
+  job text primary key,
+  state jsonb not null default '{}'::jsonb,
+  updated_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
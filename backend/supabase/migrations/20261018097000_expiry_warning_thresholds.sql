@@ -0,0 +1,48 @@
+-- Warnings are recorded per threshold (e.g. 3 days, 1 day, 1 hour before
+-- expiry) so each one is sent once per group.
+alter table group_warnings add column if not exists threshold_seconds int;
+update group_warnings set threshold_seconds = days_left * 86400 where threshold_seconds is null;
+alter table group_warnings alter column threshold_seconds set not null;
+
+-- One warning per (group, threshold); bulk inserts skip existing ones
+create unique index if not exists idx_group_warnings_group_threshold on group_warnings(group_id, threshold_seconds);
+
+-- Range scans on expiry (warning window, expired-group cleanup)
+create index if not exists idx_groups_expires_at on groups(expires_at);
+
+-- Groups that are due a warning and haven't had it yet, in one anti-join.
+-- A group inside several windows is only due the tightest threshold it is
+-- within (1 hour beats 1 day beats 3 days). Keyset-paged on group id.
+create or replace function pending_expiry_warnings(
+  p_thresholds int[],
+  p_limit int,
+  p_after_id uuid default null
+)
+returns table (
+  group_id uuid,
+  title text,
+  owner_user_id uuid,
+  expires_at timestamp with time zone,
+  threshold_seconds int
+)
+language sql
+stable
+as $$
+  select g.id, g.title::text, g.owner_user_id, g.expires_at, t.threshold_seconds
+  from groups g
+  cross join lateral (
+    select min(s)::int as threshold_seconds
+    from unnest(p_thresholds) as s
+    where g.expires_at <= now() + make_interval(secs => s)
+  ) t
+  where g.expires_at > now()
+    and g.expires_at <= now() + make_interval(secs => (select max(s) from unnest(p_thresholds) as s))
+    and t.threshold_seconds is not null
+    and (p_after_id is null or g.id > p_after_id)
+    and not exists (
+      select 1 from group_warnings w
+      where w.group_id = g.id and w.threshold_seconds = t.threshold_seconds
+    )
+  order by g.id
+  limit p_limit;
+$$;
@@ -0,0 +1,32 @@
+-- Leases for scheduled maintenance jobs run inside the API: only the replica
+-- holding a job's lease runs it. The row also keeps the last run's stats.
+create table if not exists maintenance_leases (
+  job text primary key,
+  holder text,
+  locked_until timestamp with time zone,
+  last_started_at timestamp with time zone,
+  last_finished_at timestamp with time zone,
+  last_duration_seconds double precision,
+  last_result jsonb,
+  last_error text
+);
+
+-- Takes (or renews) the lease on p_job for p_holder. Returns false while
+-- another holder's lease is still valid.
+create or replace function acquire_maintenance_lease(p_job text, p_holder text, p_lease_seconds int)
+returns boolean
+language sql
+as $$
+  with claimed as (
+    insert into maintenance_leases as l (job, holder, locked_until)
+    values (p_job, p_holder, now() + make_interval(secs => p_lease_seconds))
+    on conflict (job) do update
+      set holder = excluded.holder,
+          locked_until = excluded.locked_until
+      where l.holder = excluded.holder
+         or l.locked_until is null
+         or l.locked_until < now()
+    returning 1
+  )
+  select exists (select 1 from claimed);
+$$;
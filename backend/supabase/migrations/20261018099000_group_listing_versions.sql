@@ -0,0 +1,90 @@
+-- Member and photo listings get their own change counters. Bumping
+-- groups.version from every group_members and photos write (rendition
+-- bookkeeping included) made those writes queue on the parent groups row.
+-- groups.version now only follows the groups row itself; the listing
+-- counters live in group_listing_versions and only move on writes that
+-- change what the listing shows.
+create table if not exists group_listing_versions (
+  group_id uuid references groups(id) on delete cascade primary key,
+  members bigint not null default 0,
+  photos bigint not null default 0
+);
+
+insert into group_listing_versions (group_id, members, photos)
+select id, version, version from groups
+on conflict (group_id) do nothing;
+
+create or replace function create_group_listing_versions()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into group_listing_versions (group_id) values (new.id);
+  return null;
+end;
+$$;
+
+create or replace function bump_members_listing_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    update group_listing_versions set members = members + 1 where group_id = old.group_id;
+  end if;
+  if tg_op = 'INSERT' or (tg_op = 'UPDATE' and new.group_id is distinct from old.group_id) then
+    update group_listing_versions set members = members + 1 where group_id = new.group_id;
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function bump_photos_listing_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    update group_listing_versions set photos = photos + 1 where group_id = old.group_id;
+  end if;
+  if tg_op = 'INSERT' or (tg_op = 'UPDATE' and new.group_id is distinct from old.group_id) then
+    update group_listing_versions set photos = photos + 1 where group_id = new.group_id;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists group_members_bump_version on group_members;
+drop trigger if exists photos_bump_version on photos;
+drop function if exists bump_group_version();
+
+drop trigger if exists groups_create_listing_versions on groups;
+create trigger groups_create_listing_versions
+  after insert on groups
+  for each row execute function create_group_listing_versions();
+
+drop trigger if exists group_members_bump_listing_version on group_members;
+create trigger group_members_bump_listing_version
+  after insert or delete on group_members
+  for each row execute function bump_members_listing_version();
+
+drop trigger if exists group_members_bump_listing_version_update on group_members;
+create trigger group_members_bump_listing_version_update
+  after update on group_members
+  for each row
+  when ((old.group_id, old.user_id, old.approved) is distinct from (new.group_id, new.user_id, new.approved))
+  execute function bump_members_listing_version();
+
+drop trigger if exists photos_bump_listing_version on photos;
+create trigger photos_bump_listing_version
+  after insert or delete on photos
+  for each row execute function bump_photos_listing_version();
+
+-- Rendition updates don't change the listing
+drop trigger if exists photos_bump_listing_version_update on photos;
+create trigger photos_bump_listing_version_update
+  after update on photos
+  for each row
+  when ((old.group_id, old.filename, old.mime_type, old.size, old.uploaded_at)
+        is distinct from (new.group_id, new.filename, new.mime_type, new.size, new.uploaded_at))
+  execute function bump_photos_listing_version();
@@ -0,0 +1,95 @@
+"""
+Local token verification (AUTH_VERIFY_MODE=local): tokens the local backend
+signs are checked in-process, bad ones get 401, and tokens that can't be
+checked locally go to the Auth server.
+"""
+import time
+import uuid
+
+import jwt
+import pytest
+
+import app.routes.auth as auth_route
+import app.utils.jwt_utils as jwt_utils
+from app.database.local_backend import LOCAL_JWT_SECRET
+
+
+@pytest.fixture
+def local_verify(client, monkeypatch):
+    """Verifies locally with the local backend's secret; counts remote lookups."""
+    monkeypatch.setenv("MOCK_AUTH", "false")
+    monkeypatch.setattr(auth_route, "AUTH_VERIFY_MODE", "local")
+    monkeypatch.setattr(jwt_utils, "JWT_SECRET", LOCAL_JWT_SECRET)
+    remote_calls = []
+    get_remote_user = auth_route._get_remote_user
+
+    async def counted(token):
+        remote_calls.append(token)
+        return await get_remote_user(token)
+
+    monkeypatch.setattr(auth_route, "_get_remote_user", counted)
+    return remote_calls
+
+
+def make_token(secret=LOCAL_JWT_SECRET, algorithm="HS256", **overrides):
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "email": f"user-{uuid.uuid4().hex[:8]}@example.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "user_metadata": {"username": "local"},
+    }
+    claims.update(overrides)
+    claims = {key: value for key, value in claims.items() if value is not None}
+    return jwt.encode(claims, secret, algorithm=algorithm)
+
+
+def me(client, token):
+    return client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_valid_token_is_verified_locally(client, local_verify):
+    token = make_token(email="local@example.com")
+    response = me(client, token)
+    assert response.status_code == 200, response.text
+    assert response.json()["email"] == "local@example.com"
+    assert response.json()["username"] == "local"
+    assert local_verify == []
+
+
+@pytest.mark.parametrize("token", [
+    make_token(secret="not-the-secret"),
+    make_token(exp=int(time.time()) - 60),
+    make_token(aud="someone-else"),
+    make_token(email=""),
+    make_token(email=None),
+], ids=["bad-signature", "expired", "wrong-audience", "empty-email", "no-email"])
+def test_invalid_tokens_get_401(client, local_verify, token):
+    assert me(client, token).status_code == 401
+    assert local_verify == []
+
+
+def test_unsigned_token_is_not_trusted(client, local_verify):
+    token = jwt.encode({"sub": str(uuid.uuid4()), "email": "a@example.com", "exp": int(time.time()) + 60}, None, algorithm="none")
+    assert me(client, token).status_code == 401
+    # Not checked locally; the Auth server rejects it
+    assert local_verify == [token]
+
+
+def test_without_a_secret_tokens_are_checked_remotely(client, users, local_verify, monkeypatch):
+    monkeypatch.setattr(jwt_utils, "JWT_SECRET", "")
+    headers = users("remote")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert len(local_verify) == 1
+
+
+def test_verified_tokens_are_served_from_the_cache(client, local_verify, monkeypatch):
+    token = make_token()
+    assert me(client, token).status_code == 200
+
+    async def fail(token):
+        raise AssertionError("token verified again")
+
+    monkeypatch.setattr(auth_route, "verify_access_token", fail)
+    assert me(client, token).status_code == 200
+    assert local_verify == []
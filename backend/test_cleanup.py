@@ -0,0 +1,70 @@
+"""
+Expired-group cleanup: storage objects and rows of expired groups go, a
+photo page at a time; live groups are left alone.
+"""
+from datetime import datetime, timedelta
+
+import app.utils.cleanup as cleanup
+from app.database.supabase_client import supabase
+from conftest import jpeg_bytes, stored_file
+
+
+def upload_photos(client, group, headers, count):
+    paths = []
+    for n in range(count):
+        response = client.post(
+            "/photos/upload",
+            data={"group_id": group["id"]},
+            files={"file": (f"photo-{n}.jpg", jpeg_bytes(64, 48), "image/jpeg")},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        paths.append(response.json()["storage_path"])
+    return paths
+
+
+def expire(group):
+    past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    supabase.table("groups").update({"expires_at": past}).eq("id", group["id"]).execute()
+
+
+def rows(table, column, value):
+    return supabase.table(table).select("*").eq(column, value).execute().data
+
+
+def test_cleanup_removes_expired_groups_page_by_page(client, users, make_group, monkeypatch):
+    monkeypatch.setattr(cleanup, "CLEANUP_PHOTO_PAGE_SIZE", 2)
+    owner = users("owner")
+    expired, live = make_group(owner, "Expired"), make_group(owner, "Live")
+    expired_paths = upload_photos(client, expired, owner, 5)
+    live_paths = upload_photos(client, live, owner, 1)
+    expire(expired)
+
+    stats = client.portal.call(cleanup.cleanup_expired_groups)
+
+    assert stats.groups_deleted >= 1 and stats.groups_failed == 0
+    assert stats.photos_deleted >= 5
+    # Five photos in pages of two: at least one remove call per page
+    assert stats.remove_calls >= 3
+    assert not [path for path in expired_paths if stored_file(path).exists()]
+    assert rows("groups", "id", expired["id"]) == []
+    assert rows("photos", "group_id", expired["id"]) == []
+    assert rows("group_members", "group_id", expired["id"]) == []
+
+    assert all(stored_file(path).exists() for path in live_paths)
+    assert len(rows("photos", "group_id", live["id"])) == 1
+    assert client.get(f"/groups/{expired['id']}", headers=owner).status_code == 404
+
+
+def test_cleanup_dry_run_deletes_nothing(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    paths = upload_photos(client, group, owner, 2)
+    expire(group)
+
+    stats = client.portal.call(lambda: cleanup.cleanup_expired_groups(dry_run=True))
+
+    assert stats.groups_deleted >= 1 and stats.photos_deleted >= 2
+    assert all(stored_file(path).exists() for path in paths)
+    assert len(rows("photos", "group_id", group["id"])) == 2
+    client.portal.call(cleanup.cleanup_expired_groups)
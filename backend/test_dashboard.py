@@ -0,0 +1,47 @@
+"""
+Dashboard: groups with photo summaries, and the selected group's first photo
+page with signed thumbnails, only where the user may see them.
+"""
+from conftest import jpeg_bytes
+
+
+def upload(client, group, headers, filename):
+    response = client.post(
+        "/photos/upload",
+        data={"group_id": group["id"]},
+        files={"file": (filename, jpeg_bytes(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_dashboard_combines_groups_photos_and_urls(client, users, make_group):
+    owner = users("owner")
+    busy, empty = make_group(owner, "Busy"), make_group(owner, "Empty")
+    photos = [upload(client, busy, owner, f"photo-{n}.jpg")["id"] for n in range(3)]
+
+    response = client.get("/dashboard", params={"group_id": busy["id"], "limit": 2}, headers=owner)
+    assert response.status_code == 200, response.text
+    dashboard = response.json()
+
+    groups = {g["id"]: g for g in dashboard["groups"]}
+    assert groups[busy["id"]]["photo_count"] == 3 and groups[busy["id"]]["cover_photo_id"] in photos
+    assert groups[busy["id"]]["cover_thumb_url"]
+    assert groups[empty["id"]]["photo_count"] in (None, 0) and groups[empty["id"]]["cover_thumb_url"] is None
+
+    page = dashboard["photos"]
+    assert len(page["photos"]) == 2 and page["next_cursor"]
+    assert {url["photo_id"] for url in dashboard["signed_urls"]} == {p["id"] for p in page["photos"]}
+
+
+def test_dashboard_hides_photos_of_pending_groups(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    upload(client, group, owner, "photo.jpg")
+    add_member(group, owner, member, approve=False)
+
+    dashboard = client.get("/dashboard", params={"group_id": group["id"]}, headers=member).json()
+    assert [(g["id"], g["approved"]) for g in dashboard["groups"]] == [(group["id"], False)]
+    assert dashboard["groups"][0]["cover_thumb_url"] is None
+    assert dashboard["photos"] is None and dashboard["signed_urls"] == []
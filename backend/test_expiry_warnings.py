@@ -0,0 +1,39 @@
+"""
+Expiry warnings: each group is warned once per threshold, for the tightest
+threshold it has reached.
+"""
+from datetime import datetime, timedelta
+
+from app.database.supabase_client import supabase
+from app.utils.expiry_warnings import send_expiry_warnings
+
+DAY = 86400
+
+
+def expire_in(group, delta):
+    supabase.table("groups").update({"expires_at": (datetime.utcnow() + delta).isoformat()}).eq("id", group["id"]).execute()
+
+
+def warnings_for(group):
+    rows = supabase.table("group_warnings").select("threshold_seconds").eq("group_id", group["id"]).execute().data
+    return sorted(row["threshold_seconds"] for row in rows)
+
+
+def test_each_threshold_is_warned_once(client, users, make_group):
+    owner = users("owner")
+    soon, later = make_group(owner, "Soon"), make_group(owner, "Later")
+    expire_in(soon, timedelta(days=2))
+    expire_in(later, timedelta(days=10))
+    run = lambda: client.portal.call(lambda: send_expiry_warnings([3 * DAY, DAY, 3600], page_size=1))
+
+    assert run()["total"] >= 1
+    assert warnings_for(soon) == [3 * DAY]
+    assert warnings_for(later) == []
+
+    run()
+    assert warnings_for(soon) == [3 * DAY]
+
+    expire_in(soon, timedelta(hours=12))
+    counts = run()
+    assert counts[str(DAY)] >= 1
+    assert warnings_for(soon) == [DAY, 3 * DAY]
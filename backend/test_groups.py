@@ -0,0 +1,181 @@
+"""
+Group routes: conditional GETs answer 304 only while nothing changed, QR
+codes come as PNG or SVG, join-code collisions are retried with a new code,
+owner-only writes are refused for everyone else, and cached group rows
+follow extend and delete.
+"""
+from app.database.supabase_client import supabase
+from conftest import jpeg_bytes
+
+
+def revalidate(client, path, headers, etag):
+    return client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+def test_group_details_etag_follows_group_writes(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    path = f"/groups/{group['id']}"
+
+    first = client.get(path, headers=owner)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert revalidate(client, path, owner, etag).status_code == 304
+
+    # Members aren't part of the details
+    add_member(group, owner, member)
+    assert revalidate(client, path, owner, etag).status_code == 304
+
+    assert client.post(f"{path}/extend", json={"extend_days": 1}, headers=owner).status_code == 200
+    changed = revalidate(client, path, owner, etag)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert revalidate(client, path, owner, changed.headers["etag"]).status_code == 304
+
+
+def test_member_listing_etag_follows_approvals(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    path = f"/groups/{group['id']}/members"
+    member_id = add_member(group, owner, member, approve=False)
+
+    etag = client.get(path, headers=owner).headers["etag"]
+    assert revalidate(client, path, owner, etag).status_code == 304
+
+    client.post(f"/groups/{group['id']}/approve", json={"member_id": member_id, "approve": True}, headers=owner)
+    changed = revalidate(client, path, owner, etag)
+    assert changed.status_code == 200
+    assert all(m["approved"] for m in changed.json())
+
+
+def test_photo_listing_etag_follows_uploads(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    path = f"/photos/groups/{group['id']}"
+
+    first = client.get(path, headers=owner)
+    assert first.status_code == 200 and first.json()["photos"] == []
+    etag = first.headers["etag"]
+    assert revalidate(client, path, owner, etag).status_code == 304
+
+    response = client.post(
+        "/photos/upload",
+        data={"group_id": group["id"]},
+        files={"file": ("photo.jpg", jpeg_bytes(), "image/jpeg")},
+        headers=owner,
+    )
+    assert response.status_code == 200, response.text
+    changed = revalidate(client, path, owner, etag)
+    assert changed.status_code == 200
+    assert len(changed.json()["photos"]) == 1
+
+    # Rendition bookkeeping doesn't change the listing, nor its tag
+    etag = changed.headers["etag"]
+    photo_id = changed.json()["photos"][0]["id"]
+    supabase.table("photos").update({"renditions": {"thumb": "elsewhere.jpg"}}).eq("id", photo_id).execute()
+    assert revalidate(client, path, owner, etag).status_code == 304
+
+
+def test_group_list_etag_follows_membership(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+
+    first = client.get("/groups", headers=member)
+    assert first.status_code == 200 and first.json() == []
+    add_member(group, owner, member)
+    changed = client.get("/groups", headers=member)
+    assert [g["id"] for g in changed.json()] == [group["id"]]
+    assert revalidate(client, "/groups", member, changed.headers["etag"]).status_code == 304
+
+
+def test_group_code_collision_is_retried(client, users, make_group, monkeypatch):
+    import app.utils.group_utils as group_utils
+
+    owner = users("owner")
+    taken = make_group(owner)["code"]
+    codes = iter([taken, taken, "FRESH1"])
+    monkeypatch.setattr(group_utils, "generate_group_code", lambda: next(codes))
+
+    group = make_group(owner)
+    assert group["code"] == "FRESH1"
+    assert client.get(f"/groups/{group['id']}", headers=owner).json()["code"] == "FRESH1"
+
+
+def test_group_code_gives_up_after_max_attempts(client, users, make_group, monkeypatch):
+    import app.utils.group_utils as group_utils
+
+    owner = users("owner")
+    taken = make_group(owner)["code"]
+    monkeypatch.setattr(group_utils, "generate_group_code", lambda: taken)
+
+    response = client.post("/groups", json={"title": "Trip"}, headers=owner)
+    assert response.status_code == 500
+    assert "unique group code" in response.json()["detail"]
+
+
+def test_owner_only_mutations_reject_other_users(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    member_id = add_member(group, owner, member, approve=False)
+    path = f"/groups/{group['id']}"
+    expires_at = client.get(path, headers=owner).json()["expires_at"]
+
+    response = client.post(f"{path}/approve", json={"member_id": member_id, "approve": True}, headers=member)
+    assert response.status_code == 403
+    assert client.post(f"{path}/extend", json={"extend_days": 3}, headers=member).status_code == 403
+    assert client.delete(path, headers=member).status_code == 403
+
+    # Nothing was applied
+    members = client.get(f"{path}/members", headers=owner).json()
+    assert [m["approved"] for m in members if m["id"] == member_id] == [False]
+    assert client.get(path, headers=owner).json()["expires_at"] == expires_at
+
+
+def test_owner_only_mutations_on_missing_group_or_member(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = client.post(f"/groups/{group['id']}/approve", json={"member_id": missing, "approve": True}, headers=owner)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Member not found"
+    assert client.post(f"/groups/{missing}/extend", json={"extend_days": 3}, headers=owner).status_code == 404
+    assert client.delete(f"/groups/{missing}", headers=owner).status_code == 404
+
+
+def test_group_cache_follows_extend_and_delete(client, users, make_group):
+    owner, other = users("owner"), users("other")
+    group = make_group(owner)
+    path = f"/groups/{group['id']}"
+
+    # Cache the row by id and by code
+    before = client.get(path, headers=owner).json()["expires_at"]
+    assert client.get(f"{path}/qr", headers=owner).status_code == 200
+
+    response = client.post(f"{path}/extend", json={"extend_days": 3}, headers=owner)
+    assert response.status_code == 200
+    after = client.get(path, headers=owner).json()["expires_at"]
+    assert after != before
+    assert after[:19] == response.json()["new_expires_at"][:19]
+
+    assert client.delete(path, headers=owner).status_code == 200
+    assert client.get(path, headers=owner).status_code == 404
+    assert client.get(f"{path}/qr", headers=owner).status_code == 404
+    assert client.post("/groups/join", json={"code": group["code"]}, headers=other).status_code == 404
+
+
+def test_qr_code_is_negotiated_and_revalidated(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    path = f"/groups/{group['id']}/qr"
+
+    png = client.get(path, headers=owner)
+    assert png.status_code == 200
+    assert png.headers["content-type"] == "image/png" and png.content.startswith(b"\x89PNG")
+    assert revalidate(client, path, owner, png.headers["etag"]).status_code == 304
+
+    svg = client.get(path, headers={**owner, "Accept": "image/svg+xml"})
+    assert svg.headers["content-type"].startswith("image/svg+xml")
+    assert svg.headers["etag"] != png.headers["etag"]
+    assert client.get(path, params={"format": "svg"}, headers=owner).content == svg.content
+    assert client.get(path, params={"size": 10}, headers=owner).status_code == 422
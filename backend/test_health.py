@@ -0,0 +1,33 @@
+"""
+Health checks: readiness reflects warm-up, backend probes and shutdown.
+"""
+import app.utils.readiness as readiness_module
+from app.utils.readiness import readiness
+
+
+def test_ready_after_warm_up_with_passing_probes(client, monkeypatch):
+    monkeypatch.setattr(readiness, "ttl", 0)
+    response = client.get("/health/ready")
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["warmed_up"] and report["probes"]
+    assert all(probe["ok"] for probe in report["probes"].values())
+    assert client.get("/health/live").json() == {"status": "alive"}
+
+
+def test_not_ready_when_a_probe_fails_or_shutting_down(client, monkeypatch):
+    async def failing_probe(service):
+        if service == "storage":
+            raise OSError("storage unreachable")
+
+    monkeypatch.setattr(readiness, "ttl", 0)
+    monkeypatch.setattr(readiness_module.db, "probe", failing_probe)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    probes = response.json()["probes"]
+    assert probes["storage"] == {"ok": False, "latency_ms": None, "error": "storage unreachable"}
+    assert probes["database"]["ok"]
+
+    monkeypatch.undo()
+    monkeypatch.setattr(readiness, "shutting_down", True)
+    assert client.get("/health/ready").status_code == 503
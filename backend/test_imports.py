@@ -0,0 +1,10 @@
+"""
+Importing app.main (every cold start pays it) leaves the Supabase client
+libraries, imaging and dotenv unloaded until first use.
+"""
+from benchmarks.import_time import LAZY_MODULES, _run_once
+
+
+def test_app_main_does_not_import_lazy_modules():
+    _, _, loaded = _run_once("app.main")
+    assert loaded == [], f"imported at startup: {loaded} (lazy: {LAZY_MODULES})"
@@ -0,0 +1,37 @@
+"""
+Loop stall detector: a request that blocks the event loop is recorded with
+its route and the app function that blocked.
+"""
+import time
+
+import app.routes.groups as groups_route
+from app.utils.loop_monitor import LoopMonitor
+
+
+def test_blocking_call_is_recorded_with_route_and_site(client, users, make_group, monkeypatch):
+    owner = users("owner")
+    group = make_group(owner)
+    make_etag = groups_route.make_etag
+
+    def slow_make_etag(*parts):
+        time.sleep(0.3)  # synchronous, on the loop thread
+        return make_etag(*parts)
+
+    monkeypatch.setattr(groups_route, "make_etag", slow_make_etag)
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    client.portal.call(monitor.start)
+    try:
+        assert client.get(f"/groups/{group['id']}", headers=owner).status_code == 200
+        # The stall is recorded by the first heartbeat after it
+        deadline = time.monotonic() + 2
+        while not monitor.stalls and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        client.portal.call(monitor.stop)
+
+    stall = monitor.stats()["recent"][0]
+    assert stall["method"] == "GET"
+    assert stall["route"] == "/groups/{group_id}"
+    assert stall["site"] == "app.routes.groups.get_group_details"
+    assert stall["duration_ms"] >= 200
+    assert any("slow_make_etag" in line for line in stall["stack"])
@@ -0,0 +1,25 @@
+"""
+Maintenance status endpoints are for operators holding MAINTENANCE_TOKEN.
+"""
+import pytest
+
+import app.routes.maintenance as maintenance
+
+PATHS = ["/maintenance/jobs", "/maintenance/caches", "/maintenance/loop-stalls"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_status_endpoints_need_the_maintenance_token(client, users, monkeypatch, path):
+    monkeypatch.setattr(maintenance, "MAINTENANCE_TOKEN", "operator-secret")
+    user = users("user")
+
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers=user).status_code == 403
+    assert client.get(path, headers={"X-Maintenance-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Maintenance-Token": "operator-secret"}).status_code == 200
+
+
+def test_status_endpoints_are_off_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(maintenance, "MAINTENANCE_TOKEN", "")
+    for path in PATHS:
+        assert client.get(path, headers={"X-Maintenance-Token": ""}).status_code == 403
@@ -0,0 +1,89 @@
+"""
+Membership cache: approve, revoke, leave and delete must take effect on the
+next request, not when the cached approval expires, and must fail rather
+than report success when the cache can't be updated.
+"""
+
+
+def photos_status(client, group, headers):
+    return client.get(f"/photos/groups/{group['id']}", headers=headers).status_code
+
+
+def test_approval_and_revocation_apply_immediately(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    member_id = add_member(group, owner, member, approve=False)
+
+    # Pending: the "not approved" answer is now cached
+    assert photos_status(client, group, member) == 403
+
+    client.post(f"/groups/{group['id']}/approve", json={"member_id": member_id, "approve": True}, headers=owner)
+    assert photos_status(client, group, member) == 200
+
+    client.post(f"/groups/{group['id']}/approve", json={"member_id": member_id, "approve": False}, headers=owner)
+    assert photos_status(client, group, member) == 403
+
+
+def test_leave_revokes_access(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    add_member(group, owner, member)
+    assert photos_status(client, group, member) == 200
+
+    assert client.post(f"/groups/{group['id']}/leave", headers=member).status_code == 200
+    assert photos_status(client, group, member) == 403
+
+
+def test_delete_group_drops_cached_memberships(client, users, make_group, add_member):
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    add_member(group, owner, member)
+    assert photos_status(client, group, member) == 200
+
+    assert client.delete(f"/groups/{group['id']}", headers=owner).status_code == 200
+    assert photos_status(client, group, member) in (403, 404)
+    assert photos_status(client, group, owner) in (403, 404)
+
+
+
+def test_revocations_fail_when_the_cache_cannot_be_updated(client, users, make_group, add_member, monkeypatch):
+    from app.utils.group_utils import membership_cache
+    from test_shared_cache import FailingBackend
+
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    member_id = add_member(group, owner, member)
+
+    monkeypatch.setattr(membership_cache, "backend", FailingBackend(OSError("cache down")))
+    path = f"/groups/{group['id']}"
+    response = client.post(f"{path}/approve", json={"member_id": member_id, "approve": False}, headers=owner)
+    assert response.status_code == 500
+    assert client.post(f"{path}/leave", headers=member).status_code == 500
+    assert client.delete(path, headers=owner).status_code == 500
+
+
+def test_a_read_racing_a_revocation_does_not_restore_the_approval(client, users, make_group, add_member, monkeypatch):
+    from app.utils.group_utils import is_approved_member, membership_cache
+
+    owner, member = users("owner"), users("member")
+    group = make_group(owner)
+    member_id = add_member(group, owner, member)
+    members = client.get(f"/groups/{group['id']}/members", headers=owner).json()
+    user_id = next(m["user_id"] for m in members if m["id"] == member_id)
+    key = (user_id, group["id"])
+    client.portal.call(membership_cache.delete, key)
+
+    # The revocation lands after the read queried the database but before
+    # it cached what it saw
+    set_many = membership_cache.set_many
+
+    async def revoke_then_fill(items, **kwargs):
+        await set_many({key: False}, strict=True)
+        await set_many(items, **kwargs)
+
+    monkeypatch.setattr(membership_cache, "set_many", revoke_then_fill)
+    assert client.portal.call(is_approved_member, user_id, group["id"]) is True
+    monkeypatch.setattr(membership_cache, "set_many", set_many)
+
+    assert client.portal.call(membership_cache.get, key) is False
+    assert photos_status(client, group, member) == 403
@@ -0,0 +1,16 @@
+"""
+/metrics labels requests and Supabase calls by route template.
+"""
+import app.routes.metrics as metrics_route
+
+
+def test_metrics_label_routes_and_backend_calls(client, users, make_group, monkeypatch):
+    monkeypatch.setattr(metrics_route, "METRICS_TOKEN", "scrape-secret")
+    owner = users("owner")
+    group = make_group(owner)
+    assert client.get(f"/groups/{group['id']}/members", headers=owner).status_code == 200
+
+    assert client.get("/metrics").status_code == 401
+    text = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).text
+    assert 'tripshare_http_request_duration_seconds_count{method="GET",route="/groups/{group_id}/members",status="200"}' in text
+    assert 'target="group_members"' in text and 'route="/groups/{group_id}/members"' in text
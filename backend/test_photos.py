@@ -0,0 +1,140 @@
+"""
+Photo listings page through every photo exactly once; signed URLs only go
+to members; deletion removes the original and every rendition from Storage
+and leaves no rendition work behind for the deleted photo; rendition jobs
+whose worker died are retried, but only up to the attempt limit.
+"""
+import time
+
+from app.database.supabase_client import supabase
+from app.utils.cleanup import photo_object_paths
+from app.utils.rendition_queue import render_photo
+from conftest import jpeg_bytes, stored_file
+
+
+def upload(client, group, headers, filename="photo.jpg"):
+    response = client.post(
+        "/photos/upload",
+        data={"group_id": group["id"]},
+        files={"file": (filename, jpeg_bytes(), "image/jpeg")},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def photo_row(photo_id):
+    rows = supabase.table("photos").select("*").eq("id", photo_id).execute().data
+    return rows[0] if rows else None
+
+
+def wait_for_renditions(photo_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        row = photo_row(photo_id)
+        if len(row["renditions"] or {}) > 1:
+            return row
+        time.sleep(0.05)
+    raise AssertionError("renditions were not generated")
+
+
+def test_delete_removes_original_and_renditions(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    photo = wait_for_renditions(upload(client, group, owner)["id"])
+    paths = [path for path in photo_object_paths(photo) if stored_file(path).exists()]
+    assert len(paths) >= 3
+
+    assert client.delete(f"/photos/{photo['id']}", headers=owner).status_code == 200
+    assert not [path for path in paths if stored_file(path).exists()]
+    assert photo_row(photo["id"]) is None
+    assert supabase.table("rendition_jobs").select("id").eq("photo_id", photo["id"]).execute().data == []
+
+
+def test_delete_cancels_pending_rendition_job(client, users, make_group, monkeypatch):
+    from app.utils.rendition_queue import rendition_worker
+
+    owner = users("owner")
+    group = make_group(owner)
+    # Keep the job queued rather than letting the worker take it
+    monkeypatch.setattr(rendition_worker, "wake", lambda: None)
+    photo = upload(client, group, owner)
+    assert supabase.table("rendition_jobs").select("id").eq("photo_id", photo["id"]).execute().data
+
+    assert client.delete(f"/photos/{photo['id']}", headers=owner).status_code == 200
+    assert supabase.table("rendition_jobs").select("id").eq("photo_id", photo["id"]).execute().data == []
+
+
+def test_rendering_a_deleted_photo_leaves_no_renditions(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    photo = wait_for_renditions(upload(client, group, owner)["id"])
+    for path in photo_object_paths(photo)[1:]:
+        stored_file(path).unlink(missing_ok=True)
+
+    # The row goes while the worker is rendering from the downloaded original
+    supabase.table("photos").delete().eq("id", photo["id"]).execute()
+    renditions = client.portal.call(render_photo, photo)
+    assert not [path for name, path in renditions.items() if name != "original" and stored_file(path).exists()]
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(client, users, make_group, monkeypatch):
+    from app.utils.rendition_queue import RENDITION_MAX_ATTEMPTS, rendition_worker
+
+    owner = users("owner")
+    group = make_group(owner)
+    monkeypatch.setattr(rendition_worker, "wake", lambda: None)
+    jobs = []
+    for n, attempts in enumerate((RENDITION_MAX_ATTEMPTS, 1)):
+        photo = upload(client, group, owner, f"crash-{n}.jpg")
+        # Claimed, then the worker died mid-render
+        jobs.append(supabase.table("rendition_jobs").update({
+            "status": "running", "attempts": attempts, "locked_until": "2000-01-01T00:00:00+00:00"
+        }).eq("photo_id", photo["id"]).execute().data[0])
+    last, retried = jobs
+
+    claimed = {job["id"]: job for job in client.portal.call(rendition_worker.claim)}
+    assert last["id"] not in claimed
+    assert claimed[retried["id"]]["attempts"] == 2
+    row = supabase.table("rendition_jobs").select("*").eq("id", last["id"]).execute().data[0]
+    assert row["status"] == "failed" and row["attempts"] == RENDITION_MAX_ATTEMPTS
+
+
+def test_cursor_pages_through_every_photo_once(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    uploaded = [upload(client, group, owner, f"photo-{n}.jpg")["id"] for n in range(5)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, "cursor": cursor} if cursor else {"limit": 2}
+        response = client.get(f"/photos/groups/{group['id']}", params=params, headers=owner)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["photos"]) <= 2
+        seen.extend(photo["id"] for photo in page["photos"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(uploaded)
+    response = client.get(f"/photos/groups/{group['id']}", params={"cursor": "not-a-cursor"}, headers=owner)
+    assert response.status_code == 400
+
+
+def test_signed_urls_follow_membership_and_are_reused(client, users, make_group, add_member):
+    owner, member, outsider = users("owner"), users("member"), users("outsider")
+    group = make_group(owner)
+    add_member(group, owner, member)
+    photo = wait_for_renditions(upload(client, group, owner)["id"])
+    body = {"photo_ids": [photo["id"]], "rendition": "thumb"}
+
+    first = client.post("/photos/signed-urls", json=body, headers=member).json()
+    assert [url["photo_id"] for url in first] == [photo["id"]]
+    assert photo["renditions"]["thumb"] in first[0]["signed_url"]
+    # Served from the signed URL cache while it has time left
+    assert client.post("/photos/signed-urls", json=body, headers=member).json() == first
+
+    assert client.post("/photos/signed-urls", json=body, headers=outsider).json() == []
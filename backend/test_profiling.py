@@ -0,0 +1,37 @@
+"""
+Profile ids are generated by the server, so requests can't choose (or
+overwrite) each other's profiles.
+"""
+import app.utils.profiling as profiling
+
+TOKEN = {"X-Profile-Token": "profile-secret"}
+
+
+def profiled_get(client, path, request_id=None):
+    headers = dict(TOKEN, **({"X-Request-ID": request_id} if request_id else {}))
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return response.headers["x-profile-id"]
+
+
+def test_profile_ids_are_unique_per_request(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "profile-secret")
+
+    first = profiled_get(client, "/health/live", "req-1")
+    second = profiled_get(client, "/health/live", "req-1")
+    assert first != second
+    assert first.startswith("req-1-") and second.startswith("req-1-")
+
+    for profile_id in (first, second):
+        profile = client.get(f"/maintenance/profiles/{profile_id}", headers=TOKEN).json()
+        assert profile["id"] == profile_id
+        assert profile["request_id"] == "req-1"
+
+
+def test_unusable_request_ids_are_not_used(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "profile-secret")
+
+    profile_id = profiled_get(client, "/health/live", "../../etc/passwd")
+    assert "/" not in profile_id and len(profile_id) == 32
+    assert client.get(f"/maintenance/profiles/{profile_id}", headers=TOKEN).json()["request_id"] is None
+    assert len(profiled_get(client, "/health/live")) == 32
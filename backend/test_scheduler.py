@@ -0,0 +1,84 @@
+"""
+Maintenance leases: one holder per job, and a run that loses its lease is
+cancelled instead of carrying on next to the new holder.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from app.database.async_client import db
+from app.utils.scheduler import Scheduler, ScheduledJob
+
+
+def job_named(func=None, lease_seconds=60):
+    async def noop():
+        return {"done": True}
+
+    return ScheduledJob(f"test-{uuid.uuid4().hex[:8]}", func or noop, interval=3600, lease_seconds=lease_seconds)
+
+
+def test_lease_has_one_holder(client):
+    first, second = Scheduler(), Scheduler()
+    job = job_named()
+
+    assert client.portal.call(first.acquire, job)
+    assert client.portal.call(first.acquire, job)
+    assert not client.portal.call(second.acquire, job)
+
+    job.last_started_at = datetime.utcnow()
+    client.portal.call(first.release, job)
+    assert client.portal.call(second.acquire, job)
+
+
+def test_run_is_skipped_while_another_replica_holds_the_lease(client):
+    first, second = Scheduler(), Scheduler()
+    calls = []
+
+    async def work():
+        calls.append(1)
+
+    job = job_named(work)
+    assert client.portal.call(first.acquire, job)
+    assert client.portal.call(second.run_once, job) is False
+    assert job.skipped == 1 and calls == []
+
+
+def test_run_is_cancelled_when_the_lease_is_lost(client):
+    scheduler = Scheduler()
+    finished = []
+
+    async def work():
+        # Another replica takes over the lease mid-run
+        until = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+        await db.table("maintenance_leases").update({"holder": "elsewhere", "locked_until": until}).eq("job", job.name).execute()
+        await asyncio.sleep(10)
+        finished.append(1)
+
+    job = job_named(work, lease_seconds=1)
+    assert client.portal.call(scheduler.run_once, job) is True
+    assert finished == []
+    assert job.last_error == "lost lease"
+    assert job.failures == 1 and job.runs == 0
+    assert job.last_duration_seconds < 5
+
+
+def test_run_is_cancelled_when_renewals_fail_past_the_lease(client, monkeypatch):
+    scheduler = Scheduler()
+    acquire = scheduler.acquire
+    attempts = []
+
+    async def flaky_acquire(job):
+        attempts.append(1)
+        if len(attempts) == 1:
+            return await acquire(job)
+        raise OSError("database unreachable")
+
+    async def work():
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(scheduler, "acquire", flaky_acquire)
+    job = job_named(work, lease_seconds=1)
+    assert client.portal.call(scheduler.run_once, job) is True
+    assert job.last_error == "lost lease"
+    # Failed renewals are tolerated until the lease would have run out
+    assert len(attempts) >= 3
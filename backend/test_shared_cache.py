@@ -0,0 +1,224 @@
+"""
+Shared cache backends: two workers (separate SharedCache and backend
+objects over one store) see each other's writes and invalidations, and a
+failing or slow backend reads as a miss instead of failing the request.
+"""
+import asyncio
+import os
+import pickle
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.auth import UserResponse
+from app.utils.cache_server import serve
+from app.utils.shared_cache import (
+    CACHE_STRICT_ATTEMPTS, CacheBackend, CacheBackendError, FileBackend, MemoryBackend, RedisBackend, SharedCache,
+)
+
+
+@asynccontextmanager
+async def backends(kind, tmp_path):
+    """Yields a factory of backends that share one store."""
+    if kind == "memory":
+        memory = MemoryBackend(100)
+        yield lambda: memory
+    elif kind == "file":
+        yield lambda: FileBackend(str(tmp_path))
+    else:
+        server = await serve("127.0.0.1", 0, "secret")
+        port = server.sockets[0].getsockname()[1]
+        opened = []
+
+        def connect():
+            opened.append(RedisBackend(f"redis://:secret@127.0.0.1:{port}/1", timeout=1))
+            return opened[-1]
+
+        try:
+            yield connect
+        finally:
+            for backend in opened:
+                await backend.close()
+            server.close()
+            await server.wait_closed()
+
+
+def run(kind, tmp_path, scenario):
+    async def main():
+        async with backends(kind, tmp_path) as make:
+            await scenario(make)
+
+    asyncio.run(main())
+
+
+BACKENDS = ["memory", "file", "redis"]
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_values_are_shared_and_expire(kind, tmp_path):
+    async def scenario(make):
+        first, second = SharedCache("plain", ttl=60, backend=make()), SharedCache("plain", ttl=60, backend=make())
+        await first.set("k", {"x": 1})
+        await first.set_many({("a", 1): "tuple key", "gone": 1})
+        assert await second.get_many(["k", ("a", 1), "missing"]) == {"k": {"x": 1}, ("a", 1): "tuple key"}
+
+        await second.delete("gone")
+        assert await first.get("gone") is None
+
+        await first.set("short", 1, ttl=0.05)
+        await first.set("past", 1, expires_at=time.time() - 1)
+        await asyncio.sleep(0.1)
+        assert await second.get_many(["short", "past"]) == {}
+        assert first.stats()["backend"] == kind
+
+    run(kind, tmp_path, scenario)
+
+
+@pytest.mark.parametrize("kind", BACKENDS)
+def test_invalidate_drops_a_scope_for_every_worker(kind, tmp_path):
+    async def scenario(make):
+        scope = lambda key: key[1]
+        first = SharedCache("members", ttl=60, scope=scope, backend=make())
+        second = SharedCache("members", ttl=60, scope=scope, backend=make())
+        await first.set_many({("u1", "g1"): True, ("u2", "g1"): False, ("u1", "g2"): True})
+        assert len(await second.get_many([("u1", "g1"), ("u2", "g1"), ("u1", "g2")])) == 3
+
+        await second.invalidate("g1")
+        assert await first.get_many([("u1", "g1"), ("u2", "g1"), ("u1", "g2")]) == {("u1", "g2"): True}
+
+        # Written after the invalidation: a new generation
+        await first.set(("u1", "g1"), False)
+        assert await second.get(("u1", "g1")) is False
+
+    run(kind, tmp_path, scenario)
+
+
+@pytest.mark.parametrize("kind", ["file", "redis"])
+def test_serialised_values_round_trip(kind, tmp_path):
+    import app.utils.jwt_utils  # registers UserResponse
+
+    values = {
+        "url": ("https://signed.example/a.jpg", datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc)),
+        "user": UserResponse(id="u1", email="u1@example.com", metadata={"username": "u1"}),
+        "row": {"id": "g1", "tags": ["a", "b"], "__tuple__": "a plain key"},
+        "flag": False,
+    }
+
+    async def scenario(make):
+        first, second = SharedCache("typed", ttl=60, backend=make()), SharedCache("typed", ttl=60, backend=make())
+        await first.set_many(values)
+        assert await second.get_many(list(values)) == values
+
+    run(kind, tmp_path, scenario)
+
+
+class Planted:
+    def __reduce__(self):
+        return (open, (os.environ["PLANTED_MARKER"], "w"))
+
+
+def test_planted_pickle_is_a_miss_not_code(tmp_path, monkeypatch):
+    marker = tmp_path / "ran"
+    monkeypatch.setenv("PLANTED_MARKER", str(marker))
+    store = tmp_path / "store"
+
+    async def scenario(make):
+        cache = SharedCache("planted", ttl=60, backend=make())
+        await cache.set("k", "real")
+        for entry in os.scandir(store):
+            with open(entry.path, "wb") as f:
+                f.write(pickle.dumps((None, Planted())))
+        assert await cache.get("k") is None
+
+    run("file", store, scenario)
+    assert not marker.exists()
+
+
+class FailingBackend(CacheBackend):
+    name = "failing"
+
+    def __init__(self, error):
+        self.error = error
+
+    async def get_many(self, keys):
+        raise self.error
+
+    async def set_many(self, entries):
+        raise self.error
+
+    async def add_many(self, entries):
+        raise self.error
+
+    async def delete(self, keys):
+        raise self.error
+
+
+@pytest.mark.parametrize("error", [OSError("down"), asyncio.TimeoutError(), EOFError()])
+def test_backend_failures_read_as_misses(error):
+    async def scenario():
+        cache = SharedCache("failing", scope=lambda key: key[1], backend=FailingBackend(error))
+        await cache.set(("u", "g"), True)
+        assert await cache.get(("u", "g")) is None
+        await cache.delete(("u", "g"))
+        await cache.invalidate("g")
+        assert cache.stats()["errors"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_unresponsive_redis_times_out_as_a_miss():
+    async def scenario():
+        async def silent(reader, writer):
+            await reader.read()
+
+        server = await asyncio.start_server(silent, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = SharedCache("slow", backend=RedisBackend(f"redis://127.0.0.1:{port}/0", timeout=0.05))
+        try:
+            started = time.monotonic()
+            assert await cache.get("k") is None
+            await cache.set("k", 1)
+            assert time.monotonic() - started < 1
+            assert cache.stats()["errors"] == 2
+        finally:
+            await cache.backend.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+class FlakyBackend(MemoryBackend):
+    """Fails the first `failures` deletes."""
+
+    def __init__(self, failures):
+        super().__init__(100)
+        self.failures = failures
+
+    async def delete(self, keys):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection reset")
+        await super().delete(keys)
+
+
+def test_strict_writes_are_retried_then_raise():
+    async def scenario():
+        flaky = SharedCache("flaky", scope=lambda key: key[1], backend=FlakyBackend(failures=2))
+        await flaky.set(("u", "g"), True)
+        await flaky.invalidate("g", strict=True)
+        assert await flaky.get(("u", "g")) is None
+
+        failing = SharedCache("failing", backend=FailingBackend(OSError("down")))
+        for write in (
+            failing.set("k", 1, strict=True),
+            failing.delete("k", strict=True),
+            failing.invalidate("g", strict=True),
+        ):
+            with pytest.raises(CacheBackendError):
+                await write
+        assert failing.stats()["errors"] == 3 * CACHE_STRICT_ATTEMPTS
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+"""
+Uploads: the size limit answers before anything is stored (with CORS headers,
+so browsers can read the 413), and accepted files are stored as sent.
+"""
+from conftest import jpeg_bytes, stored_file
+
+ORIGIN = {"Origin": "http://example.com"}
+
+
+def upload(client, group, headers, content: bytes):
+    return client.post(
+        "/photos/upload",
+        data={"group_id": group["id"]},
+        files={"file": ("photo.jpg", content, "image/jpeg")},
+        headers=headers,
+    )
+
+
+def test_oversized_content_length_gets_413_with_cors_headers(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    response = client.post(
+        "/photos/upload",
+        content=b"x",
+        headers={**owner, **ORIGIN, "Content-Type": "multipart/form-data; boundary=x", "Content-Length": str(1 << 40)},
+    )
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"]
+
+
+def test_oversized_file_is_rejected_before_storage(client, users, make_group, monkeypatch):
+    import app.utils.validation as validation
+
+    owner = users("owner")
+    group = make_group(owner)
+    # Under the middleware's Content-Length limit, over the per-file limit
+    monkeypatch.setattr(validation, "MAX_UPLOAD_SIZE_MB", 0.01)
+    response = upload(client, group, {**owner, **ORIGIN}, jpeg_bytes(1200, 900) + b"\0" * 20_000)
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"]
+    assert client.get(f"/photos/groups/{group['id']}", headers=owner).json()["photos"] == []
+
+
+def test_upload_stores_file_and_size(client, users, make_group):
+    owner = users("owner")
+    group = make_group(owner)
+    content = jpeg_bytes()
+    response = upload(client, group, owner, content)
+    assert response.status_code == 200, response.text
+    photo = response.json()
+    assert photo["size"] == len(content)
+    assert stored_file(photo["storage_path"]).read_bytes() == content
@@ -0,0 +1,50 @@
+"""
+Image worker pool: a worker dying takes its pool down, so the pool is
+replaced and the task retried on the new one.
+"""
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.utils.worker_pool import WorkerPool
+
+
+def exit_once(marker: str) -> str:
+    # Kills the worker the first time, like an OOM kill on a huge image
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "rendered"
+
+
+def exit_always() -> None:
+    os._exit(1)
+
+
+def test_broken_pool_is_replaced_and_the_task_retried(tmp_path):
+    pool = WorkerPool(kind="process", workers=1)
+
+    async def main():
+        broken = pool.executor
+        assert await pool.run(exit_once, str(tmp_path / "died")) == "rendered"
+        assert pool.executor is not broken
+        return pool.stats()
+
+    try:
+        stats = asyncio.run(main())
+    finally:
+        pool.shutdown()
+    assert (stats["completed"], stats["retried"], stats["failed"]) == (1, 1, 0)
+
+
+def test_a_task_that_breaks_the_fresh_pool_too_fails():
+    pool = WorkerPool(kind="process", workers=1)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(pool.run(exit_always))
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert (stats["completed"], stats["retried"], stats["failed"]) == (0, 1, 1)
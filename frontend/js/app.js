@@ -5,6 +5,21 @@ let currentUser = JSON.parse(localStorage.getItem('user')) || null;
 let currentToken = localStorage.getItem('token') || null;
 let currentGroup = null;
 
+// Signed URLs by `${rendition}:${photoId}`, see api.getSignedUrls
+const signedUrlCache = {};
+const SIGNED_URL_MIN_REMAINING_MS = 5 * 60 * 1000;
+
+// Stores signed URL responses ({ photo_id, signed_url, expires_at }) for reuse
+const rememberSignedUrls = (signed, rendition) => {
+    signed.forEach(s => {
+        if (s.expires_at) {
+            // expires_at is UTC without an offset
+            const expiresAt = Date.parse(s.expires_at.endsWith('Z') ? s.expires_at : `${s.expires_at}Z`);
+            signedUrlCache[`${rendition}:${s.photo_id}`] = { response: s, expiresAt };
+        }
+    });
+};
+
 // --- Auth Helpers ---
 const headers = () => {
     return {
@@ -41,6 +56,18 @@ const api = {
         return res.json();
     },
 
+    // Groups (with photo counts and cover thumbnails) plus, when groupId is
+    // given, that group's first photo page and thumbnail URLs, in one request
+    getDashboard: async (groupId = null) => {
+        const params = new URLSearchParams();
+        if (groupId) params.set('group_id', groupId);
+        const res = await fetch(`${API_URL}/dashboard?${params}`, { headers: headers() });
+        if (!res.ok) throw await res.json();
+        const dashboard = await res.json();
+        rememberSignedUrls(dashboard.signed_urls, 'thumb');
+        return dashboard;
+    },
+
     getGroups: async () => {
         const res = await fetch(`${API_URL}/groups`, { headers: headers() });
         if (!res.ok) throw await res.json();
@@ -83,20 +110,41 @@ const api = {
         return res.json();
     },
 
-    getPhotos: async (groupId) => {
-        const res = await fetch(`${API_URL}/photos/groups/${groupId}`, { headers: headers() });
+    // Returns { photos, next_cursor }; pass next_cursor back for the next page
+    getPhotos: async (groupId, cursor = null, limit = 50) => {
+        const params = new URLSearchParams({ limit });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`${API_URL}/photos/groups/${groupId}?${params}`, { headers: headers() });
         if (!res.ok) throw await res.json();
         return res.json();
     },
 
-    getSignedUrls: async (photoIds) => {
+    // rendition: 'thumb' (grid), 'preview' (screen size) or 'original'
+    // URLs are reused while they have at least SIGNED_URL_MIN_REMAINING_MS left,
+    // so only photos without a usable URL are requested.
+    getSignedUrls: async (photoIds, rendition = 'original') => {
+        const now = Date.now();
+        const cached = [];
+        const missing = [];
+        photoIds.forEach(id => {
+            const entry = signedUrlCache[`${rendition}:${id}`];
+            if (entry && entry.expiresAt - now > SIGNED_URL_MIN_REMAINING_MS) {
+                cached.push(entry.response);
+            } else {
+                missing.push(id);
+            }
+        });
+        if (missing.length === 0) return cached;
+
         const res = await fetch(`${API_URL}/photos/signed-urls`, {
             method: 'POST',
             headers: headers(),
-            body: JSON.stringify({ photo_ids: photoIds, expires_in_seconds: 3600 })
+            body: JSON.stringify({ photo_ids: missing, expires_in_seconds: 3600, rendition })
         });
         if (!res.ok) throw await res.json();
-        return res.json();
+        const signed = await res.json();
+        rememberSignedUrls(signed, rendition);
+        return cached.concat(signed);
     },
 
     uploadPhoto: async (groupId, file) => {